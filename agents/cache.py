@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+# Content-addressed cache for chat completions: an in-memory LRU in front of
+# a SQLite file with TTL and size-bounded eviction. Concurrent identical
+# requests share one upstream call (single-flight).
+
+DEFAULT_PATH = Path.home() / ".cache" / "ai-mmm-platform" / "llm_cache.sqlite"
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature: float | None = None) -> str:
+    """
+    sha256 over the canonical JSON of (model, messages, temperature).
+    """
+    blob = json.dumps([model, messages, temperature], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier response cache.
+
+    ``path=None`` keeps the cache in memory only. Entries older than ``ttl``
+    seconds are misses and are purged; once the SQLite tier holds more than
+    ``max_disk_bytes`` of responses the least recently used rows are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = DEFAULT_PATH,
+        max_items: int = 512,
+        ttl: float = 7 * 24 * 3600,
+        max_disk_bytes: int = 64 * 1024**2,
+    ):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+
+        self._mem: OrderedDict[str, tuple[str, float, float]] = OrderedDict()  # key -> (value, created, latency)
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "deduplicated": 0, "evictions": 0}
+        self._saved = 0.0
+
+        self._db = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL, latency REAL, size INTEGER)"
+            )
+
+    # --------------------------------------------------------
+    # tiers
+    # --------------------------------------------------------
+
+    def _get(self, key: str, now: float) -> str | None:
+        # caller holds the lock
+        hit = self._mem.get(key)
+        if hit is not None and now - hit[1] <= self.ttl:
+            self._mem.move_to_end(key)
+            self._counts["memory_hits"] += 1
+            self._saved += hit[2]
+            return hit[0]
+        if hit is not None:
+            del self._mem[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value, created, latency FROM responses WHERE key = ? AND created >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._remember(key, *row)
+                self._counts["disk_hits"] += 1
+                self._saved += row[2]
+                return row[0]
+        return None
+
+    def _remember(self, key: str, value: str, created: float, latency: float) -> None:
+        self._mem[key] = (value, created, latency)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self._counts["misses"] += 1
+            return value
+
+    def put(self, key: str, value: str, latency: float = 0.0) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now, latency)
+            if self._db is None:
+                return
+            size = len(value.encode())
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", (key, value, now, now, latency, size)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # expired rows first, then least recently used beyond the size budget
+        expired = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        dropped = 0
+        if total > self.max_disk_bytes:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall()
+            victims = []
+            for key, size in rows:
+                if total <= self.max_disk_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+            for (key,) in victims:
+                self._mem.pop(key, None)
+            dropped = len(victims)
+        self._counts["evictions"] += max(expired, 0) + dropped
+
+    # --------------------------------------------------------
+    # single-flight front end
+    # --------------------------------------------------------
+
+    def _claim(self, key: str) -> tuple[str | None, Future | None, bool]:
+        # (cached value, in-flight future, whether this caller owns the call)
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is not None:
+                return value, None, False
+            pending = self._inflight.get(key)
+            if pending is None:
+                self._counts["misses"] += 1
+                pending = self._inflight[key] = Future()
+                return None, pending, True
+            self._counts["deduplicated"] += 1
+            return None, pending, False
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def get_or_call(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float | None,
+        call: Callable[[], str],
+    ) -> str:
+        """
+        Cached ``call()``. Identical concurrent requests wait on the first
+        one's result instead of each going upstream; errors are not cached.
+        """
+        key = cache_key(model, messages, temperature)
+        value, pending, owner = self._claim(key)
+        if value is not None:
+            return value
+        if not owner:
+            return pending.result()
+
+        t0 = time.perf_counter()
+        try:
+            value = call()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            self.put(key, value, latency=time.perf_counter() - t0)
+            pending.set_result(value)
+            return value
+        finally:
+            self._release(key)
+
+    def stream_or_call(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float | None,
+        stream: Callable[[], Iterator[str]],
+    ) -> Iterator[str]:
+        """
+        Streaming ``get_or_call``. The first caller for a key yields
+        ``stream()``'s deltas as they arrive and caches the joined text;
+        identical concurrent callers (streamed or not) share that one
+        upstream call and, like cache hits, get the answer in one piece.
+        """
+        key = cache_key(model, messages, temperature)
+        value, pending, owner = self._claim(key)
+        if value is not None:
+            yield value
+            return
+        if not owner:
+            yield pending.result()
+            return
+
+        t0 = time.perf_counter()
+        parts = []
+        try:
+            for delta in stream():
+                parts.append(delta)
+                yield delta
+        except BaseException as e:
+            # a consumer that stops early closes the generator (GeneratorExit)
+            pending.set_exception(e if isinstance(e, Exception) else RuntimeError("stream abandoned before completion"))
+            raise
+        else:
+            value = "".join(parts)
+            self.put(key, value, latency=time.perf_counter() - t0)
+            pending.set_result(value)
+        finally:
+            self._release(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counts)
+            hits = out["memory_hits"] + out["disk_hits"] + out["deduplicated"]
+            lookups = hits + out["misses"]
+            out["hit_rate"] = hits / lookups if lookups else float("nan")
+            out["latency_saved_s"] = self._saved
+            out["memory_items"] = len(self._mem)
+            if self._db is not None:
+                out["disk_items"], out["disk_bytes"] = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+
+_CACHE: ResponseCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """
+    Process-wide shared ``ResponseCache``. ``LLM_CACHE_PATH`` overrides the
+    SQLite file; set it to an empty string for a memory-only cache.
+    """
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            path = os.environ.get("LLM_CACHE_PATH", str(DEFAULT_PATH))
+            _CACHE = ResponseCache(path or None, ttl=float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600)))
+        return _CACHE
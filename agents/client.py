@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from analytics.tracing import span
+
+# Shared HTTP client for the chat-completions endpoint: one keep-alive
+# connection pool per process, timeouts on every call, jittered retries on
+# rate limits / server errors, and an asyncio front end.
+
+DEFAULT_URL = "https://openrouter.ai/api/v1/chat/completions"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def iter_sse_deltas(lines: Iterable[bytes | str]) -> Iterator[str]:
+    """
+    Content deltas from a chat-completions server-sent-event stream. Comment
+    lines (``: keep-alive``) and empty deltas are skipped; ``[DONE]`` ends it.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        choices = json.loads(data).get("choices") or [{}]
+        delta = (choices[0].get("delta") or {}).get("content")
+        if delta:
+            yield delta
+
+
+class ChatClient:
+    """
+    Pooled chat-completions client.
+
+    ``timeout`` is (connect, read) seconds. Failed calls (connection errors,
+    timeouts, ``RETRY_STATUSES``) are retried up to ``max_retries`` times with
+    exponential backoff and jitter, honoring a numeric ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        timeout: tuple[float, float] = (5.0, 60.0),
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        pool_size: int = 16,
+    ):
+        self.url = url or os.environ.get("OPENROUTER_URL", DEFAULT_URL)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _delay(self, attempt: int, response: requests.Response | None) -> float:
+        if response is not None:
+            try:
+                return min(float(response.headers.get("Retry-After", "")), self.max_backoff)
+            except ValueError:
+                pass
+        cap = min(self.max_backoff, self.backoff * 2**attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def post(self, payload: Dict[str, Any], headers: Dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        """
+        POST ``payload`` with retries; returns the successful response
+        or raises ``requests.HTTPError`` / ``requests.RequestException``.
+        """
+        for attempt in range(self.max_retries + 1):
+            response = None
+            with span("llm.http", model=payload.get("model"), attempt=attempt, stream=stream) as sp:
+                try:
+                    response = self.session.post(self.url, json=payload, headers=headers, timeout=self.timeout, stream=stream)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == self.max_retries:
+                        raise
+                else:
+                    if sp:
+                        sp.set(status=response.status_code)
+                        if not stream:
+                            sp.set(bytes=len(response.content))
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                        response.raise_for_status()
+                        return response
+                    response.close()
+            time.sleep(self._delay(attempt, response))
+        raise AssertionError("unreachable")
+
+    def _payload(self, model, messages, api_key, temperature, headers):
+        payload: Dict[str, Any] = {"model": model, "messages": messages}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        h = {"Content-Type": "application/json", **(headers or {})}
+        if api_key:
+            h["Authorization"] = f"Bearer {api_key}"
+        return payload, h
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        api_key: str | None = None,
+        temperature: float | None = None,
+        headers: Dict[str, str] | None = None,
+    ) -> str:
+        """
+        One chat completion; returns the assistant message content.
+        """
+        payload, h = self._payload(model, messages, api_key, temperature, headers)
+        data = self.post(payload, headers=h).json()
+        return data["choices"][0]["message"]["content"]
+
+    def chat_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        api_key: str | None = None,
+        temperature: float | None = None,
+        headers: Dict[str, str] | None = None,
+    ) -> Iterator[str]:
+        """
+        Streaming chat completion (``"stream": true``): yields content deltas
+        as the server sends them. Retries cover the request only, not a
+        stream that breaks midway.
+        """
+        payload, h = self._payload(model, messages, api_key, temperature, headers)
+        payload["stream"] = True
+        h["Accept"] = "text/event-stream"
+
+        response = self.post(payload, headers=h, stream=True)
+        try:
+            yield from iter_sse_deltas(response.iter_lines())
+        finally:
+            response.close()
+
+    async def achat(self, *args, **kwargs) -> str:
+        """
+        ``chat`` on a worker thread, so several calls can be awaited at once.
+        """
+        return await asyncio.to_thread(self.chat, *args, **kwargs)
+
+    async def achat_stream(self, *args, **kwargs) -> AsyncIterator[str]:
+        """
+        Async iterator over ``chat_stream``; each chunk is read on a worker thread.
+        """
+        it = self.chat_stream(*args, **kwargs)
+        done = object()
+        while True:
+            delta = await asyncio.to_thread(next, it, done)
+            if delta is done:
+                return
+            yield delta
+
+    async def achat_many(self, calls: List[Dict[str, Any]], max_concurrency: int = 8) -> List[str]:
+        """
+        Run many ``chat`` calls (keyword dicts) concurrently, at most
+        ``max_concurrency`` in flight; results keep the input order. The calls
+        get their own ``max_concurrency`` threads: asyncio's default executor
+        is sized by CPU count and would cap the fan-out on small machines.
+        """
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="chat")
+        try:
+            futures = [
+                loop.run_in_executor(pool, contextvars.copy_context().run, functools.partial(self.chat, **kw))
+                for kw in calls
+            ]
+            return list(await asyncio.gather(*futures))
+        finally:
+            pool.shutdown(wait=False)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_CLIENT: ChatClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> ChatClient:
+    """
+    Process-wide shared ``ChatClient`` (created on first use).
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = ChatClient()
+        return _CLIENT
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from analytics.tracing import span
+
+# Small declarative runtime for the agent graph: nodes name their inputs,
+# every node whose inputs are ready runs on a thread pool, and the run
+# records per-node latency plus the critical path through the graph.
+
+
+@dataclass
+class Node:
+    """
+    ``fn(inputs)`` gets the initial state merged with the outputs of the
+    nodes listed in ``inputs`` and returns a string, or an iterator of string
+    deltas that are joined (and forwarded to ``on_delta`` while running).
+    ``fallback(inputs, error)`` supplies the output on error or timeout;
+    without one the error propagates.
+    """
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    inputs: Tuple[str, ...] = ()
+    timeout: float | None = None
+    fallback: Callable[[Dict[str, Any], BaseException], str] | None = None
+
+
+@dataclass
+class NodeRun:
+    name: str
+    start: float
+    end: float
+    status: str  # "ok" | "fallback"
+    error: str = ""
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class DagRun:
+    outputs: Dict[str, str]
+    nodes: List[NodeRun]
+    wall_s: float
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_s: float = 0.0
+
+    @property
+    def sum_s(self) -> float:
+        """Latency if every node ran one after another."""
+        return sum(n.seconds for n in self.nodes)
+
+    def timings(self) -> List[Dict[str, Any]]:
+        return [
+            {"node": n.name, "start_s": n.start, "seconds": n.seconds, "status": n.status, "error": n.error}
+            for n in self.nodes
+        ]
+
+
+class NodeTimeout(TimeoutError):
+    pass
+
+
+class Replace(str):
+    """
+    Delta that replaces, rather than extends, the text a node has streamed
+    so far; fallbacks are sent this way so partial output is discarded.
+    """
+
+
+class DAG:
+    """
+    Validated node set; ``run`` executes it, ``stream`` yields deltas.
+    """
+
+    def __init__(self, nodes: List[Node], max_workers: int = 8):
+        self.last_run: DagRun | None = None
+        self.nodes = {n.name: n for n in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Duplicate node names")
+        for n in nodes:
+            missing = [i for i in n.inputs if i not in self.nodes]
+            if missing:
+                raise ValueError(f"Node {n.name!r} depends on unknown nodes {missing}")
+        self.order = self._toposort()
+        self.max_workers = max_workers
+
+    def _toposort(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "active":
+                raise ValueError(f"Cycle through node {name!r}")
+            state[name] = "active"
+            for dep in self.nodes[name].inputs:
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    def _execute(self, node: Node, inputs: Dict[str, Any], on_delta, live: threading.Event, lock) -> str:
+        # ``lock`` orders this node's deltas against ``run`` clearing ``live``,
+        # so nothing is forwarded after a timeout's fallback
+        with span(f"agent.{node.name}") as sp:
+            out = node.fn(inputs)
+            if isinstance(out, str):
+                with lock:
+                    if on_delta is not None and live.is_set():
+                        on_delta(node.name, out)
+                if sp:
+                    sp.set(bytes=len(out.encode("utf-8")))
+                return out
+            parts = []
+            try:
+                for delta in out:
+                    with lock:
+                        if not live.is_set():
+                            break  # timed out; the result is no longer wanted
+                        if on_delta is not None:
+                            on_delta(node.name, delta)
+                    if sp and not parts:
+                        sp.set(first_delta_s=(time.perf_counter_ns() - sp.start_ns) / 1e9)
+                    parts.append(delta)
+            finally:
+                if hasattr(out, "close"):
+                    out.close()  # release the upstream stream instead of draining it
+            text = "".join(parts)
+            if sp:
+                sp.set(bytes=len(text.encode("utf-8")), deltas=len(parts))
+            return text
+
+    def run(self, state: Dict[str, Any], on_delta: Callable[[str, str], None] | None = None) -> DagRun:
+        """
+        Run every node once, as soon as its inputs are available.
+        """
+        t0 = time.perf_counter()
+        outputs: Dict[str, str] = {}
+        runs: Dict[str, NodeRun] = {}
+        running: Dict[Any, Tuple[str, float, threading.Event, Any]] = {}  # future -> (name, start, live, lock)
+        pending = list(self.order)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent")
+        try:
+            while pending or running:
+                for name in [p for p in pending if all(i in outputs for i in self.nodes[p].inputs)]:
+                    node = self.nodes[name]
+                    inputs = {**state, **{i: outputs[i] for i in node.inputs}}
+                    live, lock = threading.Event(), threading.Lock()
+                    live.set()
+                    # under the caller's context, so its tracer records the node
+                    ctx = contextvars.copy_context()
+                    fut = pool.submit(ctx.run, self._execute, node, inputs, on_delta, live, lock)
+                    running[fut] = (name, time.perf_counter() - t0, live, lock)
+                    pending.remove(name)
+
+                now = time.perf_counter() - t0
+                deadlines = [
+                    s + self.nodes[n].timeout for n, s, _, _ in running.values() if self.nodes[n].timeout is not None
+                ]
+                wait_for = max(min(deadlines) - now, 0.0) if deadlines else None
+                done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                now = time.perf_counter() - t0
+                for fut in list(running):
+                    name, start, live, lock = running[fut]
+                    node = self.nodes[name]
+                    if fut in done:
+                        error = fut.exception()
+                    elif node.timeout is not None and now >= start + node.timeout:
+                        error = NodeTimeout(f"{name} exceeded {node.timeout:.1f}s")
+                        with lock:
+                            live.clear()
+                    else:
+                        continue
+                    del running[fut]
+
+                    if error is None:
+                        outputs[name] = fut.result()
+                        runs[name] = NodeRun(name, start, now, "ok")
+                        continue
+                    if node.fallback is None:
+                        raise error
+                    inputs = {**state, **{i: outputs[i] for i in node.inputs}}
+                    outputs[name] = node.fallback(inputs, error)
+                    if on_delta is not None:
+                        # replaces whatever the node streamed before failing
+                        on_delta(name, Replace(outputs[name]))
+                    runs[name] = NodeRun(name, start, now, "fallback", f"{type(error).__name__}: {error}")
+        finally:
+            # timed-out nodes may still be running; don't block on them
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # critical path: longest chain of measured node latencies
+        best: Dict[str, Tuple[float, List[str]]] = {}
+        for name in self.order:
+            prev = max((best[i] for i in self.nodes[name].inputs), default=(0.0, []), key=lambda b: b[0])
+            best[name] = (prev[0] + runs[name].seconds, prev[1] + [name])
+        cp_s, cp = max(best.values(), key=lambda b: b[0]) if best else (0.0, [])
+
+        return DagRun(
+            outputs=outputs,
+            nodes=[runs[n] for n in self.order],
+            wall_s=time.perf_counter() - t0,
+            critical_path=cp,
+            critical_path_s=cp_s,
+        )
+
+    def stream(self, state: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        """
+        Run in a background thread and yield ``(node, delta)`` pairs as they
+        arrive from concurrently running nodes. Plain-string outputs are
+        yielded whole when the node finishes; a fallback arrives as a
+        ``Replace`` delta that supersedes the node's earlier deltas. The finished ``DagRun`` is left
+        on ``self.last_run``.
+        """
+        q: queue.Queue = queue.Queue()
+        done = object()
+
+        def target():
+            try:
+                self.last_run = self.run(state, on_delta=lambda name, delta: q.put((name, delta)))
+            except BaseException as e:
+                q.put(e)
+            q.put(done)
+
+        threading.Thread(target=contextvars.copy_context().run, args=(target,), daemon=True).start()
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
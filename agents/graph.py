@@ -1,104 +1,264 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Dict, Any
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple
 
-import streamlit as st
+from agents.cache import get_cache
+from agents.client import get_client
+from agents.dag import DAG, DagRun, Node
+from analytics.tracing import span
 
 # NOTE:
 # We keep this minimal so it runs on Streamlit Cloud.
 # If OPENROUTER_API_KEY is not set, it falls back to a local "mock" answer.
 
 
-def _call_openrouter(prompt: str) -> str:
-    """
-    Minimal OpenRouter chat call (no external SDK).
-    Uses requests (already common in Streamlit env).
-    """
-    import requests
+TEMPERATURE = 0.3
 
+
+def _api_key() -> str:
+    # st.secrets only when running inside Streamlit; headless callers never
+    # pay for importing it
     api_key = None
+    st = sys.modules.get("streamlit")
     try:
-        api_key = st.secrets.get("OPENROUTER_API_KEY")
+        api_key = st.secrets.get("OPENROUTER_API_KEY") if st is not None else None
     except Exception:
         api_key = None
 
-    api_key = api_key or os.environ.get("OPENROUTER_API_KEY", "")
+    return api_key or os.environ.get("OPENROUTER_API_KEY", "")
 
-    if not api_key:
-        return (
-            "⚠️ OPENROUTER_API_KEY not set.\n\n"
-            "Mock answer:\n"
-            f"- You asked: {prompt}\n"
-            "- Add your key in Streamlit Cloud → Settings → Secrets\n"
-        )
 
+def _mock_answer(prompt: str) -> str:
+    return (
+        "⚠️ OPENROUTER_API_KEY not set.\n\n"
+        "Mock answer:\n"
+        f"- You asked: {prompt}\n"
+        "- Add your key in Streamlit Cloud → Settings → Secrets\n"
+    )
+
+
+def _request(prompt: str):
+    """
+    Model, messages and extra headers for one agent prompt.
+    """
     # Choose a free model you like. (You can change this later.)
     model = os.environ.get("OPENROUTER_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
     headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
         # Optional headers (nice to have; safe if blank):
         "HTTP-Referer": os.environ.get("OPENROUTER_SITE_URL", ""),
         "X-Title": os.environ.get("OPENROUTER_APP_NAME", "ai-mmm-platform"),
     }
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "You are a helpful marketing analytics assistant."},
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.3,
-    }
+    messages = [
+        {"role": "system", "content": "You are a helpful marketing analytics assistant."},
+        {"role": "user", "content": prompt},
+    ]
+    return model, messages, headers
 
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    r.raise_for_status()
-    data = r.json()
 
-    return data["choices"][0]["message"]["content"]
+def _call_openrouter(prompt: str) -> str:
+    """
+    Minimal OpenRouter chat call (no external SDK) over the shared pooled
+    client in ``agents.client``; repeated prompts are served from the
+    response cache in ``agents.cache``.
+    """
+    api_key = _api_key()
+    if not api_key:
+        return _mock_answer(prompt)
 
+    model, messages, headers = _request(prompt)
+    with span("llm.chat", model=model, prompt_bytes=len(prompt.encode("utf-8"))) as sp:
+        called = []
 
-def build_graph():
-    """
-    Returns a simple object with invoke() so the Streamlit page can call it.
+        def call():
+            called.append(True)
+            return get_client().chat(model, messages, api_key=api_key, temperature=TEMPERATURE, headers=headers)
 
-    We keep 'graph' lightweight (no heavy LangGraph dependencies required),
-    while preserving your "agentic workflow" idea.
+        answer = get_cache().get_or_call(model, messages, TEMPERATURE, call)
+        if sp:
+            sp.set(cached=not called, bytes=len(answer.encode("utf-8")))
+        return answer
+
+
+def _stream_openrouter(prompt: str) -> Iterator[str]:
+    """
+    Streaming variant of ``_call_openrouter``: yields content deltas as the
+    server sends them. A cached answer, or one another caller is already
+    fetching, is yielded in one piece; a completed stream is written back
+    to the cache.
     """
+    api_key = _api_key()
+    if not api_key:
+        yield _mock_answer(prompt)
+        return
 
-    class SimpleGraph:
-        def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
-            question = (state or {}).get("question", "").strip()
+    model, messages, headers = _request(prompt)
+
+    def stream():
+        with span("llm.chat_stream", model=model, prompt_bytes=len(prompt.encode("utf-8"))) as sp:
+            t0 = time.perf_counter()
+            parts = []
+            for delta in get_client().chat_stream(model, messages, api_key=api_key, temperature=TEMPERATURE, headers=headers):
+                if sp and not parts:
+                    sp.set(ttft_s=time.perf_counter() - t0)
+                parts.append(delta)
+                yield delta
+            if sp:
+                sp.set(bytes=len("".join(parts).encode("utf-8")), deltas=len(parts))
+
+    # identical concurrent prompts (streamed or not) share one upstream call
+    yield from get_cache().stream_or_call(model, messages, TEMPERATURE, stream)
 
-            if not question:
-                return {"answer": "Ask a question to start."}
 
-            # "Multi-agent" style: 3-step chain
-            analyst_prompt = f"""
+def _analyst_prompt(question: str) -> str:
+    return f"""
 You are Agent 1 (Data Analyst). Provide a concise analysis plan and what data you'd need.
 Question: {question}
 Return 3 bullets.
 """
-            analyst = _call_openrouter(analyst_prompt)
 
-            strategist_prompt = f"""
+
+def _mmm_prompt(question: str) -> str:
+    return f"""
+You are Agent 2 (MMM Specialist). Explain how a marketing mix model answers this:
+channels, adstock/saturation assumptions and the ROI read-outs to look at.
+Question: {question}
+Return 3 bullets.
+"""
+
+
+def _causal_prompt(question: str) -> str:
+    return f"""
+You are Agent 3 (Causal Inference). Propose an experiment (A/B, geo test, DiD or
+synthetic control) that would validate the answer, with the key design choices.
+Question: {question}
+Return 3 bullets.
+"""
+
+
+def _strategist_prompt(question: str, analyst: str, mmm: str = "", causal: str = "") -> str:
+    return f"""
 You are Agent 4 (Business Strategist). Turn the analysis into actionable recommendations.
 Question: {question}
 
 Context from Analyst:
 {analyst}
 
+Context from MMM Specialist:
+{mmm}
+
+Context from Causal Inference:
+{causal}
+
 Return:
 - 3 executive bullets
 - 3 recommended actions
 """
-            strategist = _call_openrouter(strategist_prompt)
 
-            return {
-                "answer": strategist,
-                "analyst_notes": analyst,
-            }
+
+def _presentation_prompt(question: str, strategy: str) -> str:
+    return f"""
+You are Agent 5 (Presentation Builder). Turn the recommendations into a 3-slide outline
+(title + 2 bullets per slide) for an executive readout.
+Question: {question}
+
+Recommendations:
+{strategy}
+"""
+
+
+# node name -> (prompt builder, upstream nodes); node names are the output keys
+AGENTS = {
+    "analyst_notes": (lambda s: _analyst_prompt(s["question"]), ()),
+    "mmm_notes": (lambda s: _mmm_prompt(s["question"]), ()),
+    "causal_notes": (lambda s: _causal_prompt(s["question"]), ()),
+    "answer": (
+        lambda s: _strategist_prompt(s["question"], s["analyst_notes"], s["mmm_notes"], s["causal_notes"]),
+        ("analyst_notes", "mmm_notes", "causal_notes"),
+    ),
+    "presentation": (lambda s: _presentation_prompt(s["question"], s["answer"]), ("answer",)),
+}
+
+
+def _fallback(name: str):
+    def fallback(inputs: Dict[str, Any], error: BaseException) -> str:
+        return f"⚠️ {name} unavailable ({type(error).__name__}: {error})"
+
+    return fallback
+
+
+def build_dag(streaming: bool = False, timeout: float | None = None) -> DAG:
+    """
+    The five-agent graph. The analyst, MMM and causal agents only need the
+    question and run concurrently; the strategist waits for all three and
+    the presentation builder for the strategist, so end-to-end latency is
+    three generations deep rather than five. Each node times out after
+    ``timeout`` seconds (``AGENT_TIMEOUT``, default 90) and falls back to a
+    short notice instead of failing the run.
+    """
+    timeout = timeout if timeout is not None else float(os.environ.get("AGENT_TIMEOUT", 90))
+    call = _stream_openrouter if streaming else _call_openrouter
+    nodes = [
+        Node(name, (lambda prompt: lambda s: call(prompt(s)))(prompt), inputs, timeout, _fallback(name))
+        for name, (prompt, inputs) in AGENTS.items()
+    ]
+    return DAG(nodes)
+
+
+def build_graph():
+    """
+    Returns a simple object with invoke() so the Streamlit page can call it.
+
+    We keep 'graph' lightweight (no heavy LangGraph dependencies required),
+    while preserving your "agentic workflow" idea.
+    """
+
+    class SimpleGraph:
+        last_run: DagRun | None = None
+
+        def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+            question = (state or {}).get("question", "").strip()
+
+            if not question:
+                return {"answer": "Ask a question to start."}
+
+            # "Multi-agent" style: five agents, independent ones in parallel
+            self.last_run = build_dag().run({"question": question})
+            return dict(self.last_run.outputs)
+
+        def stream(self, state: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+            """
+            Yields ``(agent, delta)`` pairs as tokens arrive, keyed like the
+            output of ``invoke``. Deltas of concurrently running agents are
+            interleaved; the strategist ("answer") starts once the analyst,
+            MMM and causal agents are done. An agent's fallback arrives as a
+            ``Replace`` delta that supersedes its earlier deltas.
+            """
+            question = (state or {}).get("question", "").strip()
+
+            if not question:
+                yield "answer", "Ask a question to start."
+                return
+
+            dag = build_dag(streaming=True)
+            yield from dag.stream({"question": question})
+            self.last_run = dag.last_run
+
+        async def astream(self, state: Dict[str, Any]) -> AsyncIterator[Tuple[str, str]]:
+            """
+            Async iterator over ``stream``; each chunk is pulled on a worker
+            thread so the event loop stays free.
+            """
+            it = self.stream(state)
+            done = object()
+            while True:
+                item = await asyncio.to_thread(next, it, done)
+                if item is done:
+                    return
+                yield item
 
     return SimpleGraph()
@@ -1,12 +1,11 @@
-import requests, os
+import os
+
+from agents.cache import get_cache
+from agents.client import get_client
+
 
 def openrouter_chat(model, messages):
     key = os.getenv("OPENROUTER_API_KEY")
     if not key:
         return "Missing API Key"
-    r = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
-        headers={"Authorization": f"Bearer {key}"},
-        json={"model": model, "messages": messages},
-    )
-    return r.json()["choices"][0]["message"]["content"]
+    return get_cache().get_or_call(model, messages, None, lambda: get_client().chat(model, messages, api_key=key))
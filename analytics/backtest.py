@@ -0,0 +1,175 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.mmm import _batched_lstsq
+from analytics.tracing import traced
+
+
+@dataclass
+class BacktestResult:
+    folds: pd.DataFrame
+    stability: pd.DataFrame
+    mape: float
+    rmse: float
+
+
+# ============================================================
+# FOLDS
+# ============================================================
+
+def time_series_folds(
+    n: int,
+    initial: int,
+    horizon: int,
+    step: int | None = None,
+    window: str = "expanding",
+) -> np.ndarray:
+    """
+    Rolling-origin folds as an (n_folds x 3) array of
+    (train_start, train_end, test_end) row positions; the test rows of a
+    fold are ``train_end:test_end``. "expanding" windows all start at row 0,
+    "rolling" windows keep ``initial`` rows.
+    """
+    if window not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown window {window!r}; expected 'expanding' or 'rolling'")
+    if initial < 1 or horizon < 1:
+        raise ValueError("initial and horizon must be >= 1")
+
+    ends = np.arange(initial, n - horizon + 1, step or horizon)
+    starts = np.zeros_like(ends) if window == "expanding" else ends - initial
+    return np.column_stack([starts, ends, ends + horizon])
+
+
+# ============================================================
+# BACKTEST ENGINE
+# ============================================================
+
+def _fold_factors(seg_r: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    # R factor of each fold's training rows [X | y], merged from the R
+    # factors of segments lo+1..hi (TSQR): no X'X, so no squared condition
+    r = np.zeros((len(lo),) + seg_r.shape[1:])
+    for k in range(int(lo.min()) + 1, int(hi.max()) + 1):
+        active = (lo < k) & (k <= hi)
+        if active.any():
+            stacked = np.concatenate([r[active], np.broadcast_to(seg_r[k], r[active].shape)], axis=1)
+            r[active] = np.linalg.qr(stacked, mode="r")
+    return r
+
+
+def _solve_folds(seg_r: np.ndarray, lo: np.ndarray, hi: np.ndarray, X_test: np.ndarray, y_test: np.ndarray):
+    # min-norm least squares on R (SVD, like lstsq), same solution as on the rows
+    r = _fold_factors(seg_r, lo, hi)
+    beta = _batched_lstsq(r[..., :-1], r[..., -1])
+    err = y_test - np.einsum("fhp,fp->fh", X_test, beta)
+
+    nz = y_test != 0
+    ape = np.where(nz, np.abs(err) / np.where(nz, np.abs(y_test), 1.0), np.nan)
+    with np.errstate(invalid="ignore"):
+        mape = np.nanmean(ape, axis=1) * 100
+    rmse = np.sqrt(np.mean(err**2, axis=1))
+    return beta, mape, rmse
+
+
+@traced(arg=0)
+def backtest_mmm(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    initial: int | None = None,
+    horizon: int = 4,
+    step: int | None = None,
+    window: str = "expanding",
+    n_jobs: int = 1,
+    fold_batch: int = 256,
+) -> BacktestResult:
+    """
+    Rolling-origin backtest of ``fit_mmm_ols`` on a ``prepare_mmm_design``
+    design (rows must be in time order).
+
+    Folds share one pass over the data: the rows between consecutive fold
+    boundaries are reduced once to the R factor of their QR decomposition
+    (and column sums), and each fold's least-squares problem is rebuilt by
+    merging its segments' factors. All folds are then solved as a stacked
+    batch (split over a process pool for ``n_jobs > 1``), so the cost is
+    one data pass plus small (p+1)-wide QR/SVD steps per fold rather than
+    one full lstsq per fold, without forming the ill-conditioned X'X.
+
+    Returns per-fold MAPE (%) / RMSE and channel contribution shares, and
+    per-channel share stability across folds.
+    """
+    Xmat = X.to_numpy(dtype=float)
+    y = np.asarray(y, dtype=float)
+    n, p = Xmat.shape
+
+    if initial is None:
+        initial = max(2 * p, n // 2)
+    folds = time_series_folds(n, initial, horizon, step, window)
+    if not len(folds):
+        raise ValueError(f"No folds: {n} rows, initial={initial}, horizon={horizon}")
+
+    # per-segment statistics between the boundaries any fold needs
+    bounds = np.unique(folds[:, :2])
+    seg_edges = np.concatenate([[0], bounds])
+    seg_r = np.zeros((len(seg_edges), p + 1, p + 1))
+    seg_sum = np.zeros((len(seg_edges), p))
+    for i in range(1, len(seg_edges)):
+        Xs, ys = Xmat[seg_edges[i - 1] : seg_edges[i]], y[seg_edges[i - 1] : seg_edges[i]]
+        r = np.linalg.qr(np.column_stack([Xs, ys]), mode="r")
+        seg_r[i, : len(r)], seg_sum[i] = r, Xs.sum(axis=0)
+    pre_sum = np.cumsum(seg_sum, axis=0)
+
+    lo = np.searchsorted(seg_edges, folds[:, 0])
+    hi = np.searchsorted(seg_edges, folds[:, 1])
+    col_sums = pre_sum[hi] - pre_sum[lo]
+
+    test_rows = folds[:, 1:2] + np.arange(horizon)[None, :]
+    X_test, y_test = Xmat[test_rows], y[test_rows]
+
+    chunks = [slice(i, i + fold_batch) for i in range(0, len(folds), fold_batch)]
+    args = [(seg_r, lo[c], hi[c], X_test[c], y_test[c]) for c in chunks]
+    if n_jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_solve_folds, *zip(*args)))
+    else:
+        parts = [_solve_folds(*a) for a in args]
+    beta, mape, rmse = (np.concatenate(x) for x in zip(*parts))
+
+    # media contribution share per fold (intercept excluded)
+    media = [c for c in X.columns if c != "const"]
+    media_idx = [X.columns.get_loc(c) for c in media]
+    contrib = beta[:, media_idx] * col_sums[:, media_idx]
+    denom = np.abs(contrib).sum(axis=1, keepdims=True)
+    share = np.divide(contrib, denom, out=np.full_like(contrib, np.nan), where=denom > 0)
+
+    out = pd.DataFrame(
+        {
+            "fold": np.arange(len(folds)),
+            "train_start": folds[:, 0],
+            "train_end": folds[:, 1],
+            "test_end": folds[:, 2],
+            "mape": mape,
+            "rmse": rmse,
+        }
+    )
+    for j, c in enumerate(media):
+        out[f"{c}__share"] = share[:, j]
+
+    mean = np.nanmean(share, axis=0) if len(media) else np.zeros(0)
+    std = np.nanstd(share, axis=0, ddof=1) if len(folds) > 1 else np.full(len(media), np.nan)
+    stability = pd.DataFrame(
+        {
+            "feature": media,
+            "mean_share": mean,
+            "std_share": std,
+            "cv": np.divide(std, np.abs(mean), out=np.full_like(std, np.nan), where=np.abs(mean) > 0),
+        }
+    )
+
+    return BacktestResult(
+        folds=out,
+        stability=stability,
+        mape=float(np.nanmean(mape)),
+        rmse=float(np.mean(rmse)),
+    )
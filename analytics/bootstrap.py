@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.dataset import MMMDataset, spend_totals
+from analytics.mmm import _batched_lstsq, fit_mmm_ols, ridge_penalty
+from analytics.tracing import traced
+
+
+BOOTSTRAP_METHODS = ("residual", "pairs", "block")
+
+
+@dataclass
+class BootstrapResult:
+    draws: np.ndarray
+    params: pd.DataFrame
+    contributions: pd.DataFrame
+    roi: pd.DataFrame | None
+    method: str
+    ci: float
+
+
+# ============================================================
+# RESAMPLING INDICES
+# ============================================================
+
+def bootstrap_indices(
+    rng: np.random.Generator,
+    n: int,
+    size: int,
+    method: str = "pairs",
+    block_size: int | None = None,
+) -> np.ndarray:
+    """
+    (size x n) matrix of resampled row positions.
+
+    "block" is a moving-block bootstrap: runs of ``block_size`` consecutive
+    rows are drawn and concatenated, so short-range time dependence survives
+    inside each block. Other methods draw rows independently.
+    """
+    if method != "block":
+        return rng.integers(0, n, size=(size, n))
+
+    block = block_size or max(2, int(round(n ** (1 / 3))))
+    block = min(block, n)
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(size, n_blocks))
+    return (starts[:, :, None] + np.arange(block)).reshape(size, -1)[:, :n]
+
+
+def _bootstrap_chunk(X, y, method, block_size, size, seed, penalty=None):
+    # ``penalty``: per-feature ridge penalty on X'X (None for OLS)
+    rng = np.random.default_rng(seed)
+    idx = bootstrap_indices(rng, len(y), size, method, block_size)
+
+    if method == "pairs":
+        if penalty is None:
+            return _batched_lstsq(X[idx], y[idx])
+        Xb, yb = X[idx], y[idx]
+        gram = np.einsum("brp,brq->bpq", Xb, Xb) + np.diag(penalty)
+        return np.linalg.solve(gram, np.einsum("brp,br->bp", Xb, yb)[..., None])[..., 0]
+
+    # residual / block: the design stays fixed, so every resample is one
+    # column of a single H @ Y product (H = pinv(X), or the ridge solve)
+    H = np.linalg.pinv(X) if penalty is None else np.linalg.solve(X.T @ X + np.diag(penalty), X.T)
+    yhat = X @ (H @ y)
+    Ystar = yhat + (y - yhat)[idx]
+    return Ystar @ H.T
+
+
+# ============================================================
+# BOOTSTRAP ENGINE
+# ============================================================
+
+def _interval(draws: np.ndarray, ci: float) -> tuple[np.ndarray, np.ndarray]:
+    lo, hi = np.nanpercentile(draws, [50 * (1 - ci), 50 * (1 + ci)], axis=0)
+    return lo, hi
+
+
+@traced(arg=0)
+def bootstrap_mmm(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    method: str = "residual",
+    n_boot: int = 2000,
+    block_size: int | None = None,
+    ci: float = 0.95,
+    seed: int = 0,
+    batch_size: int = 500,
+    n_jobs: int = 1,
+    df: pd.DataFrame | MMMDataset | None = None,
+    spend_cols: list[str] | None = None,
+    ridge_lambda: float | None = None,
+) -> BootstrapResult:
+    """
+    Bootstrap intervals for ``fit_mmm_ols`` params, contributions and ROI,
+    or for a ridge fit at a fixed penalty with ``ridge_lambda`` (e.g.
+    ``RegularizedResult.lambda_``; the GCV choice is not repeated per
+    resample).
+
+    - residual: fixed design, resampled residuals
+    - block: fixed design, moving-block resampled residuals (time-ordered)
+    - pairs: resampled (X, y) rows, solved with batched least squares
+
+    Resamples are generated as index matrices ``batch_size`` at a time and
+    each batch gets its own child seed, so results depend only on ``seed``
+    and ``batch_size``, never on ``n_jobs``. Pass the modeled rows of
+    ``df`` (``df.loc[X.index]``, or their ``MMMDataset``) and ``spend_cols``
+    to get ROI intervals.
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {BOOTSTRAP_METHODS}")
+
+    Xmat = X.to_numpy(dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    sizes = [min(batch_size, n_boot - i) for i in range(0, n_boot, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    penalty = None if ridge_lambda is None else ridge_penalty(X, ridge_lambda)
+    args = [(Xmat, y, method, block_size, size, s, penalty) for size, s in zip(sizes, seeds)]
+
+    if n_jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_bootstrap_chunk, *zip(*args)))
+    else:
+        parts = [_bootstrap_chunk(*a) for a in args]
+    draws = np.concatenate(parts) if parts else np.zeros((0, Xmat.shape[1]))
+
+    if penalty is None:
+        point = fit_mmm_ols(X, y).params
+    else:
+        point = np.linalg.solve(Xmat.T @ Xmat + np.diag(penalty), Xmat.T @ y)
+    lo, hi = _interval(draws, ci)
+    params = pd.DataFrame(
+        {"estimate": point, "std": draws.std(axis=0, ddof=1), "lower": lo, "upper": hi},
+        index=X.columns,
+    )
+
+    # total contribution per feature = beta * column sum, for every draw
+    col_sums = Xmat.sum(axis=0)
+    contrib_draws = draws * col_sums
+    lo, hi = _interval(contrib_draws, ci)
+    contributions = pd.DataFrame(
+        {"estimate": point * col_sums, "lower": lo, "upper": hi},
+        index=X.columns,
+    )
+
+    roi = None
+    if df is not None and spend_cols:
+        rows = []
+        cols = [c for c in spend_cols if f"{c}__x" in X.columns]
+        for c, spend in zip(cols, spend_totals(df, cols).tolist()):
+            feat = f"{c}__x"
+            j = X.columns.get_loc(feat)
+            total = float(contributions.loc[feat, "estimate"])
+            r_lo, r_hi = _interval(contrib_draws[:, j] / spend, ci) if spend > 0 else (np.nan, np.nan)
+            rows.append(
+                {
+                    "channel": c,
+                    "spend": spend,
+                    "contribution": total,
+                    "roi": (total / spend) if spend > 0 else np.nan,
+                    "roi_lower": float(r_lo),
+                    "roi_upper": float(r_hi),
+                }
+            )
+        roi = pd.DataFrame(rows)
+        if len(roi):
+            roi = roi.sort_values("roi", ascending=False)
+
+    return BootstrapResult(
+        draws=draws,
+        params=params,
+        contributions=contributions,
+        roi=roi,
+        method=method,
+        ci=ci,
+    )
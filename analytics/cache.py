@@ -0,0 +1,253 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, is_dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from analytics.bayes import fit_mmm_bayes
+from analytics.dataset import MMMDataset
+from analytics.mmm import (
+    OLSResult,
+    _channel_alphas,
+    adstock_matrix,
+    contribution_totals,
+    detect_columns,
+    fit_mmm_ols,
+    fit_mmm_ridge,
+    roi_by_channel,
+)
+from analytics.tracing import sizes, traced
+
+
+# ============================================================
+# FINGERPRINTS
+# ============================================================
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content hash of a frame: values, index, column names and dtypes.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage())
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, OLSResult) or is_dataclass(value):
+        return _nbytes(vars(value))
+    return 64
+
+
+# ============================================================
+# BOUNDED LRU
+# ============================================================
+
+class LRUCache:
+    """
+    Byte-bounded LRU. Keys are tuples whose first item names the pipeline
+    stage, so hit/miss counters are kept per stage as well as overall.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self._data: OrderedDict = OrderedDict()
+        self._counts: dict[str, dict[str, int]] = {}
+
+    def _count(self, key: tuple, field: str) -> None:
+        stage = self._counts.setdefault(key[0], {"hits": 0, "misses": 0, "evictions": 0})
+        stage[field] += 1
+
+    def get(self, key: tuple, default=None):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self._count(key, "hits")
+            return self._data[key][0]
+        self._count(key, "misses")
+        return default
+
+    def put(self, key: tuple, value) -> None:
+        size = _nbytes(value)
+        if key in self._data:
+            self.nbytes -= self._data.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self._data[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            old_key, (_, old_size) = self._data.popitem(last=False)
+            self.nbytes -= old_size
+            self._count(old_key, "evictions")
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> pd.DataFrame:
+        rows = [{"stage": k, **v} for k, v in self._counts.items()]
+        out = pd.DataFrame(rows, columns=["stage", "hits", "misses", "evictions"])
+        total = out["hits"] + out["misses"]
+        out["hit_rate"] = np.where(total > 0, out["hits"] / total.where(total > 0, 1), np.nan)
+        return out
+
+
+# ============================================================
+# MMM PIPELINE CACHE
+# ============================================================
+
+ESTIMATORS = {
+    "ols": fit_mmm_ols,
+    "ridge": fit_mmm_ridge,
+    "ridge_nonneg": partial(fit_mmm_ridge, nonneg=True),
+    "bayes": fit_mmm_bayes,
+    "bayes_positive": partial(fit_mmm_bayes, positive=True),
+}
+
+
+@dataclass
+class PipelineResult:
+    X: pd.DataFrame
+    y: np.ndarray
+    meta: dict
+    fit: OLSResult
+    contrib_totals: pd.Series
+    roi: pd.DataFrame
+    data: MMMDataset
+
+
+class MMMPipelineCache:
+    """
+    Memoizes detect_columns -> prepare_mmm_design -> fit_mmm_ols ->
+    contribution_totals -> roi_by_channel for the dashboard.
+
+    Artifacts are keyed by the frame fingerprint plus only the parameters
+    they depend on: the parsed ``MMMDataset`` by the schema, each adstocked
+    column by its own channel and alpha, and each saturated column by
+    (channel, alpha, saturation). Changing one channel's alpha therefore
+    re-adstocks one column, and toggling saturation re-adstocks none.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2):
+        self.lru = LRUCache(max_bytes=max_bytes)
+
+    def stats(self) -> pd.DataFrame:
+        return self.lru.stats()
+
+    def detect_columns(self, df: pd.DataFrame, fingerprint: str | None = None):
+        fp = fingerprint or frame_fingerprint(df)
+        key = ("schema", fp)
+        cols = self.lru.get(key)
+        if cols is None:
+            cols = detect_columns(df)
+            self.lru.put(key, cols)
+        return cols
+
+    def dataset(
+        self,
+        df: pd.DataFrame,
+        date_col: str | None,
+        target_col: str,
+        spend_cols: list[str],
+        fingerprint: str | None = None,
+    ) -> MMMDataset:
+        """
+        The frame's ``MMMDataset``, parsed once per (fingerprint, schema).
+        """
+        fp = fingerprint or frame_fingerprint(df)
+        key = ("dataset", fp, date_col, target_col, tuple(spend_cols))
+        data = self.lru.get(key)
+        if data is None:
+            data = MMMDataset.from_frame(df, date_col, target_col, spend_cols)
+            self.lru.put(key, data)
+        return data
+
+    def _adstocked(self, fkey: tuple, spend: np.ndarray, spend_cols, alphas: np.ndarray) -> list[np.ndarray]:
+        cols: list = [self.lru.get(("adstock",) + fkey + (c, float(a))) for c, a in zip(spend_cols, alphas)]
+        missing = [j for j, col in enumerate(cols) if col is None]
+        if missing:
+            fresh = adstock_matrix(spend[:, missing], alphas[missing])
+            for k, j in enumerate(missing):
+                cols[j] = np.ascontiguousarray(fresh[:, k])
+                self.lru.put(("adstock",) + fkey + (spend_cols[j], float(alphas[j])), cols[j])
+        return cols
+
+    def _features(self, fkey, spend, spend_cols, alphas: np.ndarray, use_saturation) -> np.ndarray:
+        cols: list = [
+            self.lru.get(("feature",) + fkey + (c, float(a), use_saturation)) for c, a in zip(spend_cols, alphas)
+        ]
+        missing = [j for j, col in enumerate(cols) if col is None]
+        if missing:
+            ad = self._adstocked(fkey, spend, spend_cols, alphas)
+            for j in missing:
+                cols[j] = np.log1p(np.maximum(ad[j], 0)) if use_saturation else ad[j]
+                self.lru.put(("feature",) + fkey + (spend_cols[j], float(alphas[j]), use_saturation), cols[j])
+        return np.column_stack(cols) if cols else np.zeros((len(spend), 0))
+
+    @traced("cache.pipeline_run", attrs=lambda out: sizes(out.X))
+    def run(
+        self,
+        df: pd.DataFrame,
+        date_col: str | None,
+        target_col: str,
+        spend_cols: list[str],
+        adstock_alpha=0.5,
+        use_saturation: bool = True,
+        fingerprint: str | None = None,
+        estimator: str = "ols",
+    ) -> PipelineResult:
+        if estimator not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator {estimator!r}; expected one of {list(ESTIMATORS)}")
+
+        fp = fingerprint or frame_fingerprint(df)
+        alphas = _channel_alphas(adstock_alpha, spend_cols)
+        fkey = (fp, date_col, target_col, tuple(spend_cols))
+
+        rkey = ("result",) + fkey + (tuple(alphas.tolist()), use_saturation, estimator)
+        out = self.lru.get(rkey)
+        if out is not None:
+            return out
+
+        data = self.dataset(df, date_col, target_col, spend_cols, fingerprint=fp)
+        y = data.y
+        x = self._features(fkey, data.spend, spend_cols, alphas, use_saturation)
+
+        X = pd.DataFrame(
+            np.column_stack([np.ones(data.n_rows), x]),
+            index=data.index,
+            columns=["const"] + [f"{c}__x" for c in spend_cols],
+            copy=False,
+        )
+        meta = {
+            "date_col": date_col,
+            "target_col": target_col,
+            "spend_cols": spend_cols,
+            "adstock_alpha": dict(zip(spend_cols, alphas.tolist())),
+            "adstock_kind": "geometric",
+            "max_lag": None,
+            "adstock_params": {},
+            "use_saturation": use_saturation,
+        }
+
+        fit = ESTIMATORS[estimator](X, y)
+        totals = contribution_totals(X, fit.params)
+        roi = roi_by_channel(data, totals, spend_cols)
+
+        out = PipelineResult(X=X, y=y, meta=meta, fit=fit, contrib_totals=totals, roi=roi, data=data)
+        self.lru.put(rkey, out)
+        return out
@@ -0,0 +1,290 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.tracing import traced
+
+
+def _split(panel: pd.DataFrame, start) -> int:
+    # position of the first treated week. A column label wins over a
+    # position, so integer week labels (1..52) are never read as positions;
+    # other ints are positions and datetime columns take any date.
+    try:
+        is_label = start in panel.columns
+    except TypeError:  # unhashable
+        is_label = False
+    if is_label:
+        pos = int(panel.columns.get_loc(start))
+    elif isinstance(start, (int, np.integer)):
+        pos = int(start)
+    elif isinstance(panel.columns, pd.DatetimeIndex):
+        pos = int(panel.columns.searchsorted(pd.Timestamp(start)))
+    else:
+        pos = int(panel.columns.get_loc(start))
+    if not 1 <= pos < panel.shape[1]:
+        raise ValueError(f"Treatment start {start!r} leaves no pre or post period")
+    return pos
+
+
+def _treated_mask(panel: pd.DataFrame, treated) -> np.ndarray:
+    # a single geo name, not an iterable of its characters
+    treated = [treated] if isinstance(treated, str) else list(treated)
+    mask = panel.index.isin(treated)
+    missing = set(treated) - set(panel.index[mask])
+    if missing:
+        raise ValueError(f"Treated geos not in panel: {sorted(missing)}")
+    if mask.all() or not mask.any():
+        raise ValueError("Need at least one treated and one control geo")
+    return mask
+
+
+# ============================================================
+# DIFFERENCE-IN-DIFFERENCES
+# ============================================================
+
+@dataclass
+class DiDResult:
+    estimate: float
+    se: float
+    tstat: float
+    pvalue: float
+    ci_lower: float
+    ci_upper: float
+    lift_pct: float
+    perm_pvalue: float
+    n_treated: int
+    n_control: int
+
+
+@traced(arg=0)
+def did_estimate(
+    panel: pd.DataFrame,
+    treated,
+    start,
+    ci: float = 0.95,
+    n_perm: int = 10_000,
+    seed: int = 0,
+) -> DiDResult:
+    """
+    Two-way fixed effects DiD on a geos x weeks panel (see ``kpi_panel``)
+    with geo-clustered (CR1) sandwich standard errors.
+
+    ``treated`` lists treated geos; ``start`` is the first treated week
+    (a column label or, if no column has that label, an int position). ``perm_pvalue`` is a randomization test:
+    the estimate is recomputed for ``n_perm`` random reassignments of the
+    treated label across all geos, as one (perms x geos) matrix product.
+    """
+    from scipy.stats import t as student_t
+
+    Y = panel.to_numpy(dtype=float)
+    n_geos, n_weeks = Y.shape
+    pos = _split(panel, start)
+    is_t = _treated_mask(panel, treated)
+    n_t = int(is_t.sum())
+
+    # within transformation of D_gt = treated_g * post_t on a balanced panel
+    D = np.outer(is_t, np.arange(n_weeks) >= pos).astype(float)
+    D_w = D - D.mean(axis=1, keepdims=True) - D.mean(axis=0, keepdims=True) + D.mean()
+    Y_w = Y - Y.mean(axis=1, keepdims=True) - Y.mean(axis=0, keepdims=True) + Y.mean()
+
+    sxx = float(np.sum(D_w**2))
+    tau = float(np.sum(D_w * Y_w)) / sxx
+    resid = Y_w - tau * D_w
+
+    # cluster-robust meat: one score per geo
+    scores = np.sum(D_w * resid, axis=1)
+    n_obs, k = Y.size, n_geos + n_weeks - 1 + 1
+    adj = n_geos / (n_geos - 1) * (n_obs - 1) / max(n_obs - k, 1)
+    se = float(np.sqrt(adj * np.sum(scores**2)) / sxx)
+
+    dof = n_geos - 1
+    tstat = tau / se if se > 0 else float("nan")
+    pvalue = float(2 * student_t.sf(abs(tstat), dof)) if se > 0 else float("nan")
+    half = float(student_t.ppf(0.5 + ci / 2, dof)) * se
+
+    # balanced TWFE tau == difference of mean (post - pre) changes, so a
+    # permutation is a weighted sum of per-geo changes
+    change = Y[:, pos:].mean(axis=1) - Y[:, :pos].mean(axis=1)
+    rng = np.random.default_rng(seed)
+    assign = rng.random((n_perm, n_geos)).argsort(axis=1).argsort(axis=1) < n_t
+    perm = (assign @ change) / n_t - (~assign @ change) / (n_geos - n_t)
+    perm_p = float((1 + np.sum(np.abs(perm) >= abs(tau) - 1e-12)) / (1 + n_perm))
+
+    counterfactual = float(Y[is_t, pos:].mean()) - tau
+    return DiDResult(
+        estimate=tau,
+        se=se,
+        tstat=float(tstat),
+        pvalue=pvalue,
+        ci_lower=tau - half,
+        ci_upper=tau + half,
+        lift_pct=tau / counterfactual * 100 if counterfactual else float("nan"),
+        perm_pvalue=perm_p,
+        n_treated=n_t,
+        n_control=n_geos - n_t,
+    )
+
+
+# ============================================================
+# SYNTHETIC CONTROL
+# ============================================================
+
+@dataclass
+class SyntheticControlResult:
+    weights: pd.Series
+    gap: pd.DataFrame
+    att: float
+    att_pct: float
+    pre_rmspe: float
+    post_rmspe: float
+    pvalue: float
+    placebo: pd.DataFrame
+
+
+def _project_simplex(V: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+    # row-wise Euclidean projection onto {w >= 0, sum w = 1, w[~allowed] = 0}
+    V = np.where(allowed, V, -np.inf)
+    U = -np.sort(-V, axis=1)
+    css = np.cumsum(np.where(np.isfinite(U), U, 0.0), axis=1) - 1.0
+    ks = np.arange(1, V.shape[1] + 1)
+    cond = U - css / ks > 0
+    rho = V.shape[1] - 1 - np.argmax(cond[:, ::-1], axis=1)
+    theta = css[np.arange(len(V)), rho] / (rho + 1)
+    return np.maximum(V - theta[:, None], 0.0)
+
+
+def _fit_simplex_batch(
+    targets: np.ndarray,
+    donors: np.ndarray,
+    allowed: np.ndarray,
+    n_iter: int = 2000,
+    tol: float = 1e-8,
+) -> np.ndarray:
+    """
+    min_w ||target - donors @ w||^2 over the simplex for every row of
+    ``targets`` (batch x pre weeks) at once: accelerated projected gradient
+    (FISTA with adaptive restart) on a shared step from the donor Gram
+    matrix. Rows drop out of the batch as they converge.
+    """
+    n_pre, n_donors = donors.shape
+    cross = targets @ donors
+    gram = donors.T @ donors if n_donors <= n_pre else None
+    step = 1.0 / max(float(np.linalg.norm(donors, 2)) ** 2, 1e-12)
+
+    def grad(Z, rows):
+        # the Gram matrix is cheaper only while donors <= pre weeks
+        fitted = Z @ gram if gram is not None else (Z @ donors.T) @ donors
+        return fitted - cross[rows]
+
+    W = _project_simplex(np.ones((len(targets), n_donors)), allowed)
+    Z, t = W.copy(), np.ones(len(targets))
+    active = np.arange(len(targets))
+    for _ in range(n_iter):
+        if not len(active):
+            break
+        Wa, Za = W[active], Z[active]
+        W_next = _project_simplex(Za - step * grad(Za, active), allowed[active])
+        diff = W_next - Wa
+
+        # restart momentum where it points against the last step
+        ta = np.where(np.sum((Za - W_next) * diff, axis=1) > 0, 1.0, t[active])
+        t_next = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * ta * ta))
+        Z[active] = W_next + ((ta - 1.0) / t_next)[:, None] * diff
+        W[active], t[active] = W_next, t_next
+
+        active = active[np.max(np.abs(diff), axis=1) >= tol]
+    return W
+
+
+def _rmspe(gap: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.mean(gap**2, axis=-1))
+
+
+@traced(arg=0)
+def synthetic_control(
+    panel: pd.DataFrame,
+    treated,
+    start,
+    n_iter: int = 2000,
+    batch_size: int = 64,
+    n_jobs: int = 1,
+) -> SyntheticControlResult:
+    """
+    Synthetic control for the (mean of the) ``treated`` geos of a geos x
+    weeks panel: non-negative donor weights summing to one, fit on the
+    pre-period by projected gradient.
+
+    Inference is an in-space placebo test over every control geo: each
+    control is refit against the remaining controls and the treated
+    post/pre RMSPE ratio is ranked against the placebo ratios. The treated
+    fit and all placebo fits share one donor matrix and are solved as
+    stacked batches of ``batch_size`` (a donor mask excludes each placebo's
+    own geo), spread over a process pool for ``n_jobs > 1``.
+    """
+    Y = panel.to_numpy(dtype=float)
+    pos = _split(panel, start)
+    is_t = _treated_mask(panel, treated)
+    controls = panel.index[~is_t]
+    C = Y[~is_t]
+    n_c = len(controls)
+
+    # weights sum to one, so subtracting the same series from target and
+    # donors leaves the fit unchanged; removing the weekly donor mean drops
+    # the shared level that otherwise dominates the Gram spectrum
+    target_all = np.vstack([Y[is_t].mean(axis=0), C])
+    center = C[:, :pos].mean(axis=0)
+    scale = max(float(np.std(C[:, :pos] - center)), 1e-12)
+    targets = (target_all[:, :pos] - center) / scale
+    donors = (C[:, :pos] - center).T / scale
+    allowed = np.vstack([np.ones((1, n_c), dtype=bool), ~np.eye(n_c, dtype=bool)])
+
+    chunks = [slice(i, i + batch_size) for i in range(0, len(target_all), batch_size)]
+    args = [(targets[c], donors, allowed[c], n_iter) for c in chunks]
+    if n_jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_fit_simplex_batch, *zip(*args)))
+    else:
+        parts = [_fit_simplex_batch(*a) for a in args]
+    W = np.concatenate(parts)
+
+    synth = W @ C  # levels, (1 + controls) x weeks
+    gaps = target_all - synth
+    pre, post = _rmspe(gaps[:, :pos]), _rmspe(gaps[:, pos:])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(pre > 0, post / pre, np.inf)
+
+    pvalue = float((1 + np.sum(ratio[1:] >= ratio[0])) / (1 + n_c))
+    att = float(gaps[0, pos:].mean())
+    base = float(synth[0, pos:].mean())
+
+    gap = pd.DataFrame(
+        {
+            "period": panel.columns,
+            "treated": target_all[0],
+            "synthetic": synth[0],
+            "gap": gaps[0],
+            "post": np.arange(Y.shape[1]) >= pos,
+        }
+    )
+    placebo = pd.DataFrame(
+        {
+            "geo": controls,
+            "pre_rmspe": pre[1:],
+            "post_rmspe": post[1:],
+            "ratio": ratio[1:],
+            "att": gaps[1:, pos:].mean(axis=1),
+        }
+    )
+
+    return SyntheticControlResult(
+        weights=pd.Series(W[0], index=controls, name="weight"),
+        gap=gap,
+        att=att,
+        att_pct=att / base * 100 if base else float("nan"),
+        pre_rmspe=float(pre[0]),
+        post_rmspe=float(post[0]),
+        pvalue=pvalue,
+        placebo=placebo,
+    )
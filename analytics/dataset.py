@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from analytics.tracing import traced
+
+# Typed modeling input, parsed once: the dates are parsed, cleaned and
+# sorted, and the target and spend columns are coerced to float in a single
+# pass. Every stage downstream (design, ROI, search, caches) reads these arrays
+# instead of going back to the raw frame.
+
+
+# ============================================================
+# SCHEMA DETECTION
+# ============================================================
+
+TARGET_KEYS = ("revenue", "sales", "conversions", "orders", "target")
+SPEND_KEYS = ("spend", "cost", "media")
+
+
+@traced(attrs=lambda cols: {"spend_cols": len(cols[2])})
+def detect_columns(df: pd.DataFrame):
+    """
+    ``(date_col, target_col, spend_cols)`` from column names in one pass:
+    the first name containing "date", the first name containing the
+    highest-priority ``TARGET_KEYS`` entry, and every other name containing
+    one of ``SPEND_KEYS``.
+    """
+    date_col, target_col, target_rank = None, None, len(TARGET_KEYS)
+    spend = []
+    for c in df.columns:
+        name = str(c).lower()
+        if date_col is None and "date" in name:
+            date_col = c
+        for rank in range(target_rank):
+            if TARGET_KEYS[rank] in name:
+                target_col, target_rank = c, rank
+                break
+        if any(k in name for k in SPEND_KEYS):
+            spend.append(c)
+
+    return date_col, target_col, [c for c in spend if c != target_col]
+
+
+# ============================================================
+# DATASET
+# ============================================================
+
+def _as_float(col: pd.Series) -> np.ndarray:
+    # numeric dtypes convert directly; anything else goes through to_numeric once
+    if not pd.api.types.is_numeric_dtype(col):
+        col = pd.to_numeric(col, errors="coerce")
+    return col.to_numpy(dtype=float, na_value=np.nan)
+
+
+def float_block(df: pd.DataFrame, cols: list[str]) -> np.ndarray:
+    """
+    ``cols`` coerced to one C-contiguous (rows x cols) float64 array, with
+    NaN where a value is missing or not numeric.
+    """
+    out = np.empty((len(df), len(cols)))
+    for j, c in enumerate(cols):
+        out[:, j] = _as_float(df[c])
+    return out
+
+
+@dataclass
+class MMMDataset:
+    """
+    Modeling rows of a frame: rows with a missing/unparseable target or
+    date dropped, sorted by date (stable).
+
+    ``spend`` is a C-contiguous (rows x channels) float64 matrix with
+    missing or non-numeric values as 0, and ``spend_null`` marks where they
+    were. ``index`` holds the source frame's labels of the kept rows.
+    """
+
+    date_col: str | None
+    target_col: str
+    spend_cols: list[str]
+    index: pd.Index
+    dates: pd.DatetimeIndex | None
+    y: np.ndarray
+    spend: np.ndarray
+    spend_null: np.ndarray
+    spend_totals: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.spend_totals = self.spend.sum(axis=0)
+
+    @classmethod
+    @traced("dataset.from_frame", attrs=lambda ds: {"rows": ds.n_rows, "cols": ds.n_channels, "bytes": ds.nbytes})
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        date_col: str | None = None,
+        target_col: str | None = None,
+        spend_cols: list[str] | None = None,
+    ) -> "MMMDataset":
+        """
+        Parse ``df`` once. Without ``target_col`` / ``spend_cols`` the schema
+        comes from ``detect_columns`` (which also fills a missing
+        ``date_col``). Frames that are already clean (datetime dates in
+        order, numeric columns, e.g. from ``analytics.loader``) skip parsing
+        and sorting.
+        """
+        if target_col is None or spend_cols is None:
+            found_date, found_target, found_spend = detect_columns(df)
+            date_col = found_date if date_col is None else date_col
+            target_col = found_target if target_col is None else target_col
+            spend_cols = found_spend if spend_cols is None else spend_cols
+        if not target_col:
+            raise ValueError(f"Could not detect a target column in {list(df.columns)}")
+        spend_cols = list(spend_cols)
+
+        y = _as_float(df[target_col])
+        keep = ~np.isnan(y)
+
+        dates = None
+        if date_col and date_col in df.columns:
+            raw = df[date_col]
+            if not pd.api.types.is_datetime64_any_dtype(raw):
+                raw = pd.to_datetime(raw, errors="coerce")
+            dates = pd.DatetimeIndex(raw)
+            keep &= ~dates.isna()
+
+        rows = np.flatnonzero(keep)
+        reorder = False
+        if dates is not None:
+            kept = dates[rows]
+            if not kept.is_monotonic_increasing:
+                rows = rows[np.argsort(kept.asi8, kind="stable")]
+                reorder = True
+
+        spend = float_block(df, spend_cols)
+        index = df.index
+        if reorder or len(rows) < len(df):
+            spend, y, index = spend[rows], y[rows], index[rows]
+            if dates is not None:
+                dates = dates[rows]
+
+        spend_null = np.isnan(spend)
+        spend[spend_null] = 0.0
+
+        return cls(
+            date_col=date_col if dates is not None else None,
+            target_col=target_col,
+            spend_cols=spend_cols,
+            index=index,
+            dates=dates,
+            y=np.ascontiguousarray(y),
+            spend=spend,
+            spend_null=spend_null,
+        )
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.y)
+
+    @property
+    def n_channels(self) -> int:
+        return len(self.spend_cols)
+
+    @property
+    def nbytes(self) -> int:
+        return self.y.nbytes + self.spend.nbytes + self.spend_null.nbytes
+
+    @property
+    def schema(self) -> dict:
+        return {"date_col": self.date_col, "target_col": self.target_col, "spend_cols": list(self.spend_cols)}
+
+    def _positions(self, cols: list[str]) -> list[int]:
+        missing = [c for c in cols if c not in self.spend_cols]
+        if missing:
+            raise KeyError(f"Not spend columns of this dataset: {missing}")
+        return [self.spend_cols.index(c) for c in cols]
+
+    def spend_for(self, cols: list[str]) -> np.ndarray:
+        """
+        Spend matrix for ``cols`` (the stored matrix itself when ``cols`` are
+        the dataset's channels in order).
+        """
+        if list(cols) == self.spend_cols:
+            return self.spend
+        return self.spend[:, self._positions(cols)]
+
+    def totals_for(self, cols: list[str]) -> np.ndarray:
+        return self.spend_totals[self._positions(cols)]
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The clean modeling rows as a frame (date, target, spend columns).
+        """
+        data = {}
+        if self.dates is not None:
+            data[self.date_col] = self.dates
+        data[self.target_col] = self.y
+        data.update({c: self.spend[:, j] for j, c in enumerate(self.spend_cols)})
+        return pd.DataFrame(data, index=self.index)
+
+
+def spend_totals(data: pd.DataFrame | MMMDataset, cols: list[str]) -> np.ndarray:
+    """
+    Total spend per column: precomputed for an ``MMMDataset``, coerced once
+    (missing / non-numeric as 0) for a frame.
+    """
+    if isinstance(data, MMMDataset):
+        return data.totals_for(cols)
+    return np.nan_to_num(float_block(data, cols), nan=0.0).sum(axis=0)
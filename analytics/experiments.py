@@ -1,6 +1,33 @@
 ﻿import math
 from dataclasses import dataclass
-from scipy.stats import norm
+from functools import lru_cache
+
+import numpy as np
+
+from analytics.tracing import sizes, traced
+
+
+# ============================================================
+# Z-QUANTILE TABLE
+# ============================================================
+
+@lru_cache(maxsize=4096)
+def _z(q: float) -> float:
+    """
+    Memoized standard normal quantile (scipy is imported on first use).
+    """
+    from scipy.stats import norm
+
+    return float(norm.ppf(q))
+
+
+def _z_table(q) -> np.ndarray:
+    """
+    Elementwise ``_z`` over an array; each distinct level is looked up once.
+    """
+    q = np.asarray(q, dtype=float)
+    levels, inverse = np.unique(q, return_inverse=True)
+    return np.array([_z(float(v)) for v in levels])[inverse].reshape(q.shape)
 
 
 # ============================================================
@@ -20,6 +47,8 @@ def ab_test_sample_size_per_group(
 
     # Convert % → absolute lift
     mde_abs = baseline * (mde_pct / 100)
+    if mde_abs == 0:
+        raise ValueError("baseline and mde_pct must be non-zero (a zero lift needs infinite samples)")
 
     p1 = baseline
     p2 = baseline + mde_abs
@@ -28,8 +57,8 @@ def ab_test_sample_size_per_group(
         pooled = (p1 + p2) / 2
         std = math.sqrt(2 * pooled * (1 - pooled))
 
-    z_alpha = norm.ppf(1 - alpha / 2)
-    z_beta = norm.ppf(power)
+    z_alpha = _z(1 - alpha / 2)
+    z_beta = _z(power)
 
     numerator = (z_alpha + z_beta) ** 2 * std**2
     denominator = mde_abs**2
@@ -39,17 +68,59 @@ def ab_test_sample_size_per_group(
     return math.ceil(n)
 
 
+@traced()
+def ab_test_sample_size_grid(
+    baseline,
+    mde_pct,
+    alpha=0.05,
+    power=0.8,
+    std=None,
+) -> np.ndarray:
+    """
+    Broadcasting ``ab_test_sample_size_per_group``: every argument may be an
+    array and the result is an int64 grid of the broadcast shape, e.g.
+    ``ab_test_sample_size_grid(0.05, mde[:, None], power=powers[None, :])``.
+    """
+    baseline, mde_pct, alpha, power = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (baseline, mde_pct, alpha, power))
+    )
+
+    mde_abs = baseline * (mde_pct / 100)
+    if np.any(mde_abs == 0):
+        raise ValueError("baseline and mde_pct must be non-zero (a zero lift needs infinite samples)")
+    p1 = baseline
+    p2 = baseline + mde_abs
+
+    if std is None:
+        pooled = (p1 + p2) / 2
+        std = np.sqrt(2 * pooled * (1 - pooled))
+
+    z_alpha = _z_table(1 - alpha / 2)
+    z_beta = _z_table(power)
+
+    numerator = (z_alpha + z_beta) ** 2 * np.asarray(std, dtype=float) ** 2
+    denominator = mde_abs**2
+
+    return np.ceil(numerator / denominator).astype(np.int64)
+
+
 # ============================================================
 # GEO TEST RESULT STRUCTURE
 # ============================================================
 
 @dataclass
 class GeoTestResult:
-    mde_abs: float
-    mde_pct: float
+    mde_abs: float | np.ndarray
+    mde_pct: float | np.ndarray
     notes: str
 
 
+_GEO_NOTES = (
+    "MDE decreases with more geos and longer duration. "
+    "Lower variability improves sensitivity."
+)
+
+
 # ============================================================
 # GEO TEST MDE
 # ============================================================
@@ -66,21 +137,48 @@ def geo_test_mde(
     Estimate Minimum Detectable Effect for geo experiments.
     """
 
-    z_alpha = norm.ppf(1 - alpha / 2)
-    z_beta = norm.ppf(power)
+    z_alpha = _z(1 - alpha / 2)
+    z_beta = _z(power)
 
     std = baseline * cv
 
     mde_abs = (z_alpha + z_beta) * std / math.sqrt(n_geos_per_arm * weeks)
     mde_pct = (mde_abs / baseline) * 100
 
-    notes = (
-        "MDE decreases with more geos and longer duration. "
-        "Lower variability improves sensitivity."
+    return GeoTestResult(
+        mde_abs=mde_abs,
+        mde_pct=mde_pct,
+        notes=_GEO_NOTES,
+    )
+
+
+@traced(attrs=lambda r: sizes(r.mde_pct))
+def geo_test_mde_grid(
+    baseline,
+    weeks,
+    n_geos_per_arm,
+    alpha=0.05,
+    power=0.8,
+    cv=0.2,
+) -> GeoTestResult:
+    """
+    Broadcasting ``geo_test_mde``: arguments may be arrays and
+    ``mde_abs`` / ``mde_pct`` come back as grids of the broadcast shape.
+    """
+    baseline, weeks, n_geos_per_arm, alpha, power, cv = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (baseline, weeks, n_geos_per_arm, alpha, power, cv))
     )
 
+    z_alpha = _z_table(1 - alpha / 2)
+    z_beta = _z_table(power)
+
+    std = baseline * cv
+
+    mde_abs = (z_alpha + z_beta) * std / np.sqrt(n_geos_per_arm * weeks)
+    mde_pct = (mde_abs / baseline) * 100
+
     return GeoTestResult(
         mde_abs=mde_abs,
         mde_pct=mde_pct,
-        notes=notes,
+        notes=_GEO_NOTES,
     )
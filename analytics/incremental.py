@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from analytics.dataset import MMMDataset
+from analytics.mmm import OLSResult, _channel_alphas, _dataset, adstock_matrix
+
+
+class IncrementalMMM:
+    """
+    OLS MMM that absorbs appended rows instead of refitting the history.
+
+    State kept between updates:
+    - the adstock carry of every channel after the last row, so new rows
+      continue the geometric recurrence where the history stopped
+    - the R factor of the QR decomposition of ``[X | y]``; new rows are
+      folded in with a rank-k QR update, which costs O(k p^2) for k new rows
+    - weighted mean / sum of squares of ``y`` for R^2
+
+    With ``forgetting < 1`` every older row is down-weighted by that factor
+    per newer row (exponentially weighted least squares). With the default
+    ``forgetting=1.0`` params and R^2 equal a full ``prepare_mmm_design`` +
+    ``fit_mmm_ols`` refit on all rows seen so far.
+    """
+
+    def __init__(
+        self,
+        date_col: str | None,
+        target_col: str,
+        spend_cols: list[str],
+        adstock_alpha=0.5,
+        use_saturation: bool = True,
+        forgetting: float = 1.0,
+    ):
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError("forgetting must be in (0, 1]")
+
+        self.date_col = date_col
+        self.target_col = target_col
+        self.spend_cols = list(spend_cols)
+        self.alphas = _channel_alphas(adstock_alpha, self.spend_cols)
+        self.use_saturation = use_saturation
+        self.forgetting = float(forgetting)
+
+        n_feat = len(self.spend_cols) + 1
+        self.carry = np.zeros(len(self.spend_cols))
+        self.R = np.zeros((0, n_feat + 1))
+        self.nobs = 0
+        self.last_date = None
+
+        # weighted running moments of y
+        self._w = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _features(self, spend: np.ndarray) -> np.ndarray:
+        x = adstock_matrix(spend, self.alphas, initial=self.carry)
+        if len(x):
+            self.carry = x[-1].copy()
+        if self.use_saturation:
+            x = np.log1p(np.maximum(x, 0))
+        return np.column_stack([np.ones(len(x)), x])
+
+    def update(self, df: pd.DataFrame | MMMDataset) -> "IncrementalMMM":
+        """
+        Absorb new rows (the first call takes the whole history). Rows must
+        come after everything already absorbed.
+        """
+        data = _dataset(df, self.date_col, self.target_col, self.spend_cols)
+        if not data.n_rows:
+            return self
+
+        if data.dates is not None:
+            first, last = data.dates[0], data.dates[-1]
+            if self.last_date is not None and first <= self.last_date:
+                raise ValueError(f"New rows start at {first}, not after the last absorbed date {self.last_date}")
+            self.last_date = last
+
+        X = self._features(data.spend_for(self.spend_cols))
+        y = data.y
+        k = len(y)
+
+        # row i of the batch is (k - 1 - i) rows old once the batch is in
+        w = self.forgetting ** np.arange(k - 1, -1, -1, dtype=float)
+        decay = self.forgetting**k
+
+        stacked = np.vstack([np.sqrt(decay) * self.R, np.sqrt(w)[:, None] * np.column_stack([X, y])])
+        self.R = np.linalg.qr(stacked, mode="r")
+
+        # merge weighted moments (Chan et al. parallel update)
+        w_b = float(w.sum())
+        mean_b = float(np.dot(w, y) / w_b)
+        m2_b = float(np.dot(w, (y - mean_b) ** 2))
+        w_a = self._w * decay
+        total = w_a + w_b
+        delta = mean_b - self._mean
+        self._mean += delta * w_b / total
+        self._m2 = self._m2 * decay + m2_b + delta**2 * w_a * w_b / total
+        self._w = total
+
+        self.nobs += k
+        return self
+
+    @property
+    def params(self) -> np.ndarray:
+        p = self.R.shape[1] - 1
+        beta, *_ = np.linalg.lstsq(self.R[:p, :p], self.R[:p, p], rcond=None)
+        return beta
+
+    def result(self) -> OLSResult:
+        if self.nobs == 0:
+            raise ValueError("No rows absorbed yet")
+
+        p_all = self.R.shape[1] - 1
+        # residual sum of squares is the last diagonal entry of R([X | y])
+        ss_res = float(self.R[p_all, p_all] ** 2) if self.R.shape[0] > p_all else 0.0
+        ss_tot = self._m2
+
+        r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
+
+        n = self.nobs
+        p = p_all - 1  # exclude intercept
+        r2_adj = 1.0 - (1.0 - r2) * (n - 1) / (n - p - 1) if n > (p + 1) else r2
+
+        return OLSResult(params=self.params, rsquared=r2, rsquared_adj=r2_adj, nobs=n)
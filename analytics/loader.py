@@ -0,0 +1,233 @@
+import os
+import tempfile
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from analytics.dataset import MMMDataset, detect_columns
+from analytics.tracing import span, traced
+
+
+# ============================================================
+# LOAD REPORT
+# ============================================================
+
+@dataclass
+class LoadReport:
+    source: str
+    rows: int
+    columns: list[str]
+    array_bytes: int
+    elapsed_s: float
+    memory_limit: str
+    rss_delta_mb: float | None
+    notes: list[str] = field(default_factory=list)
+
+
+def rss_mb() -> float | None:
+    """
+    Current resident set size of this process in MB (None where
+    unsupported).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+class _RSSWatch:
+    """
+    Peak growth of the resident set over a block, sampled every
+    ``interval`` seconds on a background thread. Unlike ``ru_maxrss`` (the
+    process-lifetime high-water mark) this is the load's own footprint,
+    and stays meaningful in a long-running Streamlit process.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.delta_mb: float | None = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, rss_mb() or 0.0)
+
+    def __enter__(self):
+        self._start = rss_mb()
+        if self._start is not None:
+            self._peak = self._start
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            self._stop.set()
+            self._thread.join()
+            self.delta_mb = max(self._peak, rss_mb() or 0.0) - self._start
+        return False
+
+
+# ============================================================
+# DUCKDB SCAN
+# ============================================================
+
+def _quote_ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _quote_str(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _date_sql(con, scan: str, col: str, col_type: str) -> str:
+    """
+    Timestamp expression for ``col``. Typed columns cast directly; text
+    columns are parsed with the format pandas would infer from the first
+    parseable value (so e.g. ``01/15/2024`` is kept, as in
+    ``pd.to_datetime``), falling back to ISO casting.
+    """
+    ident = _quote_ident(col)
+    cast = f"TRY_CAST({ident} AS TIMESTAMP)"
+    if not col_type.upper().startswith(("VARCHAR", "STRING", "TEXT")):
+        return cast
+
+    from pandas.tseries.api import guess_datetime_format
+
+    sample = con.execute(f"SELECT {ident} FROM {scan} WHERE {ident} IS NOT NULL LIMIT 100").fetchall()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        fmt = next((f for (v,) in sample if (f := guess_datetime_format(str(v).strip()))), None)
+    if fmt is None:
+        return cast
+    return f"COALESCE(TRY_STRPTIME(TRIM({ident}), {_quote_str(fmt)}), {cast})"
+
+
+def _scan_sql(path: str) -> str:
+    if path.lower().endswith((".parquet", ".pq")):
+        return f"read_parquet({_quote_str(path)})"
+    return f"read_csv_auto({_quote_str(path)})"
+
+
+@contextmanager
+def _as_path(source):
+    """
+    Yield a filesystem path for ``source``: a path as-is, or an uploaded
+    file-like object (e.g. Streamlit's UploadedFile) spooled to a temp file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+
+    suffix = os.path.splitext(getattr(source, "name", "") or "")[1] or ".csv"
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if hasattr(source, "seek"):
+                source.seek(0)
+            while chunk := source.read(1 << 20):
+                f.write(chunk)
+        yield path
+    finally:
+        os.remove(path)
+
+
+@traced()
+def load_mmm_table(
+    source,
+    date_col: str | None = None,
+    target_col: str | None = None,
+    spend_cols: list[str] | None = None,
+    memory_limit: str = "1GB",
+    threads: int | None = None,
+) -> tuple[pd.DataFrame, LoadReport]:
+    """
+    Load only the modeling columns of a CSV/Parquet file through DuckDB.
+
+    The file is scanned lazily: column detection reads just the schema, and
+    projection, numeric/date casting, null filtering and date sorting all run
+    inside DuckDB under ``memory_limit`` (spilling to disk if needed). The
+    returned frame holds one contiguous numpy array per column, already in
+    the shape ``prepare_mmm_design`` expects, so it skips its own copy/sort.
+    """
+    try:
+        import duckdb
+    except ImportError as e:  # pragma: no cover - duckdb is in requirements.txt
+        raise ImportError("load_mmm_table requires duckdb (pip install duckdb)") from e
+
+    t0 = time.perf_counter()
+    notes = []
+
+    with _as_path(source) as path:
+        con = duckdb.connect()
+        try:
+            con.execute(f"SET memory_limit={_quote_str(memory_limit)}")
+            con.execute(f"SET temp_directory={_quote_str(tempfile.gettempdir())}")
+            if threads:
+                con.execute(f"SET threads={int(threads)}")
+
+            scan = _scan_sql(path)
+            types = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {scan}").fetchall()}
+            names = list(types)
+
+            if target_col is None or spend_cols is None:
+                found_date, found_target, found_spend = detect_columns(pd.DataFrame(columns=names))
+                date_col = found_date if date_col is None else date_col
+                target_col = found_target if target_col is None else target_col
+                spend_cols = found_spend if spend_cols is None else spend_cols
+            if not target_col:
+                raise ValueError(f"Could not detect a target column in {names}")
+
+            target = f"TRY_CAST({_quote_ident(target_col)} AS DOUBLE)"
+            select = [f"{target} AS {_quote_ident(target_col)}"]
+            select += [
+                f"COALESCE(TRY_CAST({_quote_ident(c)} AS DOUBLE), 0.0) AS {_quote_ident(c)}" for c in spend_cols
+            ]
+            where = [f"{target} IS NOT NULL"]
+            order = ""
+
+            if date_col:
+                date = _date_sql(con, scan, date_col, types.get(date_col, ""))
+                select.insert(0, f"{date} AS {_quote_ident(date_col)}")
+                where.append(f"{date} IS NOT NULL")
+                order = " ORDER BY 1"
+            else:
+                notes.append("No date column: rows kept in file order.")
+
+            sql = f"SELECT {', '.join(select)} FROM {scan} WHERE {' AND '.join(where)}{order}"
+            with span("loader.duckdb_query", columns=len(select)), _RSSWatch() as rss:
+                arrays = con.execute(sql).fetchnumpy()
+        finally:
+            con.close()
+
+    columns = ([date_col] if date_col else []) + [target_col] + list(spend_cols)
+    df = pd.DataFrame({c: arrays[c] for c in columns}, copy=False)
+
+    report = LoadReport(
+        source=str(getattr(source, "name", source)),
+        rows=len(df),
+        columns=columns,
+        array_bytes=int(sum(a.nbytes for a in arrays.values())),
+        elapsed_s=time.perf_counter() - t0,
+        memory_limit=memory_limit,
+        rss_delta_mb=rss.delta_mb,
+        notes=notes,
+    )
+    return df, report
+
+
+def load_mmm_dataset(source, **kwargs) -> tuple[MMMDataset, LoadReport]:
+    """
+    ``load_mmm_table`` straight into an ``MMMDataset``. DuckDB has already
+    cast, filtered and sorted the columns, so building the dataset only
+    stacks the spend columns.
+    """
+    df, report = load_mmm_table(source, **kwargs)
+    data = MMMDataset.from_frame(df, kwargs.get("date_col"), kwargs.get("target_col"), kwargs.get("spend_cols"))
+    return data, report
@@ -1,6 +1,9 @@
 ﻿import numpy as np
 import pandas as pd
 
+from analytics.dataset import MMMDataset, detect_columns, float_block, spend_totals  # noqa: F401 (re-exported)
+from analytics.tracing import sizes, span, traced
+
 
 class OLSResult:
     def __init__(self, params, rsquared, rsquared_adj, nobs):
@@ -10,85 +13,275 @@ class OLSResult:
         self.nobs = nobs
 
 
-def detect_columns(df: pd.DataFrame):
-    date_col = None
-    for c in df.columns:
-        if "date" in c.lower():
-            date_col = c
-            break
-
-    target_col = None
-    for key in ["revenue", "sales", "conversions", "orders", "target"]:
-        for c in df.columns:
-            if key in c.lower():
-                target_col = c
-                break
-        if target_col:
-            break
+# ============================================================
+# ADSTOCK (CARRYOVER) ENGINE
+# ============================================================
+
+ADSTOCK_KINDS = ("geometric", "delayed", "weibull")
+
+# Block length of the geometric scan: each block is solved with one small
+# matrix product, so the Python-level loop only runs rows / _SCAN_BLOCK times.
+_SCAN_BLOCK = 32
+
+
+def _per_channel(value, n: int, name: str) -> np.ndarray:
+    arr = np.asarray(value, dtype=float)
+    if arr.ndim == 0:
+        return np.full(n, float(arr))
+    if arr.shape != (n,):
+        raise ValueError(f"{name} must be a scalar or one value per channel ({n}), got shape {arr.shape}")
+    return arr
+
+
+def adstock_weights(
+    n_channels: int,
+    max_lag: int,
+    kind: str = "geometric",
+    alpha=0.5,
+    theta=0.0,
+    shape=1.0,
+    scale=1.0,
+) -> np.ndarray:
+    """
+    Lag weights (channels x max_lag) of a finite carryover kernel.
+
+    - geometric: alpha ** lag
+    - delayed:   alpha ** ((lag - theta) ** 2), peaking at lag ``theta``
+    - weibull:   exp(-(lag / scale) ** shape), the Weibull survival curve
+
+    Every kernel peaks at weight 1, like the geometric recurrence.
+    """
+    if kind not in ADSTOCK_KINDS:
+        raise ValueError(f"Unknown adstock kind {kind!r}; expected one of {ADSTOCK_KINDS}")
+    if max_lag < 1:
+        raise ValueError("max_lag must be >= 1")
+
+    lags = np.arange(max_lag, dtype=float)[None, :]
+    alpha = _per_channel(alpha, n_channels, "alpha")[:, None]
+
+    if kind == "geometric":
+        return alpha**lags
+    if kind == "delayed":
+        theta = _per_channel(theta, n_channels, "theta")[:, None]
+        return alpha ** ((lags - theta) ** 2)
+
+    shape = _per_channel(shape, n_channels, "shape")[:, None]
+    scale = _per_channel(scale, n_channels, "scale")[:, None]
+    return np.exp(-((lags / scale) ** shape))
+
+
+def _geometric_scan(x: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    # carry_t = x_t + alpha * carry_{t-1}, solved block by block: inside a
+    # block it is a lower-triangular Toeplitz product, and only the last
+    # carry of each block is propagated to the next one.
+    n_rows, n_ch = x.shape
+    block = min(_SCAN_BLOCK, max(n_rows, 1))
+    n_blocks = -(-n_rows // block)
+
+    # (channels, blocks, block) so every channel is one batched matmul
+    xb = np.zeros((n_ch, n_blocks * block))
+    xb[:, :n_rows] = x.T
+    xb = xb.reshape(n_ch, n_blocks, block)
+
+    lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+    kernel = np.where(lag >= 0, alpha[:, None, None] ** np.maximum(lag, 0), 0.0)
+    out = xb @ kernel.transpose(0, 2, 1)
+
+    decay = alpha[:, None] ** np.arange(1, block + 1)[None, :]
+    carry = np.zeros(n_ch)
+    for b in range(n_blocks):
+        out[:, b, :] += decay * carry[:, None]
+        carry = out[:, b, -1]
+
+    return out.reshape(n_ch, -1)[:, :n_rows].T
+
+
+def _lag_convolve(x: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    n_rows = x.shape[0]
+    out = x * weights[:, 0]
+    for lag in range(1, min(weights.shape[1], n_rows)):
+        out[lag:] += x[:-lag] * weights[:, lag]
+    return out
 
-    spend_cols = [
-        c
-        for c in df.columns
-        if any(k in c.lower() for k in ["spend", "cost", "media"])
-        and c != target_col
-    ]
 
-    return date_col, target_col, spend_cols
+def adstock_matrix(
+    x: np.ndarray,
+    alpha=0.5,
+    kind: str = "geometric",
+    max_lag: int | None = None,
+    theta=0.0,
+    shape=1.0,
+    scale=1.0,
+    initial=None,
+) -> np.ndarray:
+    """
+    Apply carryover to a whole (rows x channels) spend matrix in one call.
+
+    ``alpha``, ``theta``, ``shape`` and ``scale`` take a scalar or one value
+    per channel. Geometric adstock without ``max_lag`` is the infinite
+    recurrence ``carry = x + alpha * carry``; any other configuration is a
+    finite lag convolution with ``adstock_weights``. ``initial`` is the
+    per-channel carry before the first row (geometric recurrence only), used
+    to continue a series from a previous call.
+    """
+    x = np.asarray(x, dtype=float)
+    squeeze = x.ndim == 1
+    if squeeze:
+        x = x[:, None]
+    if x.ndim != 2:
+        raise ValueError("x must be a 1-D series or a (rows x channels) matrix")
+
+    n_ch = x.shape[1]
+    if n_ch == 0 or x.shape[0] == 0:
+        out = x.copy()
+    elif kind == "geometric" and max_lag is None:
+        alpha = _per_channel(alpha, n_ch, "alpha")
+        out = _geometric_scan(x, alpha)
+        if initial is not None:
+            out += alpha[None, :] ** np.arange(1, x.shape[0] + 1)[:, None] * _per_channel(initial, n_ch, "initial")
+    else:
+        if initial is not None:
+            raise ValueError("initial carry is only supported for the geometric recurrence (max_lag=None)")
+        if max_lag is None:
+            raise ValueError(f"max_lag is required for {kind!r} adstock")
+        w = adstock_weights(n_ch, max_lag, kind=kind, alpha=alpha, theta=theta, shape=shape, scale=scale)
+        out = _lag_convolve(x, w)
+
+    return out[:, 0] if squeeze else out
 
 
 def _adstock(x: np.ndarray, alpha: float) -> np.ndarray:
-    out = np.zeros_like(x, dtype=float)
-    carry = 0.0
-    for i, v in enumerate(x):
-        carry = float(v) + alpha * carry
-        out[i] = carry
-    return out
+    return adstock_matrix(x, alpha)
 
 
-def prepare_mmm_design(
-    df: pd.DataFrame,
-    date_col: str | None,
-    target_col: str,
-    spend_cols: list[str],
-    adstock_alpha: float = 0.5,
-    use_saturation: bool = True,
-):
-    d = df.copy()
-
-    # Sort by date if available
-    if date_col and date_col in d.columns:
-        d[date_col] = pd.to_datetime(d[date_col], errors="coerce")
-        d = d.dropna(subset=[date_col]).sort_values(date_col)
+def _channel_alphas(adstock_alpha, spend_cols: list[str]) -> np.ndarray:
+    if isinstance(adstock_alpha, dict):
+        missing = [c for c in spend_cols if c not in adstock_alpha]
+        if missing:
+            raise ValueError(f"adstock_alpha has no value for: {missing}")
+        return np.array([float(adstock_alpha[c]) for c in spend_cols])
+    return _per_channel(adstock_alpha, len(spend_cols), "adstock_alpha")
 
-    d = d.dropna(subset=[target_col]).copy()
 
-    X = pd.DataFrame(index=d.index)
-    X["const"] = 1.0
+def _coerce_spend(d: pd.DataFrame, spend_cols: list[str]) -> np.ndarray:
+    return np.nan_to_num(float_block(d, spend_cols), nan=0.0, copy=False)
 
-    for c in spend_cols:
-        x = pd.to_numeric(d[c], errors="coerce").fillna(0.0).to_numpy()
 
-        # adstock
-        x = _adstock(x, adstock_alpha)
+def _dataset(df, date_col: str | None, target_col: str, spend_cols: list[str]) -> MMMDataset:
+    # parse a raw frame once; an MMMDataset passes straight through
+    if isinstance(df, MMMDataset):
+        return df
+    return MMMDataset.from_frame(df, date_col, target_col, spend_cols)
 
-        # optional saturation (simple, stable)
-        if use_saturation:
-            x = np.log1p(np.maximum(x, 0))
 
-        X[f"{c}__x"] = x
+def build_design_matrix(
+    spend: np.ndarray,
+    adstock_alpha=0.5,
+    use_saturation: bool = True,
+    dtype=np.float64,
+    adstock_kind: str = "geometric",
+    max_lag: int | None = None,
+    adstock_params: dict | None = None,
+) -> np.ndarray:
+    """
+    NumPy core of ``prepare_mmm_design``: (rows x channels) spend ->
+    (rows x 1 + channels) design with the intercept in column 0.
+
+    The design is written into one preallocated array of ``dtype``
+    (``np.float32`` halves its memory); the transform itself runs in
+    float64 and is cast once on assignment.
+    """
+    spend = np.asarray(spend, dtype=float)
+    out = np.empty((spend.shape[0], spend.shape[1] + 1), dtype=dtype)
+    out[:, 0] = 1.0
+
+    # adstock, all channels at once
+    x = adstock_matrix(spend, adstock_alpha, kind=adstock_kind, max_lag=max_lag, **(adstock_params or {}))
+
+    # optional saturation (simple, stable), in place on the adstock buffer
+    if use_saturation:
+        np.maximum(x, 0, out=x)
+        np.log1p(x, out=x)
+
+    out[:, 1:] = x
+    return out
 
-    y = pd.to_numeric(d[target_col], errors="coerce").to_numpy(dtype=float)
 
-    meta = {"date_col": date_col, "target_col": target_col, "spend_cols": spend_cols}
+@traced()
+def prepare_mmm_design(
+    df: pd.DataFrame | MMMDataset,
+    date_col: str | None,
+    target_col: str,
+    spend_cols: list[str],
+    adstock_alpha: float | list[float] | dict[str, float] = 0.5,
+    use_saturation: bool = True,
+    adstock_kind: str = "geometric",
+    max_lag: int | None = None,
+    adstock_params: dict | None = None,
+    dtype=np.float64,
+):
+    """
+    Build the OLS design: intercept + one adstocked (and optionally
+    ``log1p``-saturated) column per spend channel.
+
+    ``adstock_alpha`` is a single decay rate, a list aligned with
+    ``spend_cols`` or a ``{channel: alpha}`` dict. ``adstock_params`` carries
+    the extra kernel parameters (``theta``, ``shape``, ``scale``) of the
+    delayed/Weibull shapes; see ``adstock_matrix``. ``X`` is a thin
+    DataFrame view over the array from ``build_design_matrix``.
+
+    ``df`` may be a raw frame (parsed here via ``MMMDataset.from_frame``) or
+    an already built ``MMMDataset``, whose schema then takes precedence.
+    """
+    data = _dataset(df, date_col, target_col, spend_cols)
+    if data is df:
+        date_col, target_col = data.date_col, data.target_col
+
+    alphas = _channel_alphas(adstock_alpha, spend_cols)
+    spend = data.spend_for(spend_cols)
+
+    Xmat = build_design_matrix(
+        spend,
+        alphas,
+        use_saturation=use_saturation,
+        dtype=dtype,
+        adstock_kind=adstock_kind,
+        max_lag=max_lag,
+        adstock_params=adstock_params,
+    )
+    X = pd.DataFrame(Xmat, index=data.index, columns=["const"] + [f"{c}__x" for c in spend_cols], copy=False)
+
+    y = data.y
+
+    meta = {
+        "date_col": date_col,
+        "target_col": target_col,
+        "spend_cols": spend_cols,
+        "adstock_alpha": dict(zip(spend_cols, alphas.tolist())),
+        "adstock_kind": adstock_kind,
+        "max_lag": max_lag,
+        "adstock_params": dict(adstock_params or {}),
+        "use_saturation": use_saturation,
+    }
     return X, y, meta
 
 
-def fit_mmm_ols(X: pd.DataFrame, y: np.ndarray) -> OLSResult:
-    Xmat = X.to_numpy(dtype=float)
+def fit_ols_arrays(Xmat: np.ndarray, y: np.ndarray) -> OLSResult:
+    """
+    NumPy core of ``fit_mmm_ols``. The solve runs in the design's dtype
+    (float32 designs stay float32); fit statistics are accumulated in float64.
+    """
+    Xmat = np.asarray(Xmat)
+    if Xmat.dtype not in (np.float32, np.float64):
+        Xmat = Xmat.astype(float)
     y = np.asarray(y, dtype=float)
 
     # least squares solve
-    beta, *_ = np.linalg.lstsq(Xmat, y, rcond=None)
+    with span("mmm.lstsq") as sp:
+        if sp:
+            sp.set(**sizes(Xmat))
+        beta, *_ = np.linalg.lstsq(Xmat, y.astype(Xmat.dtype, copy=False), rcond=None)
+    beta = beta.astype(float, copy=False)
 
     yhat = Xmat @ beta
     resid = y - yhat
@@ -105,32 +298,396 @@ def fit_mmm_ols(X: pd.DataFrame, y: np.ndarray) -> OLSResult:
     return OLSResult(params=beta, rsquared=r2, rsquared_adj=r2_adj, nobs=n)
 
 
+@traced(arg=0)
+def fit_mmm_ols(X: pd.DataFrame, y: np.ndarray) -> OLSResult:
+    # no copy for the single-block frames prepare_mmm_design returns
+    return fit_ols_arrays(X.to_numpy(), y)
+
+
+@traced()
 def channel_contributions(X: pd.DataFrame, params: np.ndarray) -> pd.DataFrame:
     # contribution per feature per row
     return X.multiply(params, axis=1)
 
 
-def roi_by_channel(df: pd.DataFrame, contrib: pd.DataFrame, spend_cols: list[str]) -> pd.DataFrame:
-    rows = []
-    for c in spend_cols:
-        feat = f"{c}__x"
-        if feat not in contrib.columns:
-            continue
-
-        total_contrib = float(contrib[feat].sum())
-        spend = float(pd.to_numeric(df[c], errors="coerce").fillna(0.0).sum())
-        roi = (total_contrib / spend) if spend > 0 else np.nan
-
-        rows.append(
-            {
-                "channel": c,
-                "spend": spend,
-                "contribution": total_contrib,
-                "roi": roi,
-            }
-        )
-
-    out = pd.DataFrame(rows)
-    if len(out):
-        out = out.sort_values("roi", ascending=False)
-    return out
+@traced()
+def contribution_totals(X: pd.DataFrame, params: np.ndarray) -> pd.Series:
+    """
+    Total contribution per feature, ``params * column sums``, without
+    materializing the rows x features matrix of ``channel_contributions``.
+    """
+    sums = X.to_numpy().sum(axis=0, dtype=float)
+    return pd.Series(sums * np.asarray(params, dtype=float), index=X.columns)
+
+
+@traced()
+def roi_by_channel(
+    df: pd.DataFrame | MMMDataset, contrib: pd.DataFrame | pd.Series, spend_cols: list[str]
+) -> pd.DataFrame:
+    # contrib: per-row contributions, or per-feature totals (contribution_totals)
+    # df: the modeled rows, or their MMMDataset (precomputed spend totals)
+    totals = contrib if isinstance(contrib, pd.Series) else contrib.sum()
+
+    cols = [c for c in spend_cols if f"{c}__x" in totals.index]
+    if not cols:
+        return pd.DataFrame()
+
+    spend = spend_totals(df, cols)
+    total_contrib = totals.reindex([f"{c}__x" for c in cols]).to_numpy(dtype=float)
+    roi = np.full(len(cols), np.nan)
+    np.divide(total_contrib, spend, out=roi, where=spend > 0)
+
+    out = pd.DataFrame({"channel": cols, "spend": spend, "contribution": total_contrib, "roi": roi})
+    return out.sort_values("roi", ascending=False)
+
+
+# ============================================================
+# REGULARIZED FITS (RIDGE / ELASTIC NET PATH)
+# ============================================================
+
+class RegularizedResult(OLSResult):
+    """
+    ``OLSResult`` of the GCV-selected penalty, plus the whole path:
+    ``lambdas`` (n_lambdas,), ``path`` (n_lambdas x features, original
+    scale) and ``gcv`` (n_lambdas,).
+    """
+
+    def __init__(self, params, rsquared, rsquared_adj, nobs, lambda_, lambdas, path, gcv, l1_ratio, nonneg):
+        super().__init__(params, rsquared, rsquared_adj, nobs)
+        self.lambda_ = lambda_
+        self.lambdas = lambdas
+        self.path = path
+        self.gcv = gcv
+        self.l1_ratio = l1_ratio
+        self.nonneg = nonneg
+
+
+def ridge_penalty(X: pd.DataFrame, lambda_: float) -> np.ndarray:
+    """
+    Per-feature penalty that ``fit_mmm_ridge`` puts on original-scale
+    coefficients: ``lambda_ * var(x_j)`` for media columns, 0 for ``const``.
+    ``(X'X + diag(penalty))^-1 X'y`` is the ridge fit at ``lambda_``.
+    """
+    var = X.to_numpy(dtype=float).var(axis=0)
+    var[var == 0] = 1.0
+    return np.where(X.columns != "const", lambda_ * var, 0.0)
+
+
+def _coordinate_descent_path(gram, xty, lambdas, l1_ratio, nonneg, max_iter=1000, tol=1e-8):
+    # minimizes 0.5 b'Gb - c'b + lam * (rho |b|_1 + 0.5 (1 - rho) |b|^2)
+    # for every lambda at once: each coordinate update is vectorized over the path
+    n_lam, p = len(lambdas), len(xty)
+    beta = np.zeros((n_lam, p))
+    l1 = lambdas * l1_ratio
+    denom = np.diag(gram)[None, :] + (lambdas * (1.0 - l1_ratio))[:, None]
+    scale = max(float(np.max(np.abs(xty))), 1e-300)
+
+    for _ in range(max_iter):
+        max_step = 0.0
+        for j in range(p):
+            old = beta[:, j].copy()
+            rho_j = xty[j] - beta @ gram[:, j] + old * gram[j, j]
+            new = np.sign(rho_j) * np.maximum(np.abs(rho_j) - l1, 0.0) / denom[:, j]
+            if nonneg:
+                new = np.maximum(new, 0.0)
+            beta[:, j] = new
+            max_step = max(max_step, float(np.max(np.abs(new - old) * denom[:, j])))
+        if max_step <= tol * scale:
+            break
+    return beta
+
+
+@traced(arg=0)
+def fit_mmm_ridge(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    lambdas=None,
+    n_lambdas: int = 50,
+    l1_ratio: float = 0.0,
+    nonneg: bool = False,
+) -> RegularizedResult:
+    """
+    Ridge / elastic-net fit over a whole penalty path from one SVD, with the
+    penalty chosen by generalized cross-validation (GCV).
+
+    Features are centered and standardized internally and the ``const``
+    column is never penalized; ``params`` come back on the original scale,
+    so ``channel_contributions`` / ``roi_by_channel`` work unchanged.
+
+    - ``l1_ratio=0`` and ``nonneg=False``: closed-form ridge path,
+      ``b(lam) = V diag(s / (s^2 + lam)) U'y``
+    - otherwise: coordinate descent on the Gram matrix ``V diag(s^2) V'``
+      from the same SVD, solved for every lambda at once; ``nonneg``
+      keeps media coefficients >= 0
+
+    Default lambdas span ``s_max^2 * [1e-6, 10]`` on a log grid.
+    """
+    if not 0.0 <= l1_ratio <= 1.0:
+        raise ValueError("l1_ratio must be in [0, 1]")
+
+    Xmat = X.to_numpy(dtype=float)
+    y = np.asarray(y, dtype=float)
+    n, p_all = Xmat.shape
+
+    cols = list(X.columns)
+    has_const = "const" in cols
+    feat_idx = np.array([j for j, c in enumerate(cols) if c != "const"], dtype=int)
+    F = Xmat[:, feat_idx]
+
+    x_mean = F.mean(axis=0) if has_const else np.zeros(len(feat_idx))
+    y_mean = float(y.mean()) if has_const else 0.0
+    x_std = (F - x_mean).std(axis=0)
+    x_std[x_std == 0] = 1.0
+    Z = (F - x_mean) / x_std
+    yc = y - y_mean
+
+    u, s, vt = np.linalg.svd(Z, full_matrices=False)
+    uty = u.T @ yc
+    rss_outside = float(yc @ yc - uty @ uty)
+
+    if lambdas is None:
+        s_max = float(s[0]) if len(s) else 1.0
+        lambdas = s_max**2 * np.logspace(-6, 1, n_lambdas)
+    lambdas = np.sort(np.atleast_1d(np.asarray(lambdas, dtype=float)))[::-1]
+
+    if l1_ratio == 0.0 and not nonneg:
+        shrink = s[None, :] / (s[None, :] ** 2 + lambdas[:, None])
+        path_z = (shrink * uty[None, :]) @ vt
+        resid_coef = (lambdas[:, None] / (s[None, :] ** 2 + lambdas[:, None])) * uty[None, :]
+        rss = np.sum(resid_coef**2, axis=1) + rss_outside
+        dof = np.sum(s[None, :] ** 2 / (s[None, :] ** 2 + lambdas[:, None]), axis=1)
+    else:
+        gram = (vt.T * s**2) @ vt
+        xty = vt.T @ (s * uty)
+        path_z = _coordinate_descent_path(gram, xty, lambdas, l1_ratio, nonneg)
+        rss = float(yc @ yc) - 2 * path_z @ xty + np.einsum("lp,pq,lq->l", path_z, gram, path_z)
+        # elastic-net degrees of freedom: ridge df on the active set
+        dof = np.zeros(len(lambdas))
+        for i, lam in enumerate(lambdas):
+            active = np.flatnonzero(path_z[i] != 0)
+            if len(active):
+                g = gram[np.ix_(active, active)]
+                dof[i] = np.trace(np.linalg.solve(g + lam * (1.0 - l1_ratio) * np.eye(len(active)), g))
+
+    denom = (n - dof - (1 if has_const else 0)) / n
+    gcv = np.where(denom > 0, (rss / n) / np.where(denom > 0, denom, 1.0) ** 2, np.inf)
+
+    # back to the original scale
+    path = np.zeros((len(lambdas), p_all))
+    path[:, feat_idx] = path_z / x_std
+    if has_const:
+        path[:, cols.index("const")] = y_mean - path[:, feat_idx] @ x_mean
+
+    best = int(np.argmin(gcv))
+    beta = path[best]
+
+    resid = y - Xmat @ beta
+    ss_res = float(np.sum(resid**2))
+    ss_tot = float(np.sum((y - y.mean()) ** 2)) if len(y) else 0.0
+    r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
+    p = p_all - 1  # exclude intercept
+    r2_adj = 1.0 - (1.0 - r2) * (n - 1) / (n - p - 1) if n > (p + 1) else r2
+
+    return RegularizedResult(
+        params=beta,
+        rsquared=r2,
+        rsquared_adj=r2_adj,
+        nobs=n,
+        lambda_=float(lambdas[best]),
+        lambdas=lambdas,
+        path=path,
+        gcv=gcv,
+        l1_ratio=l1_ratio,
+        nonneg=nonneg,
+    )
+
+
+# ============================================================
+# BATCHED HYPERPARAMETER SEARCH
+# ============================================================
+
+SEARCH_METRICS = ("r2", "r2_adj", "holdout_rmse")
+
+# Default batch: ~64 MB of float64 stacked designs
+_SEARCH_BATCH_ELEMENTS = 8_000_000
+
+
+def _batched_lstsq(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Minimum-norm least squares for a stack of designs (batch x rows x features).
+
+    ``y`` is shared (rows,) or per design (batch x rows). Singular values are
+    cut off like ``np.linalg.lstsq(..., rcond=None)``, so rank-deficient
+    designs get the same solution as the unbatched solver.
+    """
+    u, s, vt = np.linalg.svd(X, full_matrices=False)
+    tol = s[..., :1] * max(X.shape[-2:]) * np.finfo(X.dtype).eps
+    s_inv = np.divide(1.0, s, out=np.zeros_like(s), where=s > tol)
+    uty = np.einsum("...tk,...t->...k", u, np.broadcast_to(y, X.shape[:-1]))
+    return np.einsum("...kp,...k->...p", vt, s_inv * uty)
+
+
+def _score_designs(X: np.ndarray, y: np.ndarray, n_train: int) -> dict[str, np.ndarray]:
+    Xtr, ytr = X[:, :n_train], y[:n_train]
+    beta = _batched_lstsq(Xtr, ytr)
+
+    resid = ytr - np.einsum("btp,bp->bt", Xtr, beta)
+    ss_res = np.sum(resid**2, axis=1)
+    ss_tot = float(np.sum((ytr - ytr.mean()) ** 2))
+    r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else np.zeros(len(X))
+
+    n, p = n_train, X.shape[2] - 1
+    r2_adj = 1.0 - (1.0 - r2) * (n - 1) / (n - p - 1) if n > (p + 1) else r2
+
+    scores = {"r2": r2, "r2_adj": r2_adj}
+    if n_train < X.shape[1]:
+        err = y[n_train:] - np.einsum("btp,bp->bt", X[:, n_train:], beta)
+        scores["holdout_rmse"] = np.sqrt(np.mean(err**2, axis=1))
+    return scores
+
+
+def _stack_designs(bank: np.ndarray, sat: np.ndarray, idx: np.ndarray, n_rows: int) -> np.ndarray:
+    # bank: (saturation, alpha, rows, channels); one design per candidate row
+    n_ch = idx.shape[1]
+    X = np.ones((len(idx), n_rows, n_ch + 1))
+    X[:, :, 1:] = bank[sat[:, None], idx, :n_rows, np.arange(n_ch)[None, :]].transpose(0, 2, 1)
+    return X
+
+
+_SEARCH_STATE: dict = {}
+
+
+def _init_search_worker(bank: np.ndarray, y: np.ndarray) -> None:
+    _SEARCH_STATE["bank"] = bank
+    _SEARCH_STATE["y"] = y
+
+
+def _score_candidates(sat: np.ndarray, idx: np.ndarray, n_rows: int, n_train: int) -> dict[str, np.ndarray]:
+    bank, y = _SEARCH_STATE["bank"], _SEARCH_STATE["y"]
+    return _score_designs(_stack_designs(bank, sat, idx, n_rows), y[:n_rows], n_train)
+
+
+def _score_all(
+    sat: np.ndarray,
+    idx: np.ndarray,
+    n_rows: int,
+    holdout: float,
+    batch_size: int,
+    pool,
+) -> dict[str, np.ndarray]:
+    n_train = n_rows - int(round(n_rows * holdout))
+    chunks = [slice(i, i + batch_size) for i in range(0, len(idx), batch_size)]
+
+    if pool is None:
+        parts = [_score_candidates(sat[c], idx[c], n_rows, n_train) for c in chunks]
+    else:
+        futures = [pool.submit(_score_candidates, sat[c], idx[c], n_rows, n_train) for c in chunks]
+        parts = [f.result() for f in futures]
+
+    return {k: np.concatenate([part[k] for part in parts]) for k in parts[0]}
+
+
+@traced()
+def search_adstock_params(
+    df: pd.DataFrame | MMMDataset,
+    date_col: str | None,
+    target_col: str,
+    spend_cols: list[str],
+    alphas=(0.0, 0.2, 0.4, 0.6, 0.8),
+    saturation=(True, False),
+    method: str = "grid",
+    n_candidates: int = 256,
+    metric: str = "r2_adj",
+    holdout: float = 0.0,
+    halving_eta: int = 3,
+    batch_size: int | None = None,
+    n_jobs: int = 1,
+    max_grid: int = 100_000,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Score per-channel adstock alpha x saturation settings and rank them.
+
+    Every channel is adstocked once per alpha value up front; candidate
+    designs are then gathered from that bank in batches and solved together
+    with ``_batched_lstsq``.
+
+    - method="grid": every combination (capped at ``max_grid``)
+    - method="random": ``n_candidates`` random combinations
+    - method="halving": successive halving over ``n_candidates`` random
+      combinations, scored on growing prefixes of the time series
+
+    ``holdout`` keeps the last fraction of rows out of the fit and adds a
+    ``holdout_rmse`` column. ``batch_size`` defaults to ~64 MB of stacked
+    designs per batch; ``n_jobs > 1`` scores batches in a process pool.
+    """
+    if metric not in SEARCH_METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {SEARCH_METRICS}")
+    if metric == "holdout_rmse" and not holdout > 0:
+        raise ValueError("metric='holdout_rmse' needs holdout > 0")
+    if method not in ("grid", "random", "halving"):
+        raise ValueError(f"Unknown method {method!r}")
+
+    data = _dataset(df, date_col, target_col, spend_cols)
+    spend, y = data.spend_for(spend_cols), data.y
+
+    alpha_grid = np.asarray(alphas, dtype=float)
+    sat_grid = np.asarray(saturation, dtype=bool)
+    n_rows, n_ch = spend.shape
+
+    bank = np.empty((len(sat_grid), len(alpha_grid), n_rows, n_ch))
+    for a, alpha in enumerate(alpha_grid):
+        ad = adstock_matrix(spend, alpha)
+        for s, sat in enumerate(sat_grid):
+            bank[s, a] = np.log1p(np.maximum(ad, 0)) if sat else ad
+
+    if batch_size is None:
+        batch_size = max(1, _SEARCH_BATCH_ELEMENTS // max(n_rows * (n_ch + 1), 1))
+
+    rng = np.random.default_rng(seed)
+    if method == "grid":
+        n_total = len(sat_grid) * len(alpha_grid) ** n_ch
+        if n_total > max_grid:
+            raise ValueError(f"Grid has {n_total:,} candidates (> max_grid={max_grid:,}); use method='random' or 'halving'")
+        combos = np.indices((len(sat_grid),) + (len(alpha_grid),) * n_ch).reshape(n_ch + 1, -1).T
+        sat_idx, alpha_idx = combos[:, 0], combos[:, 1:]
+    else:
+        sat_idx = rng.integers(0, len(sat_grid), n_candidates)
+        alpha_idx = rng.integers(0, len(alpha_grid), (n_candidates, n_ch))
+
+    ascending = metric == "holdout_rmse"
+    pool = None
+    if n_jobs > 1 and len(alpha_idx) > batch_size:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_search_worker, initargs=(bank, y))
+    else:
+        _init_search_worker(bank, y)
+
+    try:
+        n_rows_used = n_rows
+        if method == "halving":
+            min_rows = int(np.ceil((n_ch + 2) / (1 - holdout))) + 1
+            n_rungs = max(int(np.floor(np.log(max(len(alpha_idx), 1)) / np.log(halving_eta))), 0)
+            for rung in range(n_rungs):
+                n_rows_used = max(int(n_rows / halving_eta ** (n_rungs - rung)), min_rows)
+                if n_rows_used >= n_rows or len(alpha_idx) <= 1:
+                    break
+                score = _score_all(sat_idx, alpha_idx, n_rows_used, holdout, batch_size, pool)[metric]
+                order = np.argsort(score if ascending else -score, kind="stable")
+                keep = order[: max(len(order) // halving_eta, 1)]
+                sat_idx, alpha_idx = sat_idx[keep], alpha_idx[keep]
+            n_rows_used = n_rows
+
+        scores = _score_all(sat_idx, alpha_idx, n_rows_used, holdout, batch_size, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _SEARCH_STATE.clear()
+
+    out = pd.DataFrame(alpha_grid[alpha_idx], columns=[f"{c}__alpha" for c in spend_cols])
+    out["use_saturation"] = sat_grid[sat_idx]
+    for k, v in scores.items():
+        out[k] = v
+
+    return out.sort_values(metric, ascending=ascending, kind="stable").reset_index(drop=True)
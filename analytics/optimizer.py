@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.mmm import OLSResult, adstock_weights
+from analytics.tracing import traced
+
+
+# ============================================================
+# RESPONSE MODEL
+# ============================================================
+
+@dataclass
+class ResponseModel:
+    """
+    Per-period response of a fitted MMM to a steady spend level.
+
+    Constant spend ``s`` adstocks to ``carryover * s`` (``1 / (1 - alpha)``
+    for the geometric recurrence, the kernel weight sum for finite lags), so
+    channel c contributes ``coef_c * f(carryover_c * s_c)`` per period with
+    ``f = log1p`` under saturation and identity otherwise.
+    """
+
+    channels: list[str]
+    coef: np.ndarray
+    carryover: np.ndarray
+    use_saturation: bool
+
+    @classmethod
+    def from_fit(cls, res: OLSResult, meta: dict) -> "ResponseModel":
+        channels = list(meta["spend_cols"])
+        alphas = np.array([meta["adstock_alpha"][c] for c in channels], dtype=float)
+        kind = meta.get("adstock_kind", "geometric")
+        max_lag = meta.get("max_lag")
+
+        if kind == "geometric" and max_lag is None:
+            if np.any(alphas >= 1):
+                raise ValueError("Geometric adstock with alpha >= 1 has no steady state")
+            carryover = 1.0 / (1.0 - alphas)
+        else:
+            w = adstock_weights(len(channels), max_lag, kind=kind, alpha=alphas, **meta.get("adstock_params", {}))
+            carryover = w.sum(axis=1)
+
+        # params are [const, <channel>__x ...] in spend_cols order
+        coef = np.asarray(res.params, dtype=float)[1 : len(channels) + 1]
+        return cls(channels=channels, coef=coef, carryover=carryover, use_saturation=bool(meta["use_saturation"]))
+
+    def response(self, spend) -> np.ndarray:
+        """Per-channel response; ``spend`` broadcasts against (..., channels)."""
+        x = self.carryover * np.maximum(np.asarray(spend, dtype=float), 0.0)
+        return self.coef * (np.log1p(x) if self.use_saturation else x)
+
+    def marginal(self, spend) -> np.ndarray:
+        """d response / d spend per channel (marginal ROI)."""
+        spend = np.maximum(np.asarray(spend, dtype=float), 0.0)
+        if self.use_saturation:
+            return self.coef * self.carryover / (1.0 + self.carryover * spend)
+        return np.broadcast_to(self.coef * self.carryover, spend.shape).copy()
+
+
+@traced()
+def response_curves(model: ResponseModel, max_spend, n_points: int = 200) -> pd.DataFrame:
+    """
+    Response, average ROI and marginal ROI of every channel over a dense
+    spend grid ``[0, max_spend_c]``, evaluated as one (points x channels)
+    array. Returns a long frame (channel, spend, response, roi, marginal_roi).
+    """
+    max_spend = np.broadcast_to(np.asarray(max_spend, dtype=float), (len(model.channels),))
+    grid = np.linspace(0.0, 1.0, n_points)[:, None] * max_spend[None, :]
+
+    resp = model.response(grid)
+    marg = model.marginal(grid)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(grid > 0, resp / grid, marg)
+
+    return pd.DataFrame(
+        {
+            "channel": np.tile(model.channels, n_points),
+            "spend": grid.ravel(),
+            "response": resp.ravel(),
+            "roi": roi.ravel(),
+            "marginal_roi": marg.ravel(),
+        }
+    )
+
+
+# ============================================================
+# BUDGET OPTIMIZER
+# ============================================================
+
+@dataclass
+class BudgetPlan:
+    allocation: pd.DataFrame
+    total_budget: float
+    response_current: float
+    response_optimal: float
+    success: bool
+    message: str
+    iterations: int
+
+
+@traced(attrs=None)
+def optimize_budget(
+    model: ResponseModel,
+    total_budget: float,
+    current=None,
+    lower=None,
+    upper=None,
+    max_iter: int = 500,
+) -> BudgetPlan:
+    """
+    Reallocate a per-period budget to maximize total response.
+
+    Solved with SLSQP on the analytic gradient (``model.marginal``) under
+    ``sum(spend) == total_budget`` and per-channel ``lower``/``upper``
+    bounds (scalars or one value per channel; default 0 / total_budget).
+    ``current`` is the baseline allocation reported alongside the optimum.
+    """
+    from scipy.optimize import minimize
+
+    n = len(model.channels)
+    lo = np.broadcast_to(np.asarray(0.0 if lower is None else lower, dtype=float), (n,)).copy()
+    hi = np.broadcast_to(np.asarray(total_budget if upper is None else upper, dtype=float), (n,)).copy()
+    if lo.sum() > total_budget + 1e-9 or hi.sum() < total_budget - 1e-9:
+        raise ValueError("Bounds cannot meet the total budget")
+
+    current = np.full(n, total_budget / n) if current is None else np.asarray(current, dtype=float)
+
+    # start from the current mix scaled to the budget, pulled inside the bounds
+    x0 = np.clip(current * (total_budget / current.sum()) if current.sum() > 0 else current, lo, hi)
+    x0 += (total_budget - x0.sum()) * (hi - lo) / max((hi - lo).sum(), 1e-12)
+
+    scale = max(total_budget, 1e-12)
+    resp_scale = max(float(np.abs(model.response(x0)).sum()), 1e-12)
+
+    # optimize in budget-share units so SLSQP sees O(1) numbers
+    def objective(z):
+        return -model.response(z * scale).sum() / resp_scale
+
+    def gradient(z):
+        return -model.marginal(z * scale) * scale / resp_scale
+
+    res = minimize(
+        objective,
+        x0 / scale,
+        jac=gradient,
+        method="SLSQP",
+        bounds=list(zip(lo / scale, hi / scale)),
+        constraints=[{"type": "eq", "fun": lambda z: z.sum() - 1.0, "jac": lambda z: np.ones_like(z)}],
+        options={"maxiter": max_iter, "ftol": 1e-12},
+    )
+    optimal = np.clip(res.x * scale, lo, hi)
+
+    allocation = pd.DataFrame(
+        {
+            "channel": model.channels,
+            "current": current,
+            "optimal": optimal,
+            "change": optimal - current,
+            "response_current": model.response(current),
+            "response_optimal": model.response(optimal),
+            "marginal_roi_current": model.marginal(current),
+            "marginal_roi_optimal": model.marginal(optimal),
+        }
+    )
+
+    return BudgetPlan(
+        allocation=allocation,
+        total_budget=float(total_budget),
+        response_current=float(model.response(current).sum()),
+        response_optimal=float(model.response(optimal).sum()),
+        success=bool(res.success),
+        message=str(res.message),
+        iterations=int(res.nit),
+    )
@@ -0,0 +1,183 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.dataset import MMMDataset
+from analytics.mmm import _batched_lstsq, _channel_alphas, adstock_matrix
+from analytics.tracing import traced
+
+
+# ============================================================
+# PANEL DESIGN
+# ============================================================
+
+@traced()
+def prepare_panel_design(
+    df: pd.DataFrame,
+    panel_col: str,
+    date_col: str | None,
+    target_col: str,
+    spend_cols: list[str],
+    adstock_alpha=0.5,
+    use_saturation: bool = True,
+):
+    """
+    Long-format (panel x date rows) version of ``prepare_mmm_design``.
+
+    Rows are sorted by (panel, date) and every panel is adstocked in the same
+    ``adstock_matrix`` call: panels are front-padded with zero spend to a
+    common length, which leaves their carryover untouched, and laid side by
+    side as extra channels. Returns ``X, y, panels, meta`` where ``panels``
+    holds the integer panel code of each row and ``meta["panels"]`` the labels.
+
+    Dates, target and spend are parsed by ``MMMDataset.from_frame``, so rows
+    are dropped and coerced exactly as on the single-market path.
+    """
+    # positional labels let the kept rows be mapped back to the panel column
+    data = MMMDataset.from_frame(df.set_axis(pd.RangeIndex(len(df))), date_col, target_col, spend_cols)
+    pos = data.index.to_numpy()
+    codes, labels = pd.factorize(df[panel_col].to_numpy()[pos], sort=True)
+
+    # rows are date-sorted already; a stable sort by panel gives (panel, date)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]  # drop rows without a panel label (code -1)
+    codes, pos = codes[order], pos[order]
+    spend, y = data.spend[order], data.y[order]
+    index = df.index[pos]
+
+    counts = np.bincount(codes, minlength=len(labels))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    n_panels, n_ch, t_max = len(labels), len(spend_cols), int(counts.max(initial=0))
+
+    alphas = _channel_alphas(adstock_alpha, spend_cols)
+
+    # row -> (panel, padded time) slot, aligned to the end of the window
+    slot = np.arange(len(codes)) - starts[codes] + (t_max - counts[codes])
+    padded = np.zeros((t_max, n_panels, n_ch))
+    padded[slot, codes] = spend
+    adstocked = adstock_matrix(padded.reshape(t_max, -1), np.tile(alphas, n_panels))
+    x = adstocked.reshape(t_max, n_panels, n_ch)[slot, codes]
+
+    if use_saturation:
+        x = np.log1p(np.maximum(x, 0))
+
+    X = pd.DataFrame(
+        np.column_stack([np.ones(len(codes)), x]),
+        index=index,
+        columns=["const"] + [f"{c}__x" for c in spend_cols],
+        copy=False,
+    )
+    meta = {
+        "panel_col": panel_col,
+        "panels": list(labels),
+        "date_col": data.date_col,
+        "target_col": target_col,
+        "spend_cols": spend_cols,
+        "adstock_alpha": dict(zip(spend_cols, alphas.tolist())),
+        "use_saturation": use_saturation,
+        "spend": spend,
+    }
+    return X, y, codes, meta
+
+
+# ============================================================
+# PANEL FIT
+# ============================================================
+
+@dataclass
+class PanelResult:
+    params: pd.DataFrame
+    fit: pd.DataFrame
+    roi: pd.DataFrame
+
+
+def _fit_batch(X: np.ndarray, y: np.ndarray):
+    # X: (panels, rows, features), y: (panels, rows) -- equal-length panels
+    beta = _batched_lstsq(X, y)
+    resid = y - np.einsum("btp,bp->bt", X, beta)
+    ss_res = np.sum(resid**2, axis=1)
+    ss_tot = np.sum((y - y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+    r2 = np.where(ss_tot > 0, 1.0 - ss_res / np.where(ss_tot > 0, ss_tot, 1.0), 0.0)
+
+    n, p = X.shape[1], X.shape[2] - 1
+    r2_adj = 1.0 - (1.0 - r2) * (n - 1) / (n - p - 1) if n > (p + 1) else r2
+    return beta, r2, r2_adj
+
+
+@traced(arg=0)
+def fit_panel_mmm(
+    df: pd.DataFrame,
+    panel_col: str,
+    date_col: str | None,
+    target_col: str,
+    spend_cols: list[str],
+    adstock_alpha=0.5,
+    use_saturation: bool = True,
+    n_jobs: int = 1,
+    batch_size: int = 256,
+) -> PanelResult:
+    """
+    Fit one OLS MMM per panel (geo, brand, ...) of a long-format frame.
+
+    Panels with the same number of rows are solved together as one stacked
+    batch; batches are spread over a process pool when ``n_jobs > 1``.
+    Returns per-panel coefficients, fit statistics and a per-panel version of
+    the ``roi_by_channel`` table.
+    """
+    X, y, codes, meta = prepare_panel_design(
+        df, panel_col, date_col, target_col, spend_cols, adstock_alpha, use_saturation
+    )
+    labels = meta["panels"]
+    Xmat = X.to_numpy()
+    counts = np.bincount(codes, minlength=len(labels))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # group panels by length so each group stacks into one array
+    tasks = []
+    for length in np.unique(counts):
+        members = np.flatnonzero(counts == length)
+        for i in range(0, len(members), batch_size):
+            chunk = members[i : i + batch_size]
+            rows = starts[chunk][:, None] + np.arange(length)[None, :]
+            tasks.append((chunk, Xmat[rows], y[rows]))
+
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            solved = list(pool.map(_fit_batch, [t[1] for t in tasks], [t[2] for t in tasks]))
+    else:
+        solved = [_fit_batch(t[1], t[2]) for t in tasks]
+
+    n_feat = Xmat.shape[1]
+    beta = np.empty((len(labels), n_feat))
+    r2 = np.empty(len(labels))
+    r2_adj = np.empty(len(labels))
+    for (chunk, _, _), (b, r, ra) in zip(tasks, solved):
+        beta[chunk], r2[chunk], r2_adj[chunk] = b, r, ra
+
+    params = pd.DataFrame(beta, index=pd.Index(labels, name=panel_col), columns=X.columns)
+    fit = pd.DataFrame(
+        {"rsquared": r2, "rsquared_adj": r2_adj, "nobs": counts},
+        index=params.index,
+    ).reset_index()
+
+    # contributions and spend summed per panel in one pass each
+    feat_totals = np.add.reduceat(Xmat[:, 1:], starts, axis=0) if len(Xmat) else np.zeros((0, n_feat - 1))
+    spend_totals = np.add.reduceat(meta["spend"], starts, axis=0) if len(Xmat) else feat_totals
+    contrib = beta[:, 1:] * feat_totals
+
+    roi = pd.DataFrame(
+        {
+            panel_col: np.repeat(labels, len(spend_cols)),
+            "channel": np.tile(spend_cols, len(labels)),
+            "coef": beta[:, 1:].ravel(),
+            "spend": spend_totals.ravel(),
+            "contribution": contrib.ravel(),
+        }
+    )
+    spend_pos = roi["spend"].where(roi["spend"] > 0)
+    roi["roi"] = roi["contribution"] / spend_pos
+    roi = roi.sort_values([panel_col, "roi"], ascending=[True, False]).reset_index(drop=True)
+
+    return PanelResult(params=params, fit=fit, roi=roi)
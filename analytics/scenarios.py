@@ -0,0 +1,218 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from analytics.mmm import OLSResult, adstock_matrix, ridge_penalty
+from analytics.tracing import traced
+
+# Default chunk: ~4M float cells of per-draw working state per chunk
+_CHUNK_CELLS = 4_000_000
+
+
+@dataclass
+class ScenarioResult:
+    bands: pd.DataFrame
+    totals: pd.DataFrame
+    n_paths: int
+    uncertainty: str
+
+
+@dataclass
+class _Posterior:
+    """
+    Coefficient / residual-scale draws for the paths: Gaussian around
+    ``beta_hat`` (``beta_chol`` @ z), or rows resampled from a sampler's
+    ``draws`` / ``sigma2`` when given. ``nonneg`` columns are clipped at 0.
+    """
+
+    beta_hat: np.ndarray
+    beta_chol: np.ndarray
+    sigma2: float
+    draws: np.ndarray | None = None
+    sigma2_draws: np.ndarray | None = None
+    nonneg: np.ndarray | None = None
+
+    def sample(self, rng: np.random.Generator, size: int) -> tuple[np.ndarray, np.ndarray]:
+        if self.draws is not None:
+            pick = rng.integers(0, len(self.draws), size=size)
+            return self.draws[pick], np.sqrt(self.sigma2_draws[pick])
+        beta = self.beta_hat + rng.standard_normal((size, len(self.beta_hat))) @ self.beta_chol.T
+        if self.nonneg is not None:
+            beta[:, self.nonneg] = np.maximum(beta[:, self.nonneg], 0.0)
+        return beta, np.full(size, np.sqrt(self.sigma2))
+
+
+def _posterior(res: OLSResult, X: pd.DataFrame, y: np.ndarray) -> tuple[_Posterior, str]:
+    # parameter uncertainty of the estimator that produced ``res``:
+    # - Bayes: its own posterior draws
+    # - ridge: the Gaussian posterior of the ridge prior, s^2 (X'X + L)^-1,
+    #   with L the GCV penalty on the standardized media columns
+    # - OLS: s^2 (X'X)^-1
+    Xmat = X.to_numpy(dtype=float)
+    y = np.asarray(y, dtype=float)
+    beta_hat = np.asarray(res.params, dtype=float)
+    media = np.array([c != "const" for c in X.columns])
+    dof = max(len(y) - Xmat.shape[1], 1)
+    sigma2 = float(np.sum((y - Xmat @ beta_hat) ** 2)) / dof
+
+    if getattr(res, "draws", None) is not None:
+        post = _Posterior(beta_hat, np.zeros((len(beta_hat),) * 2), sigma2, res.draws, np.asarray(res.sigma2))
+        return post, "bayes posterior"
+
+    gram = Xmat.T @ Xmat
+    kind = "ols"
+    if hasattr(res, "lambda_"):
+        gram = gram + np.diag(ridge_penalty(X, res.lambda_))
+        kind = "ridge (Gaussian approx.)"
+    w, v = np.linalg.eigh(sigma2 * np.linalg.pinv(gram, hermitian=True))
+    nonneg = np.flatnonzero(media) if getattr(res, "nonneg", False) else None
+    return _Posterior(beta_hat, v * np.sqrt(np.maximum(w, 0.0)), sigma2, nonneg=nonneg), kind
+
+
+def _simulate_chunk(
+    plans: np.ndarray,
+    posterior: _Posterior,
+    alphas: np.ndarray,
+    carry: np.ndarray,
+    use_saturation: bool,
+    spend_cv: float,
+    size: int,
+    seed,
+) -> np.ndarray:
+    # plans: (scenarios, weeks, channels). Every scenario reuses the same
+    # coefficient / noise / spend-noise draws (common random numbers), so
+    # scenarios can be compared path by path. Adstock runs as the geometric
+    # recurrence over weeks on a (scenarios, draws, channels) state, so the
+    # working memory never grows with the horizon.
+    rng = np.random.default_rng(seed)
+    n_scen, n_weeks, n_ch = plans.shape
+
+    beta, sigma = posterior.sample(rng, size)
+    intercept, coef = beta[:, 0], beta[:, 1:]
+    s_ln = np.sqrt(np.log1p(spend_cv**2)) if spend_cv > 0 else 0.0
+
+    state = np.broadcast_to(carry, (n_scen, size, n_ch)).copy()
+    out = np.empty((n_scen, size, n_weeks), dtype=np.float32)
+    for w in range(n_weeks):
+        noise = sigma * rng.standard_normal(size)
+        if s_ln > 0:
+            mult = rng.lognormal(-0.5 * s_ln**2, s_ln, size=(size, n_ch))
+            spend = plans[:, w, None, :] * mult
+        else:
+            spend = plans[:, w, None, :]
+        state *= alphas
+        state += spend
+        x = np.log1p(np.maximum(state, 0)) if use_saturation else state
+        out[:, :, w] = intercept + np.einsum("kdc,dc->kd", x, coef) + noise
+    return out
+
+
+@traced(arg=1)
+def simulate_scenarios(
+    res: OLSResult,
+    X: pd.DataFrame,
+    y: np.ndarray,
+    meta: dict,
+    history_spend: np.ndarray,
+    plans: dict[str, np.ndarray],
+    weeks: int | None = None,
+    n_paths: int = 100_000,
+    spend_cv: float = 0.1,
+    quantiles=(0.05, 0.5, 0.95),
+    chunk_size: int | None = None,
+    n_jobs: int = 1,
+    seed: int = 0,
+) -> ScenarioResult:
+    """
+    Monte Carlo forward revenue for several candidate spend plans.
+
+    Each path draws coefficients from the fit's own uncertainty (posterior
+    draws for ``fit_mmm_bayes``, the ridge-prior Gaussian for
+    ``fit_mmm_ridge``, N(params, s^2 (X'X)^-1) for OLS; see
+    ``ScenarioResult.uncertainty``), adds N(0, s^2) residual noise per week
+    and multiplies planned spend by mean-one lognormal noise with
+    coefficient of variation ``spend_cv``.
+    Adstock starts from the carry state at the end of ``history_spend``
+    (the modeled rows x channels spend, e.g. ``df.loc[X.index, spend_cols]``).
+
+    ``plans`` maps a scenario name to a (weeks x channels) array or a
+    per-channel vector repeated for ``weeks``. Paths are simulated in chunks
+    of ``chunk_size`` draws (default: ~4M cells of per-draw state and
+    output), fanned out to a process pool for ``n_jobs > 1``; results depend
+    only on ``seed`` and ``chunk_size``.
+    """
+    if meta.get("adstock_kind", "geometric") != "geometric" or meta.get("max_lag") is not None:
+        raise ValueError("simulate_scenarios supports the geometric adstock recurrence only")
+
+    spend_cols = list(meta["spend_cols"])
+    n_ch = len(spend_cols)
+    alphas = np.array([meta["adstock_alpha"][c] for c in spend_cols], dtype=float)
+
+    names = list(plans)
+    arrays = []
+    for name in names:
+        plan = np.asarray(plans[name], dtype=float)
+        if plan.ndim == 1:
+            if weeks is None:
+                raise ValueError(f"Plan {name!r} is a per-channel vector; pass weeks")
+            plan = np.tile(plan, (weeks, 1))
+        if plan.shape[1] != n_ch:
+            raise ValueError(f"Plan {name!r} has {plan.shape[1]} channels, expected {n_ch}")
+        arrays.append(plan)
+    if len({a.shape[0] for a in arrays}) != 1:
+        raise ValueError("All plans must cover the same number of weeks")
+    stacked = np.stack(arrays)
+    n_weeks = stacked.shape[1]
+
+    posterior, uncertainty = _posterior(res, X, y)
+
+    carry = adstock_matrix(np.asarray(history_spend, dtype=float), alphas)[-1] if len(history_spend) else np.zeros(n_ch)
+
+    if chunk_size is None:
+        # per draw: the (scenarios x weeks) output, the adstock state, spend
+        # and saturated spend (scenarios x channels), spend noise, coefficients
+        per_draw = len(names) * (n_weeks + 3 * n_ch) + n_ch + X.shape[1]
+        chunk_size = max(1, _CHUNK_CELLS // per_draw)
+    sizes = [min(chunk_size, n_paths - i) for i in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    common = (stacked, posterior, alphas, carry, bool(meta["use_saturation"]), spend_cv)
+
+    if n_jobs > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_simulate_chunk, *common, size, s) for size, s in zip(sizes, seeds)]
+            parts = [f.result() for f in futures]
+    else:
+        parts = [_simulate_chunk(*common, size, s) for size, s in zip(sizes, seeds)]
+    paths = np.concatenate(parts, axis=1)  # (scenarios, paths, weeks)
+
+    qs = np.asarray(quantiles, dtype=float)
+    q_cols = [f"q{round(q * 100):02d}" for q in qs]
+
+    weekly_q = np.quantile(paths, qs, axis=1)  # (quantiles, scenarios, weeks)
+    bands = pd.DataFrame(
+        {
+            "scenario": np.repeat(names, n_weeks),
+            "week": np.tile(np.arange(1, n_weeks + 1), len(names)),
+            "mean": paths.mean(axis=1, dtype=float).ravel(),
+        }
+    )
+    for i, col in enumerate(q_cols):
+        bands[col] = weekly_q[i].ravel()
+
+    total = paths.sum(axis=2, dtype=float)  # (scenarios, paths)
+    total_q = np.quantile(total, qs, axis=1)
+    best = np.bincount(total.argmax(axis=0), minlength=len(names)) / total.shape[1]
+    totals = pd.DataFrame(
+        {
+            "scenario": names,
+            "total_spend": stacked.sum(axis=(1, 2)),
+            "revenue_mean": total.mean(axis=1),
+        }
+    )
+    for i, col in enumerate(q_cols):
+        totals[f"revenue_{col}"] = total_q[i]
+    totals["prob_best"] = best
+
+    return ScenarioResult(bands=bands, totals=totals, n_paths=n_paths, uncertainty=uncertainty)
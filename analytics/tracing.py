@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+# Opt-in span tracing for the analytics stages and agent calls. Disabled
+# (the default) every ``span`` is a shared no-op object and ``@traced``
+# functions call straight through, so instrumented code pays one flag check.
+# Enable with ``enable()`` or MMM_TRACE=1; export as JSON lines or as a
+# Chrome trace (chrome://tracing, ui.perfetto.dev).
+#
+# Spans go to the tracer bound to the current context (``activate``), so
+# concurrent Streamlit sessions each record into their own; code that binds
+# none uses the process-wide ``TRACER``. Worker threads see the caller's
+# tracer only when started under a copy of its context.
+
+
+def sizes(obj) -> Dict[str, int]:
+    """
+    ``rows`` / ``cols`` / ``bytes`` of a frame, array, series or string
+    (the first element of a tuple or list); empty for anything else.
+    """
+    if isinstance(obj, (tuple, list)) and obj:
+        obj = obj[0]
+    if isinstance(obj, str):
+        return {"bytes": len(obj.encode("utf-8"))}
+    shape = getattr(obj, "shape", None)
+    if not isinstance(shape, tuple) or not shape:
+        return {}
+    out = {"rows": int(shape[0]), "cols": int(shape[1]) if len(shape) > 1 else 1}
+    usage = getattr(obj, "memory_usage", None)
+    if callable(usage) and hasattr(obj, "columns"):
+        out["bytes"] = int(usage(index=True).sum())
+    elif callable(usage):
+        out["bytes"] = int(usage(index=True))
+    elif hasattr(obj, "nbytes"):
+        out["bytes"] = int(obj.nbytes)
+    return out
+
+
+class _NullSpan:
+    """The span handed out while tracing is off: falsy, and does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attrs):
+        return self
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    One timed region. Use as a context manager; ``set`` attaches attributes
+    (row/column counts, bytes, cache hits, ...). Guard expensive attributes
+    with ``if sp:`` so they are only computed while tracing.
+    """
+
+    __slots__ = ("tracer", "name", "attrs", "start_ns", "end_ns", "thread", "thread_name", "depth", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = self.end_ns = 0
+        self.thread, self.thread_name, self.depth, self.error = 0, "", 0, ""
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def __bool__(self):
+        return True
+
+    def __enter__(self):
+        t = threading.current_thread()
+        self.thread, self.thread_name = t.ident or 0, t.name
+        self.depth = self.tracer._enter()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._exit(self)
+        return False
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_s": (self.start_ns - self.tracer.epoch_ns) / 1e9,
+            "seconds": self.seconds,
+            "thread": self.thread_name,
+            "depth": self.depth,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Collects finished spans from every thread, keeping the most recent
+    ``max_spans``.
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = 100_000):
+        self.enabled = enabled
+        self.epoch_ns = time.perf_counter_ns()
+        self.epoch_wall = time.time()
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name: str, **attrs) -> Span | _NullSpan:
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    def _enter(self) -> int:
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        return depth
+
+    def _exit(self, span: Span) -> None:
+        self._local.depth = span.depth
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        """Finished spans in start order."""
+        with self._lock:
+            return sorted(self._spans, key=lambda s: s.start_ns)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+        self.epoch_ns = time.perf_counter_ns()
+        self.epoch_wall = time.time()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Per span name: call count, total / mean / max seconds and the
+        largest row count seen, slowest total first.
+        """
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for s in self.spans():
+            row = by_name.setdefault(s.name, {"name": s.name, "calls": 0, "total_s": 0.0, "max_s": 0.0, "rows": None})
+            row["calls"] += 1
+            row["total_s"] += s.seconds
+            row["max_s"] = max(row["max_s"], s.seconds)
+            if "rows" in s.attrs:
+                row["rows"] = max(row["rows"] or 0, s.attrs["rows"])
+        for row in by_name.values():
+            row["mean_s"] = row["total_s"] / row["calls"]
+        return sorted(by_name.values(), key=lambda r: -r["total_s"])
+
+    def to_jsonl(self) -> str:
+        """One JSON object per span."""
+        return "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in self.spans())
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Trace Event Format (complete "X" events, microseconds), one track
+        per thread.
+        """
+        pid = os.getpid()
+        events, threads = [], {}
+        for s in self.spans():
+            threads[s.thread] = s.thread_name
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": s.name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (s.start_ns - self.epoch_ns) / 1e3,
+                    "dur": (s.end_ns - s.start_ns) / 1e3,
+                    "pid": pid,
+                    "tid": s.thread,
+                    "args": {**s.attrs, **({"error": s.error} if s.error else {})},
+                }
+            )
+        meta = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+
+TRACER = Tracer(enabled=os.environ.get("MMM_TRACE", "").lower() in ("1", "true", "yes"))
+
+_ACTIVE: contextvars.ContextVar[Tracer] = contextvars.ContextVar("mmm_tracer")
+
+
+def current() -> Tracer:
+    """The tracer bound to this context, else the process-wide ``TRACER``."""
+    return _ACTIVE.get(TRACER)
+
+
+def activate(tracer: Tracer) -> contextvars.Token:
+    """
+    Bind ``tracer`` for the rest of the current context (e.g. one Streamlit
+    script run); ``deactivate(token)`` restores the previous binding.
+    """
+    return _ACTIVE.set(tracer)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _ACTIVE.reset(token)
+
+
+def span(name: str, **attrs) -> Span | _NullSpan:
+    """
+    ``with span("mmm.fit", rows=n) as sp:`` on the current tracer.
+    """
+    tracer = _ACTIVE.get(TRACER)
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return Span(tracer, name, attrs)
+
+
+def traced(name: str | None = None, attrs: Callable[[Any], Dict[str, Any]] | None = sizes, arg: int | None = None):
+    """
+    Decorator: run the function inside ``span(name)`` (default
+    ``module.function``) and attach ``attrs(result)``, by default the
+    result's ``sizes``; with ``arg`` set, ``attrs`` of that positional
+    argument instead (for functions returning result objects).
+    """
+
+    def decorate(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _ACTIVE.get(TRACER)
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with Span(tracer, label, {}) as sp:
+                if attrs is not None and arg is not None and len(args) > arg:
+                    sp.set(**attrs(args[arg]))
+                out = fn(*args, **kwargs)
+                if attrs is not None and arg is None:
+                    sp.set(**attrs(out))
+                return out
+
+        return wrapper
+
+    return decorate
+
+
+def enable() -> None:
+    current().enabled = True
+
+
+def disable() -> None:
+    current().enabled = False
+
+
+def is_enabled() -> bool:
+    return current().enabled
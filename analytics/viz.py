@@ -1 +1,10 @@
-import plotly.express as px
+# plotly.express is imported on first use of ``analytics.viz.px``, so
+# importing analytics stays free of the plotting stack.
+
+
+def __getattr__(name):
+    if name == "px":
+        import plotly.express as px
+
+        return px
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
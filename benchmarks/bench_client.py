@@ -0,0 +1,55 @@
+"""
+Latency of bare ``requests.post`` vs. the pooled ``ChatClient`` (sequential
+and concurrent) against the local chat-completions stub.
+
+    python -m benchmarks.bench_client --calls 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+import requests
+
+from agents.client import ChatClient
+from tests.stub import StubServer
+
+MSG = [{"role": "user", "content": "ping"}]
+
+
+def bare(url: str, calls: int) -> None:
+    for _ in range(calls):
+        requests.post(url, json={"model": "m", "messages": MSG}, timeout=30).json()
+
+
+def pooled(client: ChatClient, calls: int) -> None:
+    for _ in range(calls):
+        client.chat("m", MSG)
+
+
+def concurrent(client: ChatClient, calls: int, max_concurrency: int) -> None:
+    asyncio.run(client.achat_many([{"model": "m", "messages": MSG}] * calls, max_concurrency=max_concurrency))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    runs = [
+        ("bare requests.post", lambda srv: bare(srv.url, args.calls)),
+        ("pooled sequential", lambda srv: pooled(ChatClient(url=srv.url), args.calls)),
+        ("pooled async", lambda srv: concurrent(ChatClient(url=srv.url), args.calls, args.concurrency)),
+    ]
+    print(f"{args.calls} calls, {args.latency * 1e3:.0f} ms server latency")
+    for name, fn in runs:
+        with StubServer(latency=args.latency) as srv:
+            t0 = time.perf_counter()
+            fn(srv)
+            elapsed = time.perf_counter() - t0
+        print(f"{name:22s} {elapsed:7.3f} s  {elapsed / args.calls * 1e3:7.1f} ms/call  {srv.connections:3d} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Time and peak memory of the pandas-era MMM path vs. the NumPy core.
+
+    python -m benchmarks.bench_design --rows 3650 --channels 100
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from analytics.mmm import contribution_totals, fit_mmm_ols, prepare_mmm_design, roi_by_channel
+
+
+def make_frame(rows: int, channels: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    spend = rng.gamma(2.0, 1000.0, size=(rows, channels))
+    data = {f"ch{j}_spend": spend[:, j] for j in range(channels)}
+    data["date"] = pd.date_range("2015-01-01", periods=rows, freq="D")
+    data["revenue"] = 1e5 + np.log1p(spend).sum(axis=1) * 50 + rng.normal(0, 1e3, rows)
+    return pd.DataFrame(data)
+
+
+def legacy_path(df, spend_cols, alpha=0.5):
+    # the original implementation: per-element adstock loop, column-by-column
+    # DataFrame build, to_numpy copy in the fit, full contribution matrix
+    d = df.copy()
+    d["date"] = pd.to_datetime(d["date"], errors="coerce")
+    d = d.dropna(subset=["date"]).sort_values("date")
+    d = d.dropna(subset=["revenue"]).copy()
+
+    cols = {"const": np.ones(len(d))}
+    for c in spend_cols:
+        x = pd.to_numeric(d[c], errors="coerce").fillna(0.0).to_numpy()
+        out = np.zeros_like(x, dtype=float)
+        carry = 0.0
+        for i, v in enumerate(x):
+            carry = float(v) + alpha * carry
+            out[i] = carry
+        cols[f"{c}__x"] = np.log1p(np.maximum(out, 0))
+    X = pd.DataFrame(cols, index=d.index)
+    y = d["revenue"].to_numpy(dtype=float)
+
+    Xmat = X.to_numpy(dtype=float)
+    beta, *_ = np.linalg.lstsq(Xmat, y, rcond=None)
+    contrib = X.multiply(beta, axis=1)
+    return roi_by_channel(d, contrib, spend_cols)
+
+
+def numpy_path(df, spend_cols, alpha=0.5, dtype=np.float64):
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", spend_cols, adstock_alpha=alpha, dtype=dtype)
+    res = fit_mmm_ols(X, y)
+    return roi_by_channel(df.loc[X.index], contribution_totals(X, res.params), spend_cols)
+
+
+def measure(fn, *args, **kwargs) -> dict:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 1024**2}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=3650)
+    parser.add_argument("--channels", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows, args.channels)
+    spend_cols = [c for c in df.columns if c.endswith("_spend")]
+
+    rows = [
+        {"path": "legacy", **measure(legacy_path, df, spend_cols)},
+        {"path": "numpy float64", **measure(numpy_path, df, spend_cols)},
+        {"path": "numpy float32", **measure(numpy_path, df, spend_cols, dtype=np.float32)},
+    ]
+    print(f"{args.rows} rows x {args.channels} channels")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+
+
+if __name__ == "__main__":
+    main()
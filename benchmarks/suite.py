@@ -0,0 +1,387 @@
+"""
+Scalability sweep over the MMM and experiment code paths.
+
+Each case builds a synthetic frame (the dashboard's ``load_demo_df`` scaled
+up in rows, channels and panels) and records wall time, peak traced memory
+and allocated blocks for every stage. Results are compared to a stored
+baseline; a stage that got slower or hungrier by more than ``--threshold``
+fails the run.
+
+    python -m benchmarks.suite                       # compare to baseline.json
+    python -m benchmarks.suite --quick               # small cases only
+    python -m benchmarks.suite --save                # refresh baseline.json
+
+Wall times are machine specific: refresh the baseline on the machine that
+runs the comparison.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+BASELINE = Path(__file__).with_name("baseline.json")
+THRESHOLD = 0.5  # allowed relative growth before a stage counts as regressed
+
+
+# ============================================================
+# SYNTHETIC DATA
+# ============================================================
+
+def demo_frame(rows: int = 52, channels: int = 3, freq: str = "W", seed: int = 7) -> pd.DataFrame:
+    """
+    ``load_demo_df`` generalized: ``rows`` periods at ``freq`` with
+    ``channels`` normally distributed spend columns, a yearly seasonal base
+    and a linear revenue response. ``demo_frame()`` matches the dashboard's
+    demo shape (52 weeks, three channels).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=rows, freq=freq)
+
+    mean = rng.uniform(1000, 6000, channels)
+    spend = rng.normal(mean, 0.2 * mean, size=(rows, channels)).clip(0.1 * mean)
+    coef = rng.uniform(1.0, 5.0, channels)
+
+    per_year = 365.25 / (dates[1] - dates[0]).days if rows > 1 else 52
+    base = 90000 + 4000 * np.sin(2 * np.pi * np.arange(rows) / per_year)
+    revenue = base + spend @ coef + rng.normal(0, 6000, rows)
+
+    data = {"date": dates, "revenue": revenue}
+    data.update({f"ch{j}_spend": spend[:, j] for j in range(channels)})
+    return pd.DataFrame(data)
+
+
+def demo_panel(panels: int = 10, rows: int = 104, channels: int = 3, freq: str = "W", seed: int = 7) -> pd.DataFrame:
+    """
+    Long-format stack of ``panels`` independent ``demo_frame`` geos with a
+    ``geo`` column; each geo gets its own revenue scale.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for g, sd in enumerate(np.random.SeedSequence(seed).spawn(panels)):
+        d = demo_frame(rows, channels, freq, seed=int(sd.generate_state(1)[0]))
+        d["revenue"] *= rng.uniform(0.5, 2.0)
+        d.insert(0, "geo", f"geo{g:04d}")
+        frames.append(d)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+@dataclass
+class StageResult:
+    sweep: str
+    case: str
+    stage: str
+    seconds: float
+    peak_mb: float
+    allocs: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.sweep}/{self.case}/{self.stage}"
+
+
+def measure(fn: Callable[[], Any], repeat: int = 3):
+    """
+    Best-of-``repeat`` wall time (tracing off), then one traced call for the
+    peak memory above the starting point and the number of memory blocks
+    still allocated by the call when it returns (its result plus any leaks).
+    Returns ``(value, seconds, peak_mb, allocs)``.
+    """
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - t0)
+    del value
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        value = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocs = sum(max(s.count_diff, 0) for s in after.compare_to(before, "filename"))
+    return value, best, (peak - start) / 1024**2, allocs
+
+
+# ============================================================
+# STAGES
+# ============================================================
+
+def mmm_stages(df: pd.DataFrame) -> List[tuple]:
+    """
+    ``(stage, fn(state))`` pairs for the single-frame MMM path; every stage
+    stores its output in ``state`` for the next one. The frame is parsed
+    once into an ``MMMDataset`` that the later stages consume.
+    """
+    from analytics.dataset import MMMDataset
+    from analytics.mmm import channel_contributions, fit_mmm_ols, prepare_mmm_design, roi_by_channel
+
+    spend_cols = [c for c in df.columns if c.endswith("_spend")]
+
+    def dataset(s):
+        s["data"] = MMMDataset.from_frame(df, "date", "revenue", spend_cols)
+
+    def design(s):
+        s["X"], s["y"], _ = prepare_mmm_design(s["data"], "date", "revenue", spend_cols)
+
+    def fit(s):
+        s["res"] = fit_mmm_ols(s["X"], s["y"])
+
+    def contrib(s):
+        s["contrib"] = channel_contributions(s["X"], s["res"].params)
+
+    def roi(s):
+        s["roi"] = roi_by_channel(s["data"], s["contrib"], spend_cols)
+
+    return [
+        ("MMMDataset.from_frame", dataset),
+        ("prepare_mmm_design", design),
+        ("fit_mmm_ols", fit),
+        ("channel_contributions", contrib),
+        ("roi_by_channel", roi),
+    ]
+
+
+def panel_stages(df: pd.DataFrame) -> List[tuple]:
+    """
+    Per-geo MMM fit plus the experiment-design stages that scale with the
+    number of geos.
+    """
+    from analytics.causal import did_estimate
+    from analytics.geo_power import kpi_panel, simulate_geo_power
+    from analytics.panel import fit_panel_mmm
+
+    spend_cols = [c for c in df.columns if c.endswith("_spend")]
+
+    def panel_fit(s):
+        s["panel_fit"] = fit_panel_mmm(df, "geo", "date", "revenue", spend_cols)
+
+    def kpi(s):
+        s["kpi"] = kpi_panel(df, "geo", "date", "revenue")
+
+    def power(s):
+        s["power"] = simulate_geo_power(s["kpi"], n_sims=2000)
+
+    def did(s):
+        geos = s["kpi"].index
+        s["did"] = did_estimate(s["kpi"], geos[: len(geos) // 2], s["kpi"].columns[-8], n_perm=1000)
+
+    stages = [("fit_panel_mmm", panel_fit), ("kpi_panel", kpi)]
+    if df["geo"].nunique() >= 4:
+        stages += [("simulate_geo_power", power), ("did_estimate", did)]
+    return stages
+
+
+def experiment_stages(n: int) -> List[tuple]:
+    """
+    Closed-form experiment planners on an ``n x n`` grid.
+    """
+    from analytics.experiments import ab_test_sample_size_grid, geo_test_mde_grid
+
+    mde = np.linspace(1, 30, n)
+    power = np.linspace(0.5, 0.95, n)
+    weeks = np.arange(1, n + 1)
+    geos = np.arange(2, n + 2)
+
+    def ab(s):
+        s["ab"] = ab_test_sample_size_grid(0.05, mde[:, None], power=power[None, :])
+
+    def geo(s):
+        s["geo"] = geo_test_mde_grid(100_000, weeks[:, None], geos[None, :])
+
+    return [("ab_test_sample_size_grid", ab), ("geo_test_mde_grid", geo)]
+
+
+def bayes_stages(n_draws: int) -> List[tuple]:
+    """
+    Conjugate Bayesian MMM on the dashboard's demo shape: the closed-form
+    posterior and the positive (Gibbs) variant with ``n_draws`` draws.
+    """
+    from analytics.bayes import fit_mmm_bayes
+    from analytics.mmm import prepare_mmm_design
+
+    df = demo_frame()
+    spend_cols = [c for c in df.columns if c.endswith("_spend")]
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", spend_cols, use_saturation=False)
+
+    def closed_form(s):
+        s["bayes"] = fit_mmm_bayes(X, y, n_draws=n_draws)
+
+    def positive(s):
+        s["bayes_positive"] = fit_mmm_bayes(X, y, positive=True, n_draws=n_draws)
+
+    return [("fit_mmm_bayes", closed_form), ("fit_mmm_bayes_positive", positive)]
+
+
+# ============================================================
+# SWEEPS
+# ============================================================
+
+# sweep -> [(case, builder, quick)]; builders return the stage list
+SWEEPS: Dict[str, List[tuple]] = {
+    "rows": [
+        ("52w", lambda: mmm_stages(demo_frame(52, 10)), True),
+        ("156w", lambda: mmm_stages(demo_frame(156, 10)), True),
+        ("365d", lambda: mmm_stages(demo_frame(365, 10, "D")), True),
+        ("1095d", lambda: mmm_stages(demo_frame(1095, 10, "D")), False),
+        ("3650d", lambda: mmm_stages(demo_frame(3650, 10, "D")), False),
+    ],
+    "channels": [
+        ("3ch", lambda: mmm_stages(demo_frame(730, 3, "D")), True),
+        ("20ch", lambda: mmm_stages(demo_frame(730, 20, "D")), True),
+        ("100ch", lambda: mmm_stages(demo_frame(730, 100, "D")), False),
+        ("500ch", lambda: mmm_stages(demo_frame(730, 500, "D")), False),
+    ],
+    "panels": [
+        ("1geo", lambda: panel_stages(demo_panel(1, 104, 5)), True),
+        ("10geo", lambda: panel_stages(demo_panel(10, 104, 5)), True),
+        ("100geo", lambda: panel_stages(demo_panel(100, 104, 5)), False),
+        ("500geo", lambda: panel_stages(demo_panel(500, 104, 5)), False),
+    ],
+    "experiments": [
+        ("10x10", lambda: experiment_stages(10), True),
+        ("100x100", lambda: experiment_stages(100), True),
+        ("1000x1000", lambda: experiment_stages(1000), False),
+    ],
+    "bayes": [
+        ("1k", lambda: bayes_stages(1000), True),
+        ("4k", lambda: bayes_stages(4000), True),
+        ("20k", lambda: bayes_stages(20_000), False),
+    ],
+}
+
+
+def run_suite(
+    sweeps: Dict[str, List[tuple]] | None = None,
+    quick: bool = False,
+    repeat: int = 5,
+    log: Callable[[str], None] | None = None,
+) -> List[StageResult]:
+    """
+    Run every case of ``sweeps`` (default ``SWEEPS``; only the quick cases
+    with ``quick=True``) and measure each stage in order.
+    """
+    results = []
+    for sweep, cases in (sweeps or SWEEPS).items():
+        for case, build, is_quick in cases:
+            if quick and not is_quick:
+                continue
+            state: Dict[str, Any] = {}
+            for stage, fn in build():
+                _, seconds, peak_mb, allocs = measure(lambda: fn(state), repeat=repeat)
+                r = StageResult(sweep, case, stage, seconds, peak_mb, allocs)
+                results.append(r)
+                if log is not None:
+                    log(f"{r.key:<48} {seconds * 1e3:10.2f} ms {peak_mb:9.2f} MB {allocs:8d} blocks")
+    return results
+
+
+# ============================================================
+# BASELINE
+# ============================================================
+
+def save_baseline(results: List[StageResult], path: Path = BASELINE) -> None:
+    payload = {
+        "env": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        },
+        "results": [asdict(r) for r in results],
+    }
+    Path(path).write_text(json.dumps(payload, indent=1) + "\n")
+
+
+def load_baseline(path: Path = BASELINE) -> Dict[str, StageResult]:
+    payload = json.loads(Path(path).read_text())
+    return {r.key: r for r in (StageResult(**row) for row in payload["results"])}
+
+
+def compare(
+    results: List[StageResult],
+    baseline: Dict[str, StageResult],
+    threshold: float = THRESHOLD,
+    min_seconds: float = 0.005,
+    min_mb: float = 1.0,
+) -> pd.DataFrame:
+    """
+    One row per stage found in both runs with the time and peak-memory
+    ratios. ``regressed`` is set when either grew by more than
+    ``threshold`` (0.5 = 50%) and by more than the absolute noise floor
+    (``min_seconds`` / ``min_mb``), so millisecond-scale stages don't flap.
+    """
+    rows = []
+    for r in results:
+        b = baseline.get(r.key)
+        if b is None:
+            continue
+        slow = r.seconds > b.seconds * (1 + threshold) and r.seconds - b.seconds > min_seconds
+        fat = r.peak_mb > b.peak_mb * (1 + threshold) and r.peak_mb - b.peak_mb > min_mb
+        rows.append(
+            {
+                "stage": r.key,
+                "seconds": r.seconds,
+                "base_seconds": b.seconds,
+                "time_ratio": r.seconds / b.seconds if b.seconds > 0 else np.nan,
+                "peak_mb": r.peak_mb,
+                "base_peak_mb": b.peak_mb,
+                "mem_ratio": r.peak_mb / b.peak_mb if b.peak_mb > 0 else np.nan,
+                "regressed": slow or fat,
+            }
+        )
+    return pd.DataFrame(rows, columns=[
+        "stage", "seconds", "base_seconds", "time_ratio", "peak_mb", "base_peak_mb", "mem_ratio", "regressed"
+    ])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small cases only")
+    parser.add_argument("--sweep", action="append", choices=sorted(SWEEPS), help="run only these sweeps")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed relative growth (0.5 = 50%%)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    sweeps = {k: SWEEPS[k] for k in args.sweep} if args.sweep else SWEEPS
+    results = run_suite(sweeps, quick=args.quick, repeat=args.repeat, log=print)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"saved {len(results)} stages to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save first")
+        return 0
+
+    report = compare(results, load_baseline(args.baseline), threshold=args.threshold)
+    print()
+    print(report.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    regressed = report[report["regressed"]]
+    if len(regressed):
+        print(f"\n{len(regressed)} stage(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"\nno regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,444 @@
-import chromadb
-def retrieve(q): return []
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from analytics.tracing import traced
+
+# Local retriever: documents are chunked, embedded in batches and stored as a
+# memory-mapped float32 matrix (vectors.f32) with JSON sidecars for chunk
+# metadata and the per-document manifest. Re-ingesting only embeds documents
+# whose sha256 changed; an optional IVF index narrows search on big corpora.
+
+DEFAULT_DIR = Path.home() / ".cache" / "ai-mmm-platform" / "rag"
+TEXT_SUFFIXES = (".md", ".txt", ".rst")
+
+
+# ============================================================
+# CHUNKING
+# ============================================================
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
+    """
+    Split into ~``chunk_size``-character chunks on paragraph / whitespace
+    boundaries, each starting ``overlap`` characters before the previous end.
+    """
+    text = re.sub(r"[ \t]+", " ", text).strip()
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            cut = max(text.rfind("\n\n", start, end), text.rfind(" ", start, end))
+            if cut > start + chunk_size // 2:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+# ============================================================
+# EMBEDDERS
+# ============================================================
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Deterministic offline embedder: unigrams and bigrams hashed (blake2b)
+    into ``dim`` signed buckets, sublinear tf, L2-normalized.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._buckets: Dict[str, tuple[int, float]] = {}
+
+    def _bucket(self, token: str) -> tuple[int, float]:
+        hit = self._buckets.get(token)
+        if hit is None:
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            hit = self._buckets[token] = (h % self.dim, 1.0 if (h >> 63) & 1 else -1.0)
+        return hit
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows, cols, vals = [], [], []
+        for i, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            for tok in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                j, sign = self._bucket(tok)
+                rows.append(i)
+                cols.append(j)
+                vals.append(sign)
+
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(out, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), np.asarray(vals, dtype=np.float32))
+        out = np.sign(out) * np.log1p(np.abs(out))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms > 0, norms, 1.0)
+
+
+class SentenceTransformerEmbedder:
+    """
+    ``sentence-transformers`` model (imported on first use), normalized.
+    """
+
+    def __init__(self, model: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        self.name = f"st-{model}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vecs = self._model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vecs, dtype=np.float32)
+
+
+def get_embedder(name: str | None = None):
+    """
+    ``"hashing"`` (default) or ``"sentence-transformers[:<model>]"``;
+    ``RAG_EMBEDDER`` sets the default.
+    """
+    name = name or os.environ.get("RAG_EMBEDDER", "hashing")
+    if name == "hashing":
+        return HashingEmbedder()
+    if name.startswith("sentence-transformers"):
+        _, _, model = name.partition(":")
+        return SentenceTransformerEmbedder(model or "all-MiniLM-L6-v2")
+    raise ValueError(f"Unknown embedder {name!r}")
+
+
+# ============================================================
+# INDEX
+# ============================================================
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _spherical_kmeans(X: np.ndarray, k: int, iters: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centroids = X[rng.choice(len(X), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(X @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, X)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        centroids = np.where(empty[:, None], centroids, sums / np.where(norms > 0, norms, 1.0))
+    return centroids.astype(np.float32), np.argmax(X @ centroids.T, axis=1).astype(np.int32)
+
+
+class VectorIndex:
+    """
+    Persisted embedding index in ``root``:
+
+    - ``vectors.f32``  row-major float32 (rows x dim), read via ``np.memmap``
+    - ``chunks.jsonl`` one metadata record per row (doc_id, chunk, text)
+    - ``manifest.json`` embedder, dim, per-document sha256 and row span,
+      tombstoned rows of replaced documents
+    - ``ivf.npz``      optional centroids + per-row list assignment
+
+    Rows are append-only; replaced or removed documents are tombstoned and
+    the file is compacted once more than ``compact_ratio`` of rows are dead.
+    The manifest is written last and is the commit point: rows past its
+    ``rows`` count (an append interrupted before the manifest was saved) are
+    cut off when the index is opened. One instance may be shared across
+    threads; writes are serialized and searches read a consistent snapshot.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_DIR, embedder=None, compact_ratio: float = 0.3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or get_embedder()
+        self.compact_ratio = compact_ratio
+
+        manifest = self.root / "manifest.json"
+        if manifest.exists():
+            self.manifest = json.loads(manifest.read_text())
+            if self.manifest["embedder"] != self.embedder.name:
+                raise ValueError(
+                    f"Index at {self.root} was built with {self.manifest['embedder']!r}, "
+                    f"not {self.embedder.name!r}; use a new directory"
+                )
+        else:
+            self.manifest = {"embedder": self.embedder.name, "dim": self.embedder.dim, "rows": 0, "docs": {}, "dead": []}
+        self._lock = threading.RLock()
+        self._ivf = None
+        self._vectors = None
+        self.meta = self._read_meta()
+        self._truncate_vectors()
+
+    # --------------------------------------------------------
+    # storage
+    # --------------------------------------------------------
+
+    @property
+    def dim(self) -> int:
+        return int(self.manifest["dim"])
+
+    @property
+    def rows(self) -> int:
+        return int(self.manifest["rows"])
+
+    def _read_meta(self) -> List[dict]:
+        # only the manifest's rows; a torn or uncommitted tail is dropped
+        path = self.root / "chunks.jsonl"
+        if not path.exists():
+            return []
+        with path.open("rb") as f:
+            meta = [json.loads(line) for line in itertools.islice(f, self.rows)]
+            end, tail = f.tell(), f.read(1)
+        if len(meta) < self.rows:
+            raise ValueError(f"{path} has {len(meta)} rows, manifest expects {self.rows}")
+        if tail:
+            with path.open("r+b") as f:
+                f.truncate(end)
+        return meta
+
+    def _truncate_vectors(self) -> None:
+        path = self.root / "vectors.f32"
+        size = self.rows * self.dim * np.dtype(np.float32).itemsize
+        if path.exists() and path.stat().st_size > size:
+            with path.open("r+b") as f:
+                f.truncate(size)
+
+    def vectors(self) -> np.ndarray:
+        """Read-only memmap of the (rows x dim) matrix."""
+        if self._vectors is None or len(self._vectors) != self.rows:
+            if not self.rows:
+                return np.zeros((0, self.dim), dtype=np.float32)
+            self._vectors = np.memmap(self.root / "vectors.f32", dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return self._vectors
+
+    def _alive(self) -> np.ndarray:
+        alive = np.ones(self.rows, dtype=bool)
+        alive[np.asarray(self.manifest["dead"], dtype=np.intp)] = False
+        return alive
+
+    def _save(self) -> None:
+        tmp = self.root / "manifest.json.tmp"
+        tmp.write_text(json.dumps(self.manifest))
+        tmp.replace(self.root / "manifest.json")
+
+    def _save_ivf(self) -> None:
+        centroids, lists = self._ivf
+        np.savez(self.root / "ivf.tmp.npz", centroids=centroids, lists=lists)
+        (self.root / "ivf.tmp.npz").replace(self.root / "ivf.npz")
+
+    def _append(self, vecs: np.ndarray, records: List[dict]) -> None:
+        with (self.root / "vectors.f32").open("ab") as f:
+            f.write(np.ascontiguousarray(vecs, dtype=np.float32).tobytes())
+        with (self.root / "chunks.jsonl").open("a", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        self.meta.extend(records)
+        self.manifest["rows"] += len(records)
+        self._vectors = None
+
+        if self._load_ivf() is not None:
+            centroids, lists = self._ivf
+            new_lists = np.argmax(vecs @ centroids.T, axis=1).astype(np.int32)
+            self._ivf = (centroids, np.concatenate([lists, new_lists]))
+            self._save_ivf()
+
+    # --------------------------------------------------------
+    # ingestion
+    # --------------------------------------------------------
+
+    @traced("rag.ingest", attrs=dict)
+    def ingest_texts(self, docs: Dict[str, str], batch_size: int = 256, chunk_size: int = 800, overlap: int = 100) -> dict:
+        """
+        Add or update documents given as ``{doc_id: text}``. Documents whose
+        sha256 is unchanged are skipped; changed ones are re-chunked and
+        re-embedded and their old rows tombstoned.
+        """
+        with self._lock:
+            stats = {"added": 0, "updated": 0, "unchanged": 0, "chunks": 0}
+            pending_vecs, pending_meta = [], []
+            batch_texts, batch_meta = [], []
+
+            def flush():
+                if batch_texts:
+                    pending_vecs.append(self.embedder.embed(batch_texts))
+                    pending_meta.extend(batch_meta)
+                    batch_texts.clear()
+                    batch_meta.clear()
+
+            start = self.rows
+            for doc_id, text in docs.items():
+                digest = _sha256(text)
+                old = self.manifest["docs"].get(doc_id)
+                if old is not None and old["sha256"] == digest:
+                    stats["unchanged"] += 1
+                    continue
+                if old is not None:
+                    self.manifest["dead"].extend(range(*old["span"]))
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+
+                chunks = chunk_text(text, chunk_size, overlap)
+                first = start + len(pending_meta) + len(batch_meta)
+                for i, chunk in enumerate(chunks):
+                    batch_texts.append(chunk)
+                    batch_meta.append({"doc_id": doc_id, "chunk": i, "text": chunk})
+                    if len(batch_texts) >= batch_size:
+                        flush()
+                self.manifest["docs"][doc_id] = {"sha256": digest, "span": [first, first + len(chunks)]}
+                stats["chunks"] += len(chunks)
+            flush()
+
+            if pending_meta:
+                self._append(np.concatenate(pending_vecs), pending_meta)
+            self._save()
+            self._maybe_compact()
+            return stats
+
+    def ingest_paths(self, paths: Iterable[str | Path], **kwargs) -> dict:
+        """
+        Ingest text files (``TEXT_SUFFIXES``), walking directories.
+        Document ids are the resolved file paths.
+        """
+        docs = {}
+        for p in map(Path, paths):
+            files = sorted(f for f in p.rglob("*") if f.suffix.lower() in TEXT_SUFFIXES) if p.is_dir() else [p]
+            for f in files:
+                docs[str(f.resolve())] = f.read_text(encoding="utf-8", errors="replace")
+        return self.ingest_texts(docs, **kwargs)
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                old = self.manifest["docs"].pop(doc_id, None)
+                if old is not None:
+                    self.manifest["dead"].extend(range(*old["span"]))
+            self._save()
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if not self.rows or len(self.manifest["dead"]) <= self.compact_ratio * self.rows:
+            return
+        keep = np.flatnonzero(self._alive())
+        vecs = np.array(self.vectors()[keep])
+        remap = np.full(self.rows, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        (self.root / "vectors.f32.tmp").write_bytes(vecs.tobytes())
+        with (self.root / "chunks.jsonl.tmp").open("w", encoding="utf-8") as f:
+            for i in keep:
+                f.write(json.dumps(self.meta[i], ensure_ascii=False) + "\n")
+        self._vectors = None
+        (self.root / "vectors.f32.tmp").replace(self.root / "vectors.f32")
+        (self.root / "chunks.jsonl.tmp").replace(self.root / "chunks.jsonl")
+
+        self.meta = [self.meta[i] for i in keep]
+        for doc in self.manifest["docs"].values():
+            a, b = doc["span"]
+            doc["span"] = [int(remap[a]), int(remap[a]) + (b - a)] if b > a else [0, 0]
+        self.manifest["rows"], self.manifest["dead"] = len(keep), []
+        if self._load_ivf() is not None:
+            centroids, lists = self._ivf
+            self._ivf = (centroids, lists[keep])
+            self._save_ivf()
+        self._save()
+
+    # --------------------------------------------------------
+    # approximate index
+    # --------------------------------------------------------
+
+    def _load_ivf(self):
+        if self._ivf is None and (self.root / "ivf.npz").exists():
+            with np.load(self.root / "ivf.npz") as z:
+                # saved before the manifest: drop lists of uncommitted rows
+                self._ivf = (z["centroids"], z["lists"][: self.rows])
+        return self._ivf
+
+    def build_ivf(self, n_lists: int | None = None, iters: int = 10, sample: int = 50_000, seed: int = 0) -> None:
+        """
+        Inverted-file index: spherical k-means centroids (fit on up to
+        ``sample`` rows) and a list id per row. Later ingests assign new rows
+        to their nearest centroid.
+        """
+        with self._lock:
+            X = self.vectors()
+            n_lists = n_lists or max(1, int(np.sqrt(self.rows)))
+            rng = np.random.default_rng(seed)
+            fit_rows = np.sort(rng.choice(self.rows, size=min(sample, self.rows), replace=False))
+            centroids, _ = _spherical_kmeans(np.asarray(X[fit_rows]), min(n_lists, len(fit_rows)), iters, seed)
+
+            lists = np.empty(self.rows, dtype=np.int32)
+            for i in range(0, self.rows, 65_536):
+                lists[i : i + 65_536] = np.argmax(X[i : i + 65_536] @ centroids.T, axis=1)
+            self._ivf = (centroids, lists)
+            self._save_ivf()
+
+    # --------------------------------------------------------
+    # search
+    # --------------------------------------------------------
+
+    @traced("rag.search", attrs=lambda hits: {"hits": len(hits)})
+    def search(self, query: str, k: int = 5, nprobe: int | None = None) -> List[dict]:
+        """
+        Top-``k`` chunks by cosine similarity. Exact (one matrix-vector
+        product over the memmap) unless an IVF index exists and ``nprobe``
+        is given, in which case only the ``nprobe`` nearest lists are scored.
+        """
+        with self._lock:  # a consistent snapshot; concurrent appends only extend meta
+            if not self.rows:
+                return []
+            X, alive, meta = self.vectors(), self._alive(), self.meta
+            ivf = self._load_ivf() if nprobe else None
+        q = self.embedder.embed([query])[0]
+
+        if ivf is not None:
+            centroids, lists = ivf
+            probes = np.argsort(-(centroids @ q))[:nprobe]
+            cand = np.flatnonzero(np.isin(lists, probes) & alive)
+            scores = X[cand] @ q
+        else:
+            cand = np.flatnonzero(alive)
+            scores = (X @ q)[cand]
+
+        k = min(k, len(cand))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**meta[int(cand[i])], "row": int(cand[i]), "score": float(scores[i])} for i in top]
+
+
+_INDEX: VectorIndex | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> VectorIndex:
+    """
+    Shared index at ``RAG_INDEX_DIR`` (default ``~/.cache/ai-mmm-platform/rag``).
+    """
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:  # one instance (and one reader of the files) per process
+            if _INDEX is None:
+                _INDEX = VectorIndex(os.environ.get("RAG_INDEX_DIR", str(DEFAULT_DIR)))
+    return _INDEX
+
+
+def retrieve(q: str, k: int = 5) -> List[dict]:
+    """
+    Top-``k`` chunks for ``q`` from the shared index (``[]`` when empty).
+    """
+    return get_index().search(q, k=k)
@@ -1,12 +1,8 @@
 import os
-import sys
-from pathlib import Path
+
 import streamlit as st
 
-# Ensure repo root is on path
-REPO_ROOT = Path(__file__).resolve().parents[1]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+import _bootstrap  # noqa: F401  (repo root on sys.path)
 
 st.set_page_config(page_title="AI MMM Platform", page_icon="📊", layout="wide")
 
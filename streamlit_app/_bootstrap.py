@@ -0,0 +1,11 @@
+"""
+Shared page bootstrap: puts the repo root on ``sys.path`` so pages can
+import ``analytics``, ``agents`` and ``rag``. Streamlit puts this directory
+on the path for the main script, so every page can ``import _bootstrap``.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
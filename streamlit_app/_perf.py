@@ -0,0 +1,62 @@
+"""
+Performance panel shared by the pages: a sidebar toggle that turns on
+``analytics.tracing`` for the current rerun and an expander with the
+recorded spans, downloadable as JSON lines or a Chrome trace.
+"""
+import json
+
+import pandas as pd
+import streamlit as st
+
+from analytics import tracing
+
+
+def perf_toggle() -> bool:
+    """
+    Sidebar switch; when on, tracing restarts with every rerun so the panel
+    shows only the current one. Each session records into its own tracer,
+    bound to this script run, so sessions never see or reset each other's
+    spans.
+    """
+    with st.sidebar:
+        on = st.toggle("Performance panel", key="perf_trace", help="Time each analytics stage, agent call and chart.")
+    tracer = st.session_state.get("perf_tracer")
+    if tracer is None:
+        tracer = st.session_state["perf_tracer"] = tracing.Tracer()
+    tracer.enabled = on
+    if on:
+        tracer.clear()
+    tracing.activate(tracer)
+    return on
+
+
+def perf_panel() -> None:
+    """
+    Collapsible per-stage timings for this rerun (call at the end of a page).
+    """
+    tracer = tracing.current()
+    if not tracer.enabled:
+        return
+    spans = tracer.spans()
+
+    with st.expander(f"⏱️ Performance ({len(spans)} spans)"):
+        if not spans:
+            st.caption("Nothing traced on this rerun.")
+            return
+
+        summary = pd.DataFrame(tracer.summary(), columns=["name", "calls", "total_s", "mean_s", "max_s", "rows"])
+        st.dataframe(summary, use_container_width=True)
+
+        timeline = pd.json_normalize([s.to_dict() for s in spans])
+        timeline["name"] = ["  " * d + n for d, n in zip(timeline["depth"], timeline["name"])]
+        st.dataframe(timeline.drop(columns=["depth"]), use_container_width=True)
+
+        c1, c2 = st.columns(2)
+        c1.download_button("Download JSON lines", tracer.to_jsonl(), "trace.jsonl", "application/x-ndjson")
+        c2.download_button(
+            "Download Chrome trace",
+            json.dumps(tracer.to_chrome_trace(), default=str),
+            "trace.json",
+            "application/json",
+            help="Open in chrome://tracing or ui.perfetto.dev",
+        )
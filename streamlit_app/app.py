@@ -1,13 +1,9 @@
 import os
 import sys
-from pathlib import Path
 
 import streamlit as st
 
-# --- Ensure repo root is on PYTHONPATH (Streamlit Cloud runs from streamlit_app/) ---
-REPO_ROOT = Path(__file__).resolve().parents[1]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+from _bootstrap import ROOT as REPO_ROOT
 
 st.set_page_config(
     page_title="AI MMM Platform",
@@ -1,11 +1,10 @@
-import sys
-from pathlib import Path
-
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
+import _bootstrap  # noqa: F401  (repo root on sys.path)
 
 import streamlit as st
+
+from _perf import perf_panel, perf_toggle
+from agents.cache import get_cache
+from agents.dag import Replace
 from agents.graph import build_graph
 
 st.set_page_config(page_title="Chat Assistant", page_icon="💬", layout="wide")
@@ -13,17 +12,42 @@ st.set_page_config(page_title="Chat Assistant", page_icon="💬", layout="wide")
 st.title("💬 Chat Assistant")
 st.caption("Lightweight multi-agent workflow (OpenRouter). Works even if API key is missing (mock mode).")
 
+perf_toggle()
+
 graph = build_graph()
 
 q = st.text_area("Ask a question", value="Summarize what this MMM app does and what I should do next.")
 run = st.button("Run")
 
 if run:
-    with st.spinner("Thinking..."):
-        out = graph.invoke({"question": q})
-
+    # stream every agent token by token; independent agents run side by side
     st.subheader("Answer")
-    st.write(out.get("answer", ""))
-
-    with st.expander("Analyst notes"):
-        st.write(out.get("analyst_notes", ""))
+    boxes = {"answer": st.empty()}
+    with st.expander("Presentation outline", expanded=True):
+        boxes["presentation"] = st.empty()
+    with st.expander("Specialist notes"):
+        for key, label in [("analyst_notes", "Data Analyst"), ("mmm_notes", "MMM Specialist"), ("causal_notes", "Causal Inference")]:
+            st.markdown(f"**{label}**")
+            boxes[key] = st.empty()
+
+    text = {k: "" for k in boxes}
+    with st.spinner("Thinking..."):
+        for agent, delta in graph.stream({"question": q}):
+            # a fallback replaces whatever the agent streamed before failing
+            text[agent] = delta if isinstance(delta, Replace) else text.get(agent, "") + delta
+            if agent in boxes:
+                boxes[agent].markdown(text[agent])
+
+    if graph.last_run is not None:
+        with st.expander("Agent timings"):
+            run_info = graph.last_run
+            st.caption(
+                f"Wall {run_info.wall_s:.2f}s · critical path {run_info.critical_path_s:.2f}s "
+                f"({' → '.join(run_info.critical_path)}) · sequential would be {run_info.sum_s:.2f}s"
+            )
+            st.dataframe(run_info.timings(), use_container_width=True)
+
+with st.expander("Response cache"):
+    st.json(get_cache().stats())
+
+perf_panel()
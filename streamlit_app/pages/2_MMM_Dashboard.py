@@ -1,12 +1,4 @@
-import sys
-from pathlib import Path
-
-# ---------------------------------------
-# Add repo root to PYTHONPATH (Cloud fix)
-# ---------------------------------------
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
+import _bootstrap  # noqa: F401  (repo root on sys.path)
 
 # ---------------------------------------
 # Imports
@@ -16,13 +8,15 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 
-from analytics.mmm import (
-    detect_columns,
-    prepare_mmm_design,
-    fit_mmm_ols,
-    channel_contributions,
-    roi_by_channel,
-)
+from _perf import perf_panel, perf_toggle
+from analytics.backtest import backtest_mmm
+from analytics.bootstrap import bootstrap_mmm
+from analytics.cache import MMMPipelineCache, frame_fingerprint
+from analytics.loader import load_mmm_table
+from analytics.mmm import search_adstock_params
+from analytics.optimizer import ResponseModel, optimize_budget, response_curves
+from analytics.scenarios import simulate_scenarios
+from analytics.tracing import sizes, span
 
 # ---------------------------------------
 # Page config
@@ -42,7 +36,7 @@ with st.sidebar:
 
     uploaded = None
     if not demo_mode:
-        uploaded = st.file_uploader("Upload CSV", type=["csv"])
+        uploaded = st.file_uploader("Upload CSV or Parquet", type=["csv", "parquet"])
 
     st.divider()
 
@@ -50,6 +44,66 @@ with st.sidebar:
 
     adstock_alpha = st.slider("Adstock Alpha", 0.0, 0.95, 0.50, 0.05)
     use_saturation = st.checkbox("Use saturation", value=True)
+    estimator = st.selectbox(
+        "Estimator",
+        ["ols", "ridge", "ridge_nonneg", "bayes", "bayes_positive"],
+        format_func={
+            "ols": "OLS",
+            "ridge": "Ridge (GCV)",
+            "ridge_nonneg": "Ridge, non-negative media (GCV)",
+            "bayes": "Bayesian (conjugate)",
+            "bayes_positive": "Bayesian, positive media",
+        }.get,
+    )
+    show_intervals = st.checkbox(
+        "Bootstrap ROI intervals",
+        value=False,
+        disabled=estimator == "ridge_nonneg",
+        help="Not available for the non-negative ridge fit; Bayesian fits show posterior intervals instead.",
+    ) and estimator != "ridge_nonneg"
+
+perf_toggle()
+
+# ---------------------------------------
+# Pipeline cache (shared across reruns)
+# ---------------------------------------
+@st.cache_resource
+def get_pipeline_cache():
+    return MMMPipelineCache(max_bytes=256 * 1024**2)
+
+
+pipeline_cache = get_pipeline_cache()
+
+
+# Backtest folds, keyed on what the design was built from (frame
+# fingerprint, adstock alpha, saturation) and the backtest settings
+@st.cache_data(max_entries=32, show_spinner="Backtesting...")
+def cached_backtest(_X, _y, design_key, initial: int, horizon: int, window: str):
+    return backtest_mmm(_X, _y, initial=initial, horizon=horizon, step=1, window=window)
+
+
+# Optimizer outputs, keyed on the response model's parameters and the budget
+# inputs (the model object itself is not hashed)
+def model_key(model: ResponseModel) -> tuple:
+    return (tuple(model.channels), tuple(model.coef.tolist()), tuple(model.carryover.tolist()), model.use_saturation)
+
+
+@st.cache_data(max_entries=32)
+def cached_response_curves(_model, key, max_spend: tuple):
+    return response_curves(_model, max_spend=np.array(max_spend))
+
+
+@st.cache_data(max_entries=64)
+def cached_budget_plan(_model, key, budget: float, current: tuple, min_pct: int, max_pct: int):
+    current = np.array(current)
+    return optimize_budget(
+        _model,
+        total_budget=budget,
+        current=current,
+        lower=current * min_pct / 100,
+        upper=current * max_pct / 100,
+    )
+
 
 # ---------------------------------------
 # Demo dataset
@@ -75,17 +129,40 @@ def load_demo_df():
         }
     )
 
+@st.cache_data(show_spinner="Loading file...")
+def load_uploaded(file):
+    # DuckDB projects/casts/filters/sorts out of core; only model columns come back
+    return load_mmm_table(file, memory_limit="1GB")
+
 # ---------------------------------------
 # Load data
 # ---------------------------------------
 if demo_mode:
-    df = load_demo_df()
+    with span("page.load_data", source="demo") as sp:
+        df = load_demo_df()
+        if sp:
+            sp.set(**sizes(df))
 else:
     if uploaded is None:
         st.info("Upload a CSV or enable Demo Mode.")
         st.stop()
 
-    df = pd.read_csv(uploaded)
+    with span("page.load_data", source=uploaded.name) as sp:
+        df, load_report = load_uploaded(uploaded)
+        if sp:
+            sp.set(**sizes(df))
+
+    with st.expander("Load report"):
+        st.write(
+            {
+                "Rows": load_report.rows,
+                "Columns loaded": load_report.columns,
+                "Array MB": round(load_report.array_bytes / 1024**2, 2),
+                "Load seconds": round(load_report.elapsed_s, 3),
+                "DuckDB memory limit": load_report.memory_limit,
+                "Load RSS growth MB": load_report.rss_delta_mb,
+            }
+        )
 
 # ---------------------------------------
 # Preview
@@ -93,7 +170,8 @@ else:
 st.subheader("📄 Data Preview")
 st.dataframe(df.head(15), use_container_width=True)
 
-date_col, target_col, spend_cols = detect_columns(df)
+fingerprint = frame_fingerprint(df)
+date_col, target_col, spend_cols = pipeline_cache.detect_columns(df, fingerprint=fingerprint)
 
 st.write(
     {
@@ -110,18 +188,19 @@ if not target_col or not spend_cols:
 # ---------------------------------------
 # Model
 # ---------------------------------------
-X, y, meta = prepare_mmm_design(
+out = pipeline_cache.run(
     df=df,
     date_col=date_col,
     target_col=target_col,
     spend_cols=spend_cols,
     adstock_alpha=adstock_alpha,
     use_saturation=use_saturation,
+    fingerprint=fingerprint,
+    estimator=estimator,
 )
 
-res = fit_mmm_ols(X, y)
-contrib = channel_contributions(X, res.params)
-roi = roi_by_channel(df.loc[X.index], contrib, spend_cols)
+X, res, contrib_totals, roi = out.X, out.fit, out.contrib_totals, out.roi
+data = out.data  # parsed, coerced modeling rows (MMMDataset)
 
 # ---------------------------------------
 # KPI Cards
@@ -134,23 +213,178 @@ c2.metric("R²", f"{res.rsquared:.3f}")
 c3.metric("Adj R²", f"{res.rsquared_adj:.3f}")
 c4.metric("Channels", len(spend_cols))
 
+if hasattr(res, "lambda_"):
+    st.caption(f"Ridge penalty selected by GCV: λ = {res.lambda_:.4g}")
+
+with st.expander("Cache stats"):
+    st.caption(f"{len(pipeline_cache.lru)} entries, {pipeline_cache.lru.nbytes / 1024**2:.1f} MB")
+    st.dataframe(pipeline_cache.stats(), use_container_width=True)
+
 # ---------------------------------------
 # Tabs
 # ---------------------------------------
-tab1, tab2 = st.tabs(["ROI", "Contributions"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["ROI", "Contributions", "Tuning", "Backtest", "Budget Optimizer"])
 
 with tab1:
     st.subheader("💰 ROI by Channel")
+
+    has_intervals = show_intervals or hasattr(res, "roi_summary")
+    if hasattr(res, "roi_summary"):
+        roi = res.roi_summary(X, data, spend_cols)
+        st.caption(f"90% posterior credible intervals ({len(res.draws):,} draws)")
+    elif show_intervals:
+        ridge_lambda = getattr(res, "lambda_", None)
+        boot = bootstrap_mmm(
+            X, out.y, method="block", n_boot=1000, df=data, spend_cols=spend_cols, ridge_lambda=ridge_lambda
+        )
+        roi = boot.roi
+        fit_label = "OLS" if ridge_lambda is None else f"ridge, λ fixed at {ridge_lambda:.4g}"
+        st.caption(f"95% moving-block bootstrap intervals ({len(boot.draws):,} resamples, {fit_label})")
+
     st.dataframe(roi, use_container_width=True)
 
-    fig = px.bar(roi, x="channel", y="roi", title="ROI by Channel")
-    st.plotly_chart(fig, use_container_width=True)
+    with span("render.roi_chart"):
+        if has_intervals:
+            fig = px.bar(
+                roi,
+                x="channel",
+                y="roi",
+                error_y=roi["roi_upper"] - roi["roi"],
+                error_y_minus=roi["roi"] - roi["roi_lower"],
+                title="ROI by Channel",
+            )
+        else:
+            fig = px.bar(roi, x="channel", y="roi", title="ROI by Channel")
+        st.plotly_chart(fig, use_container_width=True)
 
 with tab2:
     st.subheader("📊 Channel Contributions")
 
-    totals = contrib.sum().reset_index()
+    totals = contrib_totals.reset_index()
     totals.columns = ["feature", "contribution"]
 
-    fig = px.bar(totals, x="feature", y="contribution")
-    st.plotly_chart(fig, use_container_width=True)
+    with span("render.contribution_chart"):
+        fig = px.bar(totals, x="feature", y="contribution")
+        st.plotly_chart(fig, use_container_width=True)
+
+with tab3:
+    st.subheader("🎛️ Per-Channel Adstock Search")
+    st.caption("Scores per-channel adstock alpha × saturation settings with batched least squares.")
+
+    t1, t2, t3 = st.columns(3)
+    search_method = t1.selectbox("Method", ["random", "halving", "grid"], index=0)
+    search_metric = t2.selectbox("Rank by", ["r2_adj", "r2", "holdout_rmse"], index=0)
+    n_candidates = t3.number_input("Candidates", 10, 20000, 500, step=50)
+
+    if st.button("Run search"):
+        with st.spinner("Searching..."):
+            ranked = search_adstock_params(
+                df=data,
+                date_col=date_col,
+                target_col=target_col,
+                spend_cols=spend_cols,
+                alphas=np.round(np.arange(0.0, 0.95, 0.1), 2),
+                method=search_method,
+                n_candidates=int(n_candidates),
+                metric=search_metric,
+                holdout=0.2 if search_metric == "holdout_rmse" else 0.0,
+            )
+        st.dataframe(ranked.head(25), use_container_width=True)
+
+with tab4:
+    st.subheader("🔁 Rolling-Origin Backtest")
+
+    bt_min = len(X.columns) + 2  # every training window must exceed the feature count
+    if len(X) - 1 <= bt_min:
+        st.info(f"Backtesting needs more than {bt_min + 1} rows; this dataset has {len(X)}.")
+    else:
+        b1, b2, b3 = st.columns(3)
+        bt_window = b1.selectbox("Window", ["expanding", "rolling"])
+        bt_horizon = b2.slider("Horizon (rows)", 1, 26, 4)
+        bt_initial = b3.slider("Initial train rows", bt_min, len(X) - 1, max(len(X) // 2, bt_min))
+
+        try:
+            bt = cached_backtest(
+                X, out.y, (fingerprint, adstock_alpha, use_saturation), bt_initial, bt_horizon, bt_window
+            )
+        except ValueError as e:
+            st.warning(str(e))
+        else:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Folds", len(bt.folds))
+            m2.metric("Mean MAPE", f"{bt.mape:.2f}%")
+            m3.metric("Mean RMSE", f"{bt.rmse:,.0f}")
+
+            with span("render.backtest_chart"):
+                st.plotly_chart(px.line(bt.folds, x="train_end", y="mape", title="MAPE by fold origin"), use_container_width=True)
+            st.dataframe(bt.stability, use_container_width=True)
+
+with tab5:
+    st.subheader("🧮 Response Curves & Budget Reallocation")
+
+    response_model = ResponseModel.from_fit(res, out.meta)
+    current_spend = data.spend_for(spend_cols).mean(axis=0)
+
+    response_key = model_key(response_model)
+    curves = cached_response_curves(response_model, response_key, tuple((3 * np.maximum(current_spend, 1.0)).tolist()))
+    with span("render.response_curves", rows=len(curves)):
+        st.plotly_chart(
+            px.line(curves, x="spend", y="response", color="channel", title="Per-period response curves"),
+            use_container_width=True,
+        )
+        st.plotly_chart(
+            px.line(curves, x="spend", y="marginal_roi", color="channel", title="Marginal ROI"),
+            use_container_width=True,
+        )
+
+    o1, o2, o3 = st.columns(3)
+    budget = o1.number_input("Per-period budget", min_value=0.0, value=float(current_spend.sum()), step=100.0)
+    min_pct = o2.slider("Min % of current", 0, 100, 50)
+    max_pct = o3.slider("Max % of current", 100, 500, 200)
+
+    try:
+        plan = cached_budget_plan(response_model, response_key, budget, tuple(current_spend.tolist()), min_pct, max_pct)
+    except ValueError as e:
+        st.warning(str(e))
+    else:
+        p1, p2 = st.columns(2)
+        p1.metric("Response at current mix", f"{plan.response_current:,.0f}")
+        p2.metric(
+            "Response at optimal mix",
+            f"{plan.response_optimal:,.0f}",
+            delta=f"{plan.response_optimal - plan.response_current:,.0f}",
+        )
+        st.dataframe(plan.allocation, use_container_width=True)
+
+        st.markdown("**Monte Carlo scenarios**")
+        s1, s2, s3 = st.columns(3)
+        sc_weeks = s1.slider("Weeks ahead", 4, 52, 13)
+        sc_paths = s2.select_slider("Paths", [10_000, 50_000, 100_000], value=50_000)
+        sc_cv = s3.slider("Spend noise (CV)", 0.0, 0.5, 0.1, 0.05)
+
+        if st.button("Run simulation"):
+            with st.spinner("Simulating paths..."):
+                scen = simulate_scenarios(
+                    res,
+                    X,
+                    out.y,
+                    out.meta,
+                    data.spend_for(spend_cols),
+                    {"current": current_spend, "optimal": plan.allocation["optimal"].to_numpy()},
+                    weeks=sc_weeks,
+                    n_paths=sc_paths,
+                    spend_cv=sc_cv,
+                )
+            with span("render.scenario_chart", rows=len(scen.bands)):
+                fig = px.line(scen.bands, x="week", y="q50", color="scenario", title="Weekly revenue (median, 5–95% band)")
+                for name, band in scen.bands.groupby("scenario"):
+                    fig.add_scatter(x=band["week"], y=band["q95"], mode="lines", line={"width": 0}, showlegend=False)
+                    fig.add_scatter(
+                        x=band["week"], y=band["q05"], mode="lines", line={"width": 0}, fill="tonexty", opacity=0.2, name=f"{name} band"
+                    )
+                st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(scen.totals, use_container_width=True)
+            st.caption(f"Coefficient uncertainty: {scen.uncertainty}")
+
+perf_panel()
+
@@ -1,23 +1,27 @@
-import sys
-from pathlib import Path
-
-# ---------------------------------------
-# Add repo root to PYTHONPATH
-# ---------------------------------------
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
+import _bootstrap  # noqa: F401  (repo root on sys.path)
 
 # ---------------------------------------
 # Imports
 # ---------------------------------------
 import streamlit as st
 import pandas as pd
+import numpy as np
+import plotly.express as px
 
+from _perf import perf_panel, perf_toggle
+from analytics import tracing
 from analytics.experiments import (
+    ab_test_sample_size_grid,
     ab_test_sample_size_per_group,
     geo_test_mde,
+    geo_test_mde_grid,
 )
+from analytics.geo_power import kpi_panel, simulate_geo_power
+
+MDE_GRID = np.round(np.arange(1.0, 50.5, 0.5), 1)
+POWER_GRID = np.array([0.7, 0.8, 0.9])
+WEEKS_GRID = np.arange(1, 13)
+GEOS_GRID = np.arange(5, 201)
 
 # ---------------------------------------
 # Page config
@@ -27,7 +31,9 @@ st.set_page_config(page_title="Experiment Designer", page_icon="🧪", layout="w
 st.title("🧪 Causal Experiment Designer")
 st.caption("Design A/B tests and Geo experiments")
 
-tab1, tab2 = st.tabs(["A/B Test", "Geo Test"])
+perf_toggle()
+
+tab1, tab2, tab3 = st.tabs(["A/B Test", "Geo Test", "Geo Power (historical)"])
 
 # ============================================================
 # A/B TEST
@@ -38,7 +44,7 @@ with tab1:
 
     c1, c2, c3, c4 = st.columns(4)
 
-    baseline = c1.number_input("Baseline Rate", value=0.05)
+    baseline = c1.number_input("Baseline Rate", min_value=0.0001, max_value=0.9999, value=0.05, format="%.4f")
     mde_pct = c2.slider("MDE %", 1.0, 50.0, 10.0)
     alpha = c3.selectbox("Alpha", [0.1, 0.05, 0.01], index=1)
     power = c4.selectbox("Power", [0.7, 0.8, 0.9], index=1)
@@ -52,6 +58,22 @@ with tab1:
 
     st.success(f"Required sample size ≈ {n:,} per group")
 
+    # whole MDE x power surface in one call
+    sizes = ab_test_sample_size_grid(baseline, MDE_GRID[:, None], alpha, POWER_GRID[None, :])
+    curve = pd.DataFrame(
+        {
+            "mde_pct": np.repeat(MDE_GRID, len(POWER_GRID)),
+            "power": np.tile(POWER_GRID, len(MDE_GRID)).astype(str),
+            "n_per_group": sizes.ravel(),
+        }
+    )
+    with tracing.span("render.sample_size_curve", rows=len(curve)):
+        fig = px.line(
+            curve, x="mde_pct", y="n_per_group", color="power", log_y=True, title="Sample size per group vs MDE"
+        )
+        fig.add_scatter(x=[mde_pct], y=[n], mode="markers", marker={"size": 10}, name="selected")
+        st.plotly_chart(fig, use_container_width=True)
+
 # ============================================================
 # GEO TEST
 # ============================================================
@@ -77,3 +99,61 @@ with tab2:
     )
 
     st.info(result.notes)
+
+    # MDE surface over duration x geos per arm
+    surface = geo_test_mde_grid(baseline_geo, WEEKS_GRID[:, None], GEOS_GRID[None, :])
+    with tracing.span("render.mde_surface", **tracing.sizes(surface.mde_pct)):
+        fig = px.imshow(
+            surface.mde_pct,
+            x=GEOS_GRID,
+            y=WEEKS_GRID,
+            origin="lower",
+            aspect="auto",
+            labels={"x": "Geos per arm", "y": "Weeks", "color": "MDE %"},
+            title="MDE % by duration and geos per arm",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+# ============================================================
+# SIMULATED GEO POWER
+# ============================================================
+with tab3:
+
+    st.subheader("Simulated Geo Test Power")
+    st.caption("Randomized pseudo-experiments on a historical geo × week KPI panel.")
+
+    upload = st.file_uploader("Geo panel (long format CSV)", type=["csv"])
+    if upload is None:
+        st.info("Upload a CSV with geo, date and KPI columns.")
+    else:
+        with tracing.span("page.read_csv", source=upload.name) as sp:
+            hist = pd.read_csv(upload)
+            if sp:
+                sp.set(**tracing.sizes(hist))
+        c1, c2, c3 = st.columns(3)
+        geo_col = c1.selectbox("Geo column", hist.columns)
+        date_col = c2.selectbox("Date column", hist.columns, index=min(1, len(hist.columns) - 1))
+        kpi_col = c3.selectbox("KPI column", hist.columns, index=len(hist.columns) - 1)
+
+        c1, c2, c3 = st.columns(3)
+        test_weeks = c1.slider("Test weeks", 1, 12, 4)
+        pre_weeks = c2.slider("Pre-period weeks", 1, 26, 8)
+        n_sims = c3.select_slider("Simulations", [1000, 5000, 10000], value=5000)
+
+        if st.button("Simulate power"):
+            with st.spinner("Simulating..."):
+                sim = simulate_geo_power(
+                    kpi_panel(hist, geo_col, date_col, kpi_col),
+                    test_weeks=test_weeks,
+                    pre_weeks=pre_weeks,
+                    lifts=np.linspace(0.0, 0.1, 21),
+                    n_sims=n_sims,
+                )
+            m1, m2 = st.columns(2)
+            m1.metric("MDE at 80% power", f"{sim.mde_pct:.2f}%")
+            m2.metric("False positive rate", f"{sim.false_positive_rate:.3f}")
+            with tracing.span("render.power_curve"):
+                st.plotly_chart(px.line(sim.curve, x="lift_pct", y="power", title="Empirical power curve"), use_container_width=True)
+            st.caption(sim.notes)
+
+perf_panel()
@@ -0,0 +1,36 @@
+import _bootstrap  # noqa: F401  (repo root on sys.path)
+
+import streamlit as st
+
+from _perf import perf_panel, perf_toggle
+from rag.retriever import get_index
+
+st.set_page_config(page_title="Knowledge Hub", page_icon="📚", layout="wide")
+
+st.title("📚 RAG Knowledge Hub")
+st.caption("Local memory-mapped embedding index over your marketing-science notes.")
+
+perf_toggle()
+
+index = get_index()
+
+c1, c2 = st.columns(2)
+c1.metric("Documents", len(index.manifest["docs"]))
+c2.metric("Chunks", index.rows - len(index.manifest["dead"]))
+
+uploads = st.file_uploader("Add documents (.md / .txt)", type=["md", "txt", "rst"], accept_multiple_files=True)
+if uploads and st.button("Ingest"):
+    with st.spinner("Embedding..."):
+        stats = index.ingest_texts({f.name: f.getvalue().decode("utf-8", errors="replace") for f in uploads})
+    st.success(f"{stats['added']} added, {stats['updated']} updated, {stats['unchanged']} unchanged ({stats['chunks']} chunks embedded)")
+
+q = st.text_input("Search", value="How does adstock carryover work?")
+k = st.slider("Results", 1, 20, 5)
+
+if q:
+    for hit in index.search(q, k=k):
+        with st.container(border=True):
+            st.caption(f"{hit['doc_id']} · chunk {hit['chunk']} · score {hit['score']:.3f}")
+            st.write(hit["text"])
+
+perf_panel()
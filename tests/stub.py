@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the chat-completions endpoint, used by the tests and
+# benchmarks. Behaviour is set on the server object:
+#   latency   seconds to sleep before answering
+#   failures  list of status codes to return (popped) before succeeding
+#   retry_after  Retry-After header sent with failures
+#   token_delay  seconds between streamed chunks ("stream": true requests)
+#   barrier   threading.Barrier the first ``barrier.parties`` requests must
+#             all reach before any is answered (409 if it breaks), so
+#             concurrency is checked without timing
+#   stream_gate  threading.Event every stream waits on after its first
+#             content chunk
+# and observed through:
+#   requests, connections, max_in_flight, stream_done (set when a stream
+#   has sent its final chunk)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with srv.lock:
+            srv.requests.append(body)
+            index = len(srv.requests) - 1
+            status = srv.failures.pop(0) if srv.failures else 200
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+
+        try:
+            self._respond(srv, body, index, status)
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+    def _respond(self, srv, body: dict, index: int, status: int):
+        if srv.barrier is not None and index < srv.barrier.parties:
+            try:
+                srv.barrier.wait()
+            except threading.BrokenBarrierError:
+                status = 409
+        time.sleep(srv.latency)
+        if status != 200:
+            payload = json.dumps({"error": {"code": status}}).encode()
+            self.send_response(status)
+            if srv.retry_after is not None:
+                self.send_header("Retry-After", str(srv.retry_after))
+        else:
+            prompt = body.get("messages", [{}])[-1].get("content", "")
+            if body.get("stream"):
+                return self._stream(f"echo: {prompt}")
+            payload = json.dumps(
+                {"choices": [{"message": {"role": "assistant", "content": f"echo: {prompt}"}}]}
+            ).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout tests)
+
+    def _stream(self, text: str):
+        # SSE over chunked transfer encoding, one word per event
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        words = text.split(" ")
+        events = [": keep-alive"]
+        events += [
+            "data: " + json.dumps({"choices": [{"delta": {"content": w if i == 0 else " " + w}}]})
+            for i, w in enumerate(words)
+        ]
+        events.append("data: [DONE]")
+        try:
+            for i, event in enumerate(events):
+                if i > 1:
+                    time.sleep(self.server.token_delay)
+                if i == 2 and self.server.stream_gate is not None:
+                    self.server.stream_gate.wait(timeout=10)
+                chunk = (event + "\n\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            self.server.stream_done.set()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.failures: list[int] = []
+        self.retry_after: float | None = None
+        self.token_delay = 0.0
+        self.barrier: threading.Barrier | None = None
+        self.stream_gate: threading.Event | None = None
+        self.requests: list[dict] = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.stream_done = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1/chat/completions"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.backtest import backtest_mmm, time_series_folds
+from analytics.mmm import fit_mmm_ols, prepare_mmm_design
+
+
+def _design(n=200, seed=4):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"date": pd.date_range("2022-01-01", periods=n, freq="D")})
+    for c in ["tv_spend", "search_spend"]:
+        df[c] = rng.gamma(2.0, 500.0, n)
+    df["revenue"] = 1e4 + 800 * np.log1p(df["tv_spend"]) + rng.normal(0, 300, n)
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", ["tv_spend", "search_spend"])
+    return X, y
+
+
+def test_time_series_folds():
+    exp = time_series_folds(20, initial=10, horizon=3, step=2)
+    assert exp.tolist()[:2] == [[0, 10, 13], [0, 12, 15]] and exp[-1, 2] <= 20
+    roll = time_series_folds(20, initial=10, horizon=3, step=2, window="rolling")
+    assert np.all(roll[:, 1] - roll[:, 0] == 10)
+
+
+@pytest.mark.parametrize("window", ["expanding", "rolling"])
+def test_backtest_matches_independent_fold_fits(window):
+    X, y = _design()
+    out = backtest_mmm(X, y, initial=60, horizon=7, step=5, window=window, fold_batch=8, n_jobs=2)
+
+    for f in out.folds.itertuples():
+        tr = slice(f.train_start, f.train_end)
+        res = fit_mmm_ols(X.iloc[tr], y[tr])
+        pred = X.iloc[f.train_end : f.test_end].to_numpy() @ res.params
+        actual = y[f.train_end : f.test_end]
+        assert f.rmse == pytest.approx(np.sqrt(np.mean((actual - pred) ** 2)), rel=1e-6)
+        assert f.mape == pytest.approx(np.mean(np.abs(actual - pred) / actual) * 100, rel=1e-6)
+
+    assert list(out.stability["feature"]) == ["tv_spend__x", "search_spend__x"]
+    assert out.mape == pytest.approx(out.folds["mape"].mean())
+
+
+def test_collinear_folds_match_lstsq():
+    # adstocked channels that are near copies of each other: X'X would be
+    # numerically singular, the QR/SVD path must still match a direct lstsq
+    rng = np.random.default_rng(7)
+    n = 120
+    base = rng.gamma(2.0, 500.0, n)
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2022-01-01", periods=n, freq="W"),
+            "tv_spend": base,
+            "ctv_spend": base * (1 + 1e-7 * rng.normal(size=n)),
+            "search_spend": rng.gamma(2.0, 200.0, n),
+        }
+    )
+    df["revenue"] = 1e4 + 3.0 * df["tv_spend"] + 2.0 * df["search_spend"] + rng.normal(0, 50, n)
+    cols = ["tv_spend", "ctv_spend", "search_spend"]
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", cols, adstock_alpha=0.7, use_saturation=False)
+    assert np.linalg.cond(X.to_numpy()) > 1e7
+
+    out = backtest_mmm(X, y, initial=40, horizon=8, step=8, window="rolling")
+    for f in out.folds.itertuples():
+        tr = slice(f.train_start, f.train_end)
+        beta = np.linalg.lstsq(X.to_numpy()[tr], y[tr], rcond=None)[0]
+        pred = X.to_numpy()[f.train_end : f.test_end] @ beta
+        assert f.rmse == pytest.approx(np.sqrt(np.mean((y[f.train_end : f.test_end] - pred) ** 2)), rel=1e-6)
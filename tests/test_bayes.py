@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.bayes import fit_mmm_bayes
+from analytics.mmm import channel_contributions, fit_mmm_ols, prepare_mmm_design, roi_by_channel
+
+SPEND = ["tv_spend", "search_spend", "social_spend"]
+
+
+def _demo():
+    # same generator as the dashboard's demo mode
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2024-01-01", periods=52, freq="W")
+    tv = rng.normal(6000, 1200, len(dates)).clip(500)
+    search = rng.normal(3500, 700, len(dates)).clip(300)
+    social = rng.normal(1800, 500, len(dates)).clip(200)
+    base = 90000 + 4000 * np.sin(np.linspace(0, 2 * np.pi, len(dates)))
+    revenue = base + 3.2 * tv + 5.1 * search + 2.0 * social + rng.normal(0, 6000, len(dates))
+    df = pd.DataFrame({"date": dates, "revenue": revenue, "tv_spend": tv, "search_spend": search, "social_spend": social})
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", SPEND, use_saturation=False)
+    return df, X, y
+
+
+def test_weak_prior_posterior_mean_is_ols():
+    df, X, y = _demo()
+    res = fit_mmm_bayes(X, y, prior_strength=1e-9, n_draws=20000)
+    ols = fit_mmm_ols(X, y)
+
+    sd = res.draws.std(axis=0)
+    assert np.all(np.abs(res.params - ols.params) < 0.05 * sd)
+    roi = roi_by_channel(df.loc[X.index], channel_contributions(X, res.params), SPEND)
+    assert list(roi.columns) == ["channel", "spend", "contribution", "roi"]
+
+
+def test_positive_posterior_is_nonnegative():
+    # runtime is tracked by the "bayes" sweep in benchmarks/suite.py
+    df, X, y = _demo()
+    res = fit_mmm_bayes(X, y, positive=True, n_draws=4000)
+
+    assert res.draws.shape == (4000, X.shape[1])
+    assert np.all(res.draws[:, 1:] >= 0) and np.all(res.sigma2 > 0)
+
+    summary = res.roi_summary(X, df.loc[X.index], SPEND)
+    assert np.all(summary["roi_lower"] <= summary["roi"]) and np.all(summary["roi"] <= summary["roi_upper"])
+    assert summary["prob_positive"].between(0, 1).all()
+
+
+def test_strong_prior_shrinks_media_toward_zero():
+    _, X, y = _demo()
+    weak = fit_mmm_bayes(X, y, prior_strength=1e-3)
+    strong = fit_mmm_bayes(X, y, prior_strength=1e4)
+    assert np.all(np.abs(strong.params[1:]) < np.abs(weak.params[1:]))
+    assert strong.params[0] == pytest.approx(y.mean(), rel=0.05)
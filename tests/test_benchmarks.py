@@ -0,0 +1,101 @@
+import numpy as np
+
+from benchmarks.suite import (
+    SWEEPS,
+    StageResult,
+    compare,
+    demo_frame,
+    demo_panel,
+    load_baseline,
+    main,
+    mmm_stages,
+    run_suite,
+    save_baseline,
+)
+
+
+def test_demo_frame_matches_dashboard_shape():
+    df = demo_frame()
+    assert list(df.columns) == ["date", "revenue", "ch0_spend", "ch1_spend", "ch2_spend"]
+    assert len(df) == 52
+    assert (df.filter(like="_spend") > 0).all().all()
+
+    daily = demo_frame(3650, 500, "D")
+    assert daily.shape == (3650, 502)
+    assert daily["date"].is_monotonic_increasing
+
+
+def test_demo_panel_is_long_format():
+    df = demo_panel(panels=7, rows=20, channels=4)
+    assert len(df) == 140
+    assert df["geo"].nunique() == 7
+    assert (df.groupby("geo").size() == 20).all()
+
+
+def test_run_suite_covers_every_stage():
+    tiny = {
+        "rows": [("52w", lambda: mmm_stages(demo_frame(52, 3)), True)],
+        "experiments": SWEEPS["experiments"][:1],
+    }
+    results = run_suite(tiny, repeat=1)
+    assert [r.stage for r in results] == [
+        "MMMDataset.from_frame",
+        "prepare_mmm_design",
+        "fit_mmm_ols",
+        "channel_contributions",
+        "roi_by_channel",
+        "ab_test_sample_size_grid",
+        "geo_test_mde_grid",
+    ]
+    for r in results:
+        assert r.seconds > 0 and r.peak_mb >= 0 and r.allocs >= 0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    base = {
+        "s/a/fast": StageResult("s", "a", "fast", 1.0, 100.0, 10),
+        "s/a/noise": StageResult("s", "a", "noise", 0.001, 0.1, 10),
+    }
+    results = [
+        StageResult("s", "a", "fast", 1.2, 100.0, 10),  # +20%: within threshold
+        StageResult("s", "a", "noise", 0.003, 0.3, 10),  # 3x, but under the noise floor
+        StageResult("s", "a", "new", 5.0, 1.0, 10),  # not in the baseline
+    ]
+    report = compare(results, base, threshold=0.5)
+    assert list(report["stage"]) == ["s/a/fast", "s/a/noise"]
+    assert not report["regressed"].any()
+
+    report = compare(results, base, threshold=0.1)
+    assert report.set_index("stage")["regressed"].to_dict() == {"s/a/fast": True, "s/a/noise": False}
+
+    fat = [StageResult("s", "a", "fast", 1.0, 300.0, 10)]
+    assert compare(fat, base)["regressed"].all()
+
+
+def test_baseline_roundtrip_and_cli(tmp_path):
+    path = tmp_path / "baseline.json"
+    results = [StageResult("s", "a", "x", 0.5, 2.0, 3)]
+    save_baseline(results, path)
+    assert load_baseline(path) == {"s/a/x": results[0]}
+
+    assert main(["--quick", "--sweep", "experiments", "--repeat", "1", "--baseline", str(path), "--save"]) == 0
+    assert main(["--quick", "--sweep", "experiments", "--repeat", "1", "--baseline", str(path), "--threshold", "100"]) == 0
+
+    # a baseline far faster than anything achievable fails the run
+    cli = ["--quick", "--sweep", "panels", "--repeat", "1", "--baseline", str(path)]
+    assert main(cli + ["--save"]) == 0
+    stored = load_baseline(path)
+    for r in stored.values():
+        r.seconds = 1e-6
+    save_baseline(list(stored.values()), path)
+    assert main(cli) == 1
+
+
+def test_stored_baseline_covers_the_full_sweep():
+    stored = load_baseline()
+    expected = set()
+    for sweep, cases in SWEEPS.items():
+        for case, build, _ in cases:
+            expected.update(f"{sweep}/{case}/{stage}" for stage, _ in build())
+    assert expected == set(stored)
+    assert all(np.isfinite(r.seconds) and r.seconds > 0 for r in stored.values())
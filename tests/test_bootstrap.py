@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.bootstrap import bootstrap_indices, bootstrap_mmm
+from analytics.mmm import channel_contributions, fit_mmm_ols, fit_mmm_ridge, prepare_mmm_design, roi_by_channel
+
+
+def _design(n=104, seed=11):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2022-01-02", periods=n, freq="W"),
+            "tv_spend": rng.gamma(2.0, 2000.0, n),
+            "search_spend": rng.gamma(2.0, 800.0, n),
+        }
+    )
+    df["revenue"] = 5e4 + 3e3 * np.log1p(df["tv_spend"]) + rng.normal(0, 2e3, n)
+    X, y, meta = prepare_mmm_design(df, "date", "revenue", ["tv_spend", "search_spend"])
+    return df, X, y, meta
+
+
+def test_block_indices_are_runs_of_consecutive_rows():
+    idx = bootstrap_indices(np.random.default_rng(0), 20, 3, method="block", block_size=5)
+    assert idx.shape == (3, 20)
+    assert np.all(np.diff(idx.reshape(3, 4, 5), axis=2) == 1)
+
+
+@pytest.mark.parametrize("method", ["residual", "pairs", "block"])
+def test_bootstrap_intervals_cover_point_estimates(method):
+    df, X, y, meta = _design()
+    out = bootstrap_mmm(X, y, method=method, n_boot=400, batch_size=150, df=df.loc[X.index], spend_cols=meta["spend_cols"])
+
+    assert out.draws.shape == (400, X.shape[1])
+    assert np.all(out.params["lower"] <= out.params["upper"])
+    assert out.params.loc["tv_spend__x", "lower"] < out.params.loc["tv_spend__x", "estimate"]
+    assert out.params.loc["tv_spend__x", "estimate"] < out.params.loc["tv_spend__x", "upper"]
+
+    res = fit_mmm_ols(X, y)
+    ref = roi_by_channel(df.loc[X.index], channel_contributions(X, res.params), meta["spend_cols"])
+    np.testing.assert_allclose(out.roi["roi"].to_numpy(), ref["roi"].to_numpy())
+    assert np.all(out.roi["roi_lower"] <= out.roi["roi_upper"])
+
+
+def test_bootstrap_is_reproducible_across_workers():
+    _, X, y, _ = _design()
+    serial = bootstrap_mmm(X, y, method="pairs", n_boot=300, batch_size=100, seed=42)
+    parallel = bootstrap_mmm(X, y, method="pairs", n_boot=300, batch_size=100, seed=42, n_jobs=2)
+    np.testing.assert_allclose(serial.draws, parallel.draws)
+
+
+@pytest.mark.parametrize("method", ["residual", "pairs"])
+def test_ridge_bootstrap_is_centred_on_the_ridge_fit(method):
+    df, X, y, meta = _design()
+    ridge = fit_mmm_ridge(X, y, lambdas=[50.0])
+
+    out = bootstrap_mmm(
+        X, y, method=method, n_boot=400, df=df.loc[X.index], spend_cols=meta["spend_cols"], ridge_lambda=ridge.lambda_
+    )
+
+    np.testing.assert_allclose(out.params["estimate"].to_numpy(), ridge.params)
+    ref = roi_by_channel(df.loc[X.index], channel_contributions(X, ridge.params), meta["spend_cols"])
+    np.testing.assert_allclose(out.roi["roi"].to_numpy(), ref["roi"].to_numpy())
+    ols = bootstrap_mmm(X, y, method=method, n_boot=400)
+    # shrinkage narrows the media intervals
+    width = lambda b: (b.params["upper"] - b.params["lower"]).loc["tv_spend__x"]  # noqa: E731
+    assert width(out) < width(ols)
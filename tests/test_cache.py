@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from analytics.cache import LRUCache, MMMPipelineCache, frame_fingerprint
+from analytics.mmm import fit_mmm_ols, prepare_mmm_design
+
+
+def _df(n=60, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2023-01-01", periods=n, freq="W"),
+            "revenue": rng.normal(5e4, 2e3, n),
+            "tv_spend": rng.gamma(2.0, 1000.0, n),
+            "search_spend": rng.gamma(2.0, 500.0, n),
+        }
+    )
+
+
+def _stage(stats, name):
+    return stats.set_index("stage").loc[name]
+
+
+def test_pipeline_cache_matches_uncached_and_counts_hits():
+    df = _df()
+    cache = MMMPipelineCache()
+    cols = ["tv_spend", "search_spend"]
+
+    out = cache.run(df, "date", "revenue", cols, adstock_alpha=0.5)
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", cols, adstock_alpha=0.5)
+    np.testing.assert_allclose(out.X.to_numpy(), X.to_numpy())
+    np.testing.assert_allclose(out.fit.params, fit_mmm_ols(X, y).params)
+
+    assert cache.run(df, "date", "revenue", cols, adstock_alpha=0.5) is out
+    assert _stage(cache.stats(), "result")["hits"] == 1
+
+    # one channel changes -> one column re-adstocked
+    cache.run(df, "date", "revenue", cols, adstock_alpha={"tv_spend": 0.7, "search_spend": 0.5})
+    adstock = _stage(cache.stats(), "adstock")
+    assert (adstock["hits"], adstock["misses"]) == (1, 3)
+
+    # saturation only -> no re-adstocking
+    cache.run(df, "date", "revenue", cols, adstock_alpha=0.5, use_saturation=False)
+    assert _stage(cache.stats(), "adstock")["hits"] == 3
+
+
+def test_fingerprint_tracks_content_and_lru_is_bounded():
+    df = _df()
+    changed = df.copy()
+    changed.loc[3, "tv_spend"] += 1.0
+    assert frame_fingerprint(df) == frame_fingerprint(df.copy())
+    assert frame_fingerprint(df) != frame_fingerprint(changed)
+
+    lru = LRUCache(max_bytes=3 * 800)
+    for i in range(5):
+        lru.put(("col", i), np.zeros(100))
+    assert len(lru) == 3 and lru.nbytes <= lru.max_bytes
+    assert lru.get(("col", 0)) is None and lru.get(("col", 4)) is not None
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import pytest
+import requests
+
+import agents.cache as cache_mod
+import agents.client as client_mod
+from agents.cache import ResponseCache
+from agents.client import ChatClient, iter_sse_deltas
+from agents.llm import openrouter_chat
+from tests.stub import StubServer
+
+MSG = [{"role": "user", "content": "hi"}]
+
+
+def test_retries_honor_retry_after():
+    with StubServer() as srv:
+        srv.failures = [429, 503]
+        srv.retry_after = 0
+        c = ChatClient(url=srv.url, max_retries=3)
+        assert c.chat("m", MSG, api_key="k") == "echo: hi"
+        assert len(srv.requests) == 3
+
+        srv.failures = [500] * 3
+        c = ChatClient(url=srv.url, max_retries=2)
+        with pytest.raises(requests.HTTPError):
+            c.chat("m", MSG)
+
+
+def test_read_timeout():
+    with StubServer(latency=0.5) as srv:
+        c = ChatClient(url=srv.url, timeout=(1.0, 0.1), max_retries=0)
+        with pytest.raises(requests.Timeout):
+            c.chat("m", MSG)
+
+
+def test_keep_alive_vs_bare_requests():
+    n = 30
+    with StubServer() as srv:
+        c = ChatClient(url=srv.url)
+        for _ in range(n):
+            c.chat("m", MSG)
+        assert srv.connections == 1
+
+    with StubServer() as srv:
+        for _ in range(n):
+            requests.post(srv.url, json={"model": "m", "messages": MSG}, timeout=5).json()
+        assert srv.connections == n
+
+
+def test_concurrent_calls_overlap():
+    with StubServer() as srv:
+        # no request is answered until all 8 are in flight; run one after
+        # another the barrier breaks and the stub answers 409
+        srv.barrier = threading.Barrier(8, timeout=5)
+        c = ChatClient(url=srv.url, max_retries=0)
+        calls = [{"model": "m", "messages": [{"role": "user", "content": str(i)}]} for i in range(8)]
+
+        out = asyncio.run(c.achat_many(calls, max_concurrency=8))
+
+        assert out == [f"echo: {i}" for i in range(8)]
+        assert srv.max_in_flight == 8
+
+
+def test_openrouter_chat_uses_shared_client(monkeypatch):
+    with StubServer() as srv:
+        monkeypatch.setenv("OPENROUTER_API_KEY", "k")
+        monkeypatch.setattr(client_mod, "_CLIENT", ChatClient(url=srv.url))
+        monkeypatch.setattr(cache_mod, "_CACHE", ResponseCache(None))
+        assert openrouter_chat("m", MSG) == "echo: hi"
+        assert srv.requests[0]["model"] == "m"
+
+
+def test_streaming_delivers_tokens_before_the_stream_ends():
+    with StubServer() as srv:
+        # the stub holds every stream after its first token until released
+        srv.stream_gate = threading.Event()
+        c = ChatClient(url=srv.url, timeout=(1.0, 5.0))
+        prompt = " ".join(f"w{i}" for i in range(10))
+
+        stream = c.chat_stream("m", [{"role": "user", "content": prompt}])
+        first = next(stream)
+        assert not srv.stream_done.is_set()  # a buffering client would still be waiting
+        srv.stream_gate.set()
+        rest = list(stream)
+
+        assert first + "".join(rest) == f"echo: {prompt}"
+        assert srv.stream_done.is_set()
+        assert srv.requests[0]["stream"] is True
+
+        async def collect():
+            return [d async for d in c.achat_stream("m", MSG)]
+
+        assert "".join(asyncio.run(collect())) == "echo: hi"
+
+
+def test_sse_parser_skips_comments_and_empty_deltas():
+    lines = [b": ping", b"", b'data: {"choices": [{"delta": {"role": "assistant"}}]}', b'data: {"choices": [{"delta": {"content": "a"}}]}', b"data: [DONE]", b'data: {"choices": [{"delta": {"content": "b"}}]}']
+    assert list(iter_sse_deltas(lines)) == ["a"]
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from agents.dag import DAG, Node, Replace
+
+
+def _sleep(seconds, text):
+    def fn(inputs):
+        time.sleep(seconds)
+        return text + "".join(inputs.get(k, "") for k in ("a", "b", "c"))
+
+    return fn
+
+
+def test_independent_nodes_run_concurrently():
+    dag = DAG(
+        [
+            Node("a", _sleep(0.2, "A")),
+            Node("b", _sleep(0.3, "B")),
+            Node("c", _sleep(0.2, "C")),
+            Node("d", _sleep(0.1, "D"), inputs=("a", "b", "c")),
+        ]
+    )
+    run = dag.run({})
+
+    assert run.outputs["d"] == "DABC"
+    assert run.sum_s > 0.75
+    assert run.wall_s < 0.6
+    assert run.critical_path == ["b", "d"]
+    assert abs(run.critical_path_s - 0.4) < 0.1
+
+
+def test_timeout_and_error_fallbacks():
+    def boom(inputs):
+        raise RuntimeError("upstream 500")
+
+    dag = DAG(
+        [
+            Node("slow", _sleep(2.0, "late"), timeout=0.1, fallback=lambda i, e: "fallback"),
+            Node("bad", boom, fallback=lambda i, e: f"recovered from {e}"),
+            Node("after", lambda i: i["slow"] + "|" + i["bad"], inputs=("slow", "bad")),
+        ]
+    )
+    t0 = time.perf_counter()
+    run = dag.run({})
+    assert time.perf_counter() - t0 < 1.0
+
+    assert run.outputs["after"] == "fallback|recovered from upstream 500"
+    status = {n.name: (n.status, n.error) for n in run.nodes}
+    assert status["slow"][0] == "fallback" and "NodeTimeout" in status["slow"][1]
+    assert status["after"] == ("ok", "")
+
+    with pytest.raises(RuntimeError):
+        DAG([Node("bad", boom)]).run({})
+
+
+def test_graph_validation():
+    with pytest.raises(ValueError, match="Cycle"):
+        DAG([Node("a", str, inputs=("b",)), Node("b", str, inputs=("a",))])
+    with pytest.raises(ValueError, match="unknown"):
+        DAG([Node("a", str, inputs=("zzz",))])
+
+
+def test_stream_interleaves_concurrent_deltas():
+    def tokens(prefix, delay):
+        def fn(inputs):
+            for i in range(3):
+                time.sleep(delay)
+                yield f"{prefix}{i} "
+
+        return fn
+
+    dag = DAG(
+        [
+            Node("x", tokens("x", 0.05)),
+            Node("y", tokens("y", 0.07)),
+            Node("z", lambda i: i["x"] + i["y"], inputs=("x", "y")),
+        ]
+    )
+    events = list(dag.stream({}))
+
+    names = [n for n, _ in events]
+    assert names.index("y") < max(i for i, n in enumerate(names) if n == "x")  # interleaved
+    assert events[-1] == ("z", "x0 x1 x2 y0 y1 y2 ")
+    assert dag.last_run.outputs["x"] == "x0 x1 x2 "
+
+
+def test_streaming_timeout_replaces_partial_output():
+    release, closed = threading.Event(), threading.Event()
+
+    def stalls(inputs):
+        try:
+            yield "partial "
+            release.wait(timeout=5)
+            yield "late"
+        finally:
+            closed.set()
+
+    dag = DAG([Node("a", stalls, timeout=0.1, fallback=lambda i, e: f"FALLBACK({type(e).__name__})")])
+    events = list(dag.stream({}))
+    release.set()
+
+    assert events == [("a", "partial "), ("a", "FALLBACK(NodeTimeout)")]
+    assert isinstance(events[-1][1], Replace) and not isinstance(events[0][1], Replace)
+    assert closed.wait(timeout=5)  # the stalled generator was closed, not drained
+    assert dag.last_run.outputs["a"] == "FALLBACK(NodeTimeout)"
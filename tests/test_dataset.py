@@ -0,0 +1,147 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import dataset as dataset_mod
+from analytics.cache import MMMPipelineCache
+from analytics.dataset import MMMDataset, detect_columns, spend_totals
+from analytics.mmm import channel_contributions, fit_mmm_ols, prepare_mmm_design, roi_by_channel
+
+
+def _legacy_detect(df):
+    # the original nested-scan implementation
+    date_col = next((c for c in df.columns if "date" in c.lower()), None)
+    target_col = None
+    for key in ["revenue", "sales", "conversions", "orders", "target"]:
+        target_col = next((c for c in df.columns if key in c.lower()), None)
+        if target_col:
+            break
+    spend_cols = [
+        c for c in df.columns if any(k in c.lower() for k in ["spend", "cost", "media"]) and c != target_col
+    ]
+    return date_col, target_col, spend_cols
+
+
+def _messy_df():
+    return pd.DataFrame(
+        {
+            "date": ["2024-01-15", "2024-01-01", "bad", "2024-01-08", "2024-01-22", "2024-01-08"],
+            "revenue": ["130", 100.0, 90.0, None, "n/a", 120.0],
+            "tv_spend": ["10", "5", "1", "7", "x", "12"],
+            "search_spend": [1.0, None, 3.0, 4.0, 5.0, 6.0],
+        },
+        index=list("abcdef"),
+    )
+
+
+def test_detect_columns_matches_nested_scan():
+    names = ["Date", "order_date", "Revenue", "net_sales", "orders", "target_kpi", "tv_spend", "SearchCost",
+             "media_social", "sales_media", "notes", "week"]
+    rng = np.random.default_rng(0)
+    for size in (1, 3, 6, len(names)):
+        for _ in range(50):
+            cols = list(rng.choice(names, size=size, replace=False))
+            df = pd.DataFrame(columns=cols)
+            assert detect_columns(df) == _legacy_detect(df), cols
+
+
+def test_from_frame_parses_filters_and_sorts_once():
+    df = _messy_df()
+    data = MMMDataset.from_frame(df)
+
+    assert data.schema == {"date_col": "date", "target_col": "revenue", "spend_cols": ["tv_spend", "search_spend"]}
+    # "bad" date, missing and non-numeric targets dropped; ties keep their order
+    assert list(data.index) == ["b", "f", "a"]
+    assert list(data.dates.strftime("%Y-%m-%d")) == ["2024-01-01", "2024-01-08", "2024-01-15"]
+    np.testing.assert_array_equal(data.y, [100.0, 120.0, 130.0])
+    np.testing.assert_array_equal(data.spend, [[5.0, 0.0], [12.0, 6.0], [10.0, 1.0]])
+    np.testing.assert_array_equal(data.spend_null, [[False, True], [False, False], [False, False]])
+    assert data.spend.flags.c_contiguous and data.spend.dtype == np.float64
+    np.testing.assert_array_equal(data.spend_totals, [27.0, 7.0])
+
+    np.testing.assert_array_equal(data.spend_for(["search_spend"]), [[0.0], [6.0], [1.0]])
+    assert data.spend_for(["tv_spend", "search_spend"]) is data.spend
+    with pytest.raises(KeyError):
+        data.spend_for(["radio_spend"])
+
+    frame = data.frame()
+    assert list(frame.columns) == ["date", "revenue", "tv_spend", "search_spend"]
+    assert list(frame.index) == ["b", "f", "a"]
+
+
+def test_clean_frames_are_not_reparsed(monkeypatch):
+    n = 30
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=n, freq="W"),
+            "revenue": np.arange(n, dtype=float),
+            "tv_spend": np.ones(n),
+        }
+    )
+    monkeypatch.setattr(dataset_mod.pd, "to_datetime", lambda *a, **k: pytest.fail("dates re-parsed"))
+    monkeypatch.setattr(dataset_mod.pd, "to_numeric", lambda *a, **k: pytest.fail("numbers re-coerced"))
+
+    data = MMMDataset.from_frame(df, "date", "revenue", ["tv_spend"])
+    assert data.index is df.index
+    assert data.n_rows == n and not data.spend_null.any()
+
+
+def test_no_date_column_keeps_row_order():
+    df = pd.DataFrame({"revenue": [3.0, None, 1.0], "tv_spend": [1.0, 2.0, 3.0]})
+    data = MMMDataset.from_frame(df, None, "revenue", ["tv_spend"])
+    assert data.dates is None and data.date_col is None
+    assert list(data.index) == [0, 2]
+
+    with pytest.raises(ValueError):
+        MMMDataset.from_frame(pd.DataFrame({"tv_spend": [1.0]}))
+
+
+def test_pipeline_consumes_the_dataset():
+    rng = np.random.default_rng(1)
+    n = 80
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2023-01-01", periods=n, freq="W").astype(str)[::-1],
+            "revenue": rng.normal(5e4, 2e3, n),
+            "tv_spend": rng.gamma(2.0, 1000.0, n).astype(str),
+            "search_spend": rng.gamma(2.0, 500.0, n),
+        }
+    )
+    cols = ["tv_spend", "search_spend"]
+    data = MMMDataset.from_frame(df, "date", "revenue", cols)
+
+    X, y, meta = prepare_mmm_design(data, None, None, cols)
+    X_raw, y_raw, _ = prepare_mmm_design(df, "date", "revenue", cols)
+    np.testing.assert_array_equal(X.to_numpy(), X_raw.to_numpy())
+    assert X.index.equals(X_raw.index) and meta["date_col"] == "date"
+
+    contrib = channel_contributions(X, fit_mmm_ols(X, y).params)
+    pd.testing.assert_frame_equal(roi_by_channel(data, contrib, cols), roi_by_channel(df.loc[X.index], contrib, cols))
+    np.testing.assert_allclose(spend_totals(df, cols), data.spend_totals)
+
+
+def test_pipeline_cache_parses_each_frame_once(monkeypatch):
+    calls = []
+    original = MMMDataset.from_frame.__func__
+
+    def counting(cls, *args, **kwargs):
+        calls.append(1)
+        return original(cls, *args, **kwargs)
+
+    monkeypatch.setattr(MMMDataset, "from_frame", classmethod(counting))
+
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2023-01-01", periods=40, freq="W"),
+            "revenue": rng.normal(5e4, 2e3, 40),
+            "tv_spend": rng.gamma(2.0, 1000.0, 40),
+        }
+    )
+    cache = MMMPipelineCache()
+    for alpha, sat in itertools.product((0.3, 0.6), (True, False)):
+        out = cache.run(df, "date", "revenue", ["tv_spend"], adstock_alpha=alpha, use_saturation=sat)
+    assert len(calls) == 1
+    assert out.data is cache.dataset(df, "date", "revenue", ["tv_spend"])
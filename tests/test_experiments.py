@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from analytics.experiments import (
+    ab_test_sample_size_grid,
+    ab_test_sample_size_per_group,
+    geo_test_mde,
+    geo_test_mde_grid,
+)
+
+
+def test_sample_size_grid_matches_scalar():
+    baseline = np.array([0.01, 0.05, 0.2])[:, None, None, None]
+    mde = np.linspace(1.0, 50.0, 50)[None, :, None, None]
+    alpha = np.array([0.1, 0.05, 0.01])[None, None, :, None]
+    power = np.array([0.7, 0.8, 0.9])[None, None, None, :]
+
+    grid = ab_test_sample_size_grid(baseline, mde, alpha, power)
+    assert grid.shape == (3, 50, 3, 3)
+
+    for idx in np.ndindex(grid.shape):
+        b, m, a, p = baseline.flat[idx[0]], mde.flat[idx[1]], alpha.flat[idx[2]], power.flat[idx[3]]
+        assert grid[idx] == ab_test_sample_size_per_group(float(b), float(m), float(a), float(p))
+
+    assert ab_test_sample_size_grid(0.05, 10.0, std=0.3) == ab_test_sample_size_per_group(0.05, 10.0, std=0.3)
+
+
+def test_geo_mde_grid_matches_scalar():
+    weeks = np.arange(1, 13)[:, None]
+    geos = np.arange(5, 201, 5)[None, :]
+
+    grid = geo_test_mde_grid(100_000.0, weeks, geos, cv=0.3)
+    assert grid.mde_pct.shape == (12, 40)
+
+    for i, j in np.ndindex(grid.mde_abs.shape):
+        ref = geo_test_mde(100_000.0, int(weeks[i, 0]), int(geos[0, j]), cv=0.3)
+        assert grid.mde_abs[i, j] == ref.mde_abs
+        assert grid.mde_pct[i, j] == ref.mde_pct
+
+
+@pytest.mark.parametrize("baseline, mde_pct", [(0.05, 0.0), (0.0, 10.0)])
+def test_zero_lift_is_rejected(baseline, mde_pct):
+    with pytest.raises(ValueError):
+        ab_test_sample_size_per_group(baseline, mde_pct)
+    with pytest.raises(ValueError):
+        ab_test_sample_size_grid(baseline, np.array([mde_pct, 10.0]))
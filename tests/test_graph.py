@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+import agents.cache as cache_mod
+import agents.client as client_mod
+from agents.cache import ResponseCache
+from agents.client import ChatClient
+from agents.graph import build_graph
+from tests.stub import StubServer
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with StubServer(latency=0.05) as srv:
+        monkeypatch.setenv("OPENROUTER_API_KEY", "k")
+        monkeypatch.setattr(client_mod, "_CLIENT", ChatClient(url=srv.url))
+        monkeypatch.setattr(cache_mod, "_CACHE", ResponseCache(None))
+        yield srv
+
+
+def test_stream_yields_agent_deltas_in_order(stub):
+    stub.token_delay = 0.01
+    stub.stream_gate = threading.Event()  # streams pause after their first token
+    graph = build_graph()
+
+    chunks = []
+    for agent, delta in graph.stream({"question": "What next?"}):
+        if not chunks:
+            # the first delta reached the caller before any stream finished
+            assert not stub.stream_done.is_set()
+            stub.stream_gate.set()
+        chunks.append((agent, delta))
+
+    agents = [a for a, _ in chunks]
+    assert max(i for i, a in enumerate(agents) if a == "analyst_notes") < agents.index("answer")
+    assert max(i for i, a in enumerate(agents) if a == "answer") < agents.index("presentation")
+    notes = "".join(d for a, d in chunks if a == "analyst_notes")
+    answer = "".join(d for a, d in chunks if a == "answer")
+    assert notes.startswith("echo:") and "What next?" in notes
+
+    # streamed answers were cached: invoke returns the same text without new requests
+    n = len(stub.requests)
+    out = graph.invoke({"question": "What next?"})
+    assert out["answer"] == answer and out["analyst_notes"] == notes
+    assert len(stub.requests) == n
+
+
+def test_independent_agents_overlap(stub):
+    # the analyst, MMM and causal calls are only answered once all three are
+    # in flight; run one after another the barrier breaks and they fall back
+    stub.barrier = threading.Barrier(3, timeout=5)
+    graph = build_graph()
+    out = graph.invoke({"question": "Where should budget go?"})
+
+    assert set(out) == {"analyst_notes", "mmm_notes", "causal_notes", "answer", "presentation"}
+    run = graph.last_run
+    assert all(n.status == "ok" for n in run.nodes)
+    assert stub.max_in_flight == 3
+    assert run.critical_path[-2:] == ["answer", "presentation"]
+
+
+def test_astream(stub):
+    async def collect():
+        return [c async for c in build_graph().astream({"question": "Hi"})]
+
+    chunks = asyncio.run(collect())
+    assert {a for a, _ in chunks} == {"analyst_notes", "mmm_notes", "causal_notes", "answer", "presentation"}
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# cold-import budget per module (ms, cumulative from `python -X importtime`);
+# IMPORT_BUDGET_SCALE loosens them on slow machines
+BUDGETS_MS = {
+    "analytics.mmm": 1500,
+    "analytics.cache": 1500,
+    "analytics.experiments": 1000,
+    "analytics.tracing": 100,
+    "analytics.viz": 100,
+    "agents.graph": 750,
+    "agents.llm": 750,
+    "rag.retriever": 750,
+}
+
+# heavy UI / optional stacks that must only load on first use
+LAZY = ("streamlit", "plotly", "scipy", "duckdb", "chromadb", "sentence_transformers", "torch")
+
+
+def _importtime(module: str) -> tuple[float, set[str]]:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, loaded = None, set()
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if not cumulative.isdigit():
+            continue  # header row
+        loaded.add(name)
+        if name == module:
+            total = int(cumulative) / 1000
+    return total, loaded
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_cold_import_budget(module):
+    elapsed_ms, loaded = _importtime(module)
+
+    heavy = sorted(m for m in loaded if m.split(".")[0] in LAZY)
+    assert not heavy, f"{module} eagerly imports {heavy[:5]}"
+
+    budget = BUDGETS_MS[module] * float(os.environ.get("IMPORT_BUDGET_SCALE", 1.0))
+    assert elapsed_ms is not None and elapsed_ms <= budget, f"{module}: {elapsed_ms:.0f} ms > {budget:.0f} ms"
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.incremental import IncrementalMMM
+from analytics.mmm import adstock_matrix, fit_mmm_ols, prepare_mmm_design
+
+SPEND = ["tv_spend", "search_spend", "social_spend"]
+
+
+def _df(n=130, seed=2):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"date": pd.date_range("2021-01-03", periods=n, freq="W")})
+    for c in SPEND:
+        df[c] = rng.gamma(2.0, 1000.0, n)
+    df["revenue"] = 4e4 + 2.0 * df["tv_spend"] + 3.0 * df["search_spend"] + rng.normal(0, 800, n)
+    return df
+
+
+def test_adstock_initial_carry_continues_series():
+    x = np.random.default_rng(0).random((50, 2))
+    full = adstock_matrix(x, [0.3, 0.8])
+    tail = adstock_matrix(x[30:], [0.3, 0.8], initial=full[29])
+    np.testing.assert_allclose(tail, full[30:])
+
+
+def test_incremental_updates_equal_full_refit():
+    df = _df()
+    alphas = {"tv_spend": 0.7, "search_spend": 0.3, "social_spend": 0.5}
+    model = IncrementalMMM("date", "revenue", SPEND, adstock_alpha=alphas)
+
+    for lo, hi in [(0, 90), (90, 91), (91, 118), (118, 130)]:
+        model.update(df.iloc[lo:hi])
+
+        X, y, _ = prepare_mmm_design(df.iloc[:hi], "date", "revenue", SPEND, adstock_alpha=alphas)
+        ref = fit_mmm_ols(X, y)
+        got = model.result()
+        np.testing.assert_allclose(got.params, ref.params, rtol=1e-8)
+        assert got.rsquared == pytest.approx(ref.rsquared, rel=1e-9)
+        assert got.rsquared_adj == pytest.approx(ref.rsquared_adj, rel=1e-9)
+        assert got.nobs == ref.nobs
+
+    with pytest.raises(ValueError):
+        model.update(df.iloc[120:125])
+
+
+def test_forgetting_factor_is_exponentially_weighted_ls():
+    df = _df()
+    lam = 0.97
+    model = IncrementalMMM("date", "revenue", SPEND, forgetting=lam)
+    model.update(df.iloc[:70]).update(df.iloc[70:])
+
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", SPEND)
+    sw = np.sqrt(lam ** np.arange(len(y) - 1, -1, -1))
+    beta, *_ = np.linalg.lstsq(X.to_numpy() * sw[:, None], y * sw, rcond=None)
+    np.testing.assert_allclose(model.params, beta, rtol=1e-8)
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+import agents.cache as cache_mod
+import agents.client as client_mod
+from agents.cache import ResponseCache, cache_key
+from agents.client import ChatClient
+from agents.llm import openrouter_chat
+from tests.stub import StubServer
+
+MSG = [{"role": "user", "content": "hi"}]
+
+
+def test_key_is_content_addressed():
+    assert cache_key("m", MSG, 0.3) == cache_key("m", [{"content": "hi", "role": "user"}], 0.3)
+    assert cache_key("m", MSG, 0.3) != cache_key("m", MSG, 0.0)
+    assert cache_key("m", MSG, 0.3) != cache_key("other", MSG, 0.3)
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    path = tmp_path / "llm.sqlite"
+    c = ResponseCache(path, ttl=0.5)
+    assert c.get_or_call("m", MSG, None, lambda: "first") == "first"
+
+    c2 = ResponseCache(path, ttl=0.5)
+    assert c2.get_or_call("m", MSG, None, lambda: "second") == "first"
+    assert c2.stats()["disk_hits"] == 1
+    assert c2.get_or_call("m", MSG, None, lambda: "third") == "first"
+    assert c2.stats()["memory_hits"] == 1
+
+    time.sleep(0.6)
+    assert c2.get_or_call("m", MSG, None, lambda: "fresh") == "fresh"
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    c = ResponseCache(tmp_path / "llm.sqlite", max_items=1, max_disk_bytes=250)
+    for k in ("a", "b"):
+        c.put(k, "x" * 100)
+    assert c.get("a") is not None  # touch a, so b is now the oldest
+    c.put("c", "x" * 100)
+
+    fresh = ResponseCache(tmp_path / "llm.sqlite")
+    assert fresh.get("b") is None
+    assert fresh.get("a") is not None and fresh.get("c") is not None
+    assert c.stats()["evictions"] == 1
+
+
+def test_single_flight_and_errors_not_cached():
+    c = ResponseCache(None)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(c.get_or_call("m", MSG, 0.3, slow))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert out == ["answer"] * 8 and len(calls) == 1
+    stats = c.stats()
+    assert stats["deduplicated"] == 7 and stats["latency_saved_s"] == 0.0
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        c.get_or_call("m", MSG, 0.0, boom)
+    assert c.get_or_call("m", MSG, 0.0, lambda: "ok") == "ok"
+
+
+def test_openrouter_chat_served_from_cache(monkeypatch):
+    with StubServer(latency=0.05) as srv:
+        monkeypatch.setenv("OPENROUTER_API_KEY", "k")
+        monkeypatch.setattr(client_mod, "_CLIENT", ChatClient(url=srv.url))
+        monkeypatch.setattr(cache_mod, "_CACHE", ResponseCache(None))
+
+        assert openrouter_chat("m", MSG) == openrouter_chat("m", MSG) == "echo: hi"
+        assert len(srv.requests) == 1
+        assert cache_mod._CACHE.stats()["latency_saved_s"] >= 0.05
+
+
+def test_streamed_prompts_share_one_upstream_call():
+    with StubServer() as srv:
+        srv.stream_gate = threading.Event()
+        client = ChatClient(url=srv.url, timeout=(1.0, 5.0))
+        c = ResponseCache(None)
+
+        def stream():
+            return client.chat_stream("m", MSG)
+
+        def upstream_again():
+            raise AssertionError("second upstream call")
+
+        owner = c.stream_or_call("m", MSG, 0.3, stream)
+        first = next(owner)  # upstream stream open, held after its first token
+
+        out = []
+        followers = [
+            threading.Thread(target=lambda: out.append("".join(c.stream_or_call("m", MSG, 0.3, stream)))),
+            threading.Thread(target=lambda: out.append(c.get_or_call("m", MSG, 0.3, upstream_again))),
+        ]
+        for t in followers:
+            t.start()
+        deadline = time.monotonic() + 5
+        while c.stats()["deduplicated"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        srv.stream_gate.set()
+        assert first + "".join(owner) == "echo: hi"
+        for t in followers:
+            t.join(timeout=5)
+
+    assert out == ["echo: hi"] * 2 and len(srv.requests) == 1
+    assert c.stats()["deduplicated"] == 2
+    assert "".join(c.stream_or_call("m", MSG, 0.3, stream)) == "echo: hi"  # now a cache hit
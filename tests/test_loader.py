@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.mmm import fit_mmm_ols, prepare_mmm_design
+
+duckdb = pytest.importorskip("duckdb")
+
+from analytics.loader import load_mmm_dataset, load_mmm_table  # noqa: E402
+
+
+def _write_csv(path):
+    df = pd.DataFrame(
+        {
+            "date": ["2024-01-15", "2024-01-01", "bad", "2024-01-08", "2024-01-22", "2024-01-29"],
+            "revenue": [130.0, 100.0, 90.0, None, 150.0, 160.0],
+            "tv_spend": ["10", "5", "1", "7", "x", "12"],
+            "search_spend": [1.0, 2.0, 3.0, 4.0, 5.0, None],
+            "notes": ["a", "b", "c", "d", "e", "f"],
+        }
+    )
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_load_mmm_table_projects_filters_and_sorts(tmp_path):
+    path = tmp_path / "mmm.csv"
+    raw = _write_csv(path)
+
+    df, report = load_mmm_table(path)
+
+    assert list(df.columns) == ["date", "revenue", "tv_spend", "search_spend"]
+    assert df["date"].is_monotonic_increasing and len(df) == 4
+    np.testing.assert_allclose(df["tv_spend"], [5.0, 10.0, 0.0, 12.0])
+    assert report.rows == 4 and report.columns == list(df.columns)
+    assert report.rss_delta_mb is None or report.rss_delta_mb >= 0
+
+    # same design as the pandas path on the raw frame
+    spend_cols = ["tv_spend", "search_spend"]
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", spend_cols)
+    raw = raw[pd.to_datetime(raw["date"], errors="coerce").notna()]
+    X_ref, y_ref, _ = prepare_mmm_design(raw, "date", "revenue", spend_cols)
+    np.testing.assert_allclose(X.to_numpy(), X_ref.to_numpy())
+    np.testing.assert_allclose(fit_mmm_ols(X, y).params, fit_mmm_ols(X_ref, y_ref).params)
+
+
+def test_load_mmm_table_reads_parquet_and_file_objects(tmp_path):
+    path = tmp_path / "mmm.csv"
+    _write_csv(path)
+    duckdb.sql(f"COPY (SELECT * FROM read_csv_auto('{path}')) TO '{tmp_path / 'mmm.parquet'}' (FORMAT parquet)")
+
+    from_parquet, _ = load_mmm_table(tmp_path / "mmm.parquet")
+    with open(path, "rb") as f:
+        from_upload, _ = load_mmm_table(f)
+
+    assert len(from_parquet) == len(from_upload) == 4
+
+
+def test_load_mmm_table_parses_non_iso_dates_like_pandas(tmp_path):
+    path = tmp_path / "mmm.csv"
+    raw = pd.DataFrame(
+        {
+            "date": ["01/15/2024", "01/01/2024", "bad", "01/08/2024"],
+            "revenue": [130.0, 100.0, 90.0, 120.0],
+            "tv_spend": [10.0, 5.0, 1.0, 7.0],
+        }
+    )
+    raw.to_csv(path, index=False)
+
+    df, _ = load_mmm_table(path)
+
+    expected = pd.to_datetime(raw["date"], errors="coerce").dropna().sort_values()
+    assert list(df["date"]) == list(expected)
+    np.testing.assert_allclose(df["revenue"], [100.0, 120.0, 130.0])
+
+
+def test_load_mmm_dataset_matches_the_loaded_table(tmp_path):
+    path = tmp_path / "mmm.csv"
+    _write_csv(path)
+
+    df, _ = load_mmm_table(path)
+    data, report = load_mmm_dataset(path)
+
+    assert data.schema == {"date_col": "date", "target_col": "revenue", "spend_cols": ["tv_spend", "search_spend"]}
+    assert data.n_rows == report.rows == 4
+    np.testing.assert_array_equal(data.y, df["revenue"].to_numpy())
+    np.testing.assert_array_equal(data.spend, df[["tv_spend", "search_spend"]].to_numpy())
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import mmm
+from analytics.mmm import (
+    adstock_matrix,
+    build_design_matrix,
+    adstock_weights,
+    channel_contributions,
+    contribution_totals,
+    fit_mmm_ols,
+    fit_mmm_ridge,
+    prepare_mmm_design,
+    roi_by_channel,
+    search_adstock_params,
+)
+
+
+def _loop_adstock(x, alpha):
+    out = np.zeros_like(x, dtype=float)
+    carry = 0.0
+    for i, v in enumerate(x):
+        carry = float(v) + alpha * carry
+        out[i] = carry
+    return out
+
+
+def _demo_df(n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2022-01-02", periods=n, freq="W"),
+            "revenue": rng.normal(1e5, 5e3, n),
+            "tv_spend": rng.gamma(2.0, 3000.0, n),
+            "search_spend": rng.gamma(2.0, 1500.0, n),
+            "social_spend": rng.gamma(2.0, 800.0, n),
+        }
+    )
+
+
+def test_geometric_adstock_matches_loop():
+    rng = np.random.default_rng(1)
+    x = rng.gamma(2.0, 100.0, size=(1000, 5))
+    alphas = np.array([0.0, 0.3, 0.5, 0.9, 0.99])
+
+    out = adstock_matrix(x, alphas)
+    expected = np.column_stack([_loop_adstock(x[:, j], a) for j, a in enumerate(alphas)])
+
+    np.testing.assert_allclose(out, expected, rtol=1e-10)
+
+
+def test_truncated_geometric_is_lag_convolution():
+    x = np.zeros(10)
+    x[2] = 1.0
+    out = adstock_matrix(x, 0.5, max_lag=3)
+    np.testing.assert_allclose(out, [0, 0, 1, 0.5, 0.25, 0, 0, 0, 0, 0])
+
+
+def test_delayed_and_weibull_kernels_peak_at_one():
+    delayed = adstock_weights(1, 8, kind="delayed", alpha=0.5, theta=2)
+    weibull = adstock_weights(1, 8, kind="weibull", shape=2.0, scale=3.0)
+    assert delayed.argmax() == 2 and delayed.max() == 1.0
+    assert weibull[0, 0] == 1.0 and np.all(np.diff(weibull[0]) <= 0)
+    with pytest.raises(ValueError):
+        adstock_matrix(np.ones((5, 2)), 0.5, kind="weibull")
+
+
+def test_prepare_mmm_design_matches_per_column_loop():
+    df = _demo_df()
+    spend_cols = ["tv_spend", "search_spend", "social_spend"]
+    X, y, meta = prepare_mmm_design(df, "date", "revenue", spend_cols, adstock_alpha=0.6)
+
+    for c in spend_cols:
+        expected = np.log1p(np.maximum(_loop_adstock(df[c].to_numpy(), 0.6), 0))
+        np.testing.assert_allclose(X[f"{c}__x"].to_numpy(), expected, rtol=1e-10)
+    assert list(X.columns) == ["const"] + [f"{c}__x" for c in spend_cols]
+    assert meta["adstock_alpha"] == {c: 0.6 for c in spend_cols}
+
+
+def test_prepare_mmm_design_per_channel_alpha():
+    df = _demo_df()
+    alphas = {"tv_spend": 0.8, "search_spend": 0.1, "social_spend": 0.4}
+    X, _, _ = prepare_mmm_design(df, "date", "revenue", list(alphas), adstock_alpha=alphas, use_saturation=False)
+    for c, a in alphas.items():
+        np.testing.assert_allclose(X[f"{c}__x"].to_numpy(), _loop_adstock(df[c].to_numpy(), a), rtol=1e-10)
+
+
+def test_search_adstock_params_matches_individual_fits():
+    df = _demo_df(n=80)
+    spend_cols = ["tv_spend", "search_spend"]
+    table = search_adstock_params(df, "date", "revenue", spend_cols, alphas=(0.0, 0.5, 0.9), batch_size=4)
+
+    assert len(table) == 2 * 3**2
+    assert table["r2_adj"].is_monotonic_decreasing
+
+    best = table.iloc[0]
+    alphas = {c: best[f"{c}__alpha"] for c in spend_cols}
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", spend_cols, alphas, bool(best["use_saturation"]))
+    res = fit_mmm_ols(X, y)
+    assert res.rsquared_adj == pytest.approx(best["r2_adj"], rel=1e-9)
+
+
+def test_search_adstock_params_halving_and_holdout():
+    df = _demo_df(n=120)
+    table = search_adstock_params(
+        df, "date", "revenue", ["tv_spend", "search_spend", "social_spend"],
+        method="halving", n_candidates=27, metric="holdout_rmse", holdout=0.25,
+    )
+    assert 1 <= len(table) < 27
+    assert table["holdout_rmse"].is_monotonic_increasing
+
+
+def test_float32_design_and_contribution_totals(monkeypatch):
+    df = _demo_df()
+    spend_cols = ["tv_spend", "search_spend", "social_spend"]
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", spend_cols)
+
+    buffers = []
+
+    def recording(*args, **kwargs):
+        buffers.append(build_design_matrix(*args, **kwargs))
+        return buffers[-1]
+
+    monkeypatch.setattr(mmm, "build_design_matrix", recording)
+    X32, _, _ = prepare_mmm_design(df, "date", "revenue", spend_cols, dtype=np.float32)
+
+    # X32 is a view over the float32 buffer build_design_matrix returned
+    assert buffers[0].dtype == np.float32 and np.shares_memory(X32.to_numpy(), buffers[0])
+    res, res32 = fit_mmm_ols(X, y), fit_mmm_ols(X32, y)
+    assert res32.rsquared == pytest.approx(res.rsquared, abs=1e-4)
+
+    full = channel_contributions(X, res.params)
+    totals = contribution_totals(X, res.params)
+    np.testing.assert_allclose(totals.to_numpy(), full.sum().to_numpy(), rtol=1e-10)
+    pd.testing.assert_frame_equal(
+        roi_by_channel(df, totals, spend_cols), roi_by_channel(df, full, spend_cols), rtol=1e-10
+    )
+
+
+def _collinear_design(n=120, seed=8):
+    rng = np.random.default_rng(seed)
+    base = rng.gamma(2.0, 1000.0, n)
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2022-01-02", periods=n, freq="W"),
+            "tv_spend": base * rng.normal(1.0, 0.02, n),
+            "ctv_spend": base * rng.normal(1.0, 0.02, n),
+            "search_spend": rng.gamma(2.0, 500.0, n),
+        }
+    )
+    df["revenue"] = 2e4 + 1.5 * df["tv_spend"] + 1.5 * df["ctv_spend"] + 2.0 * df["search_spend"] + rng.normal(0, 2e3, n)
+    return prepare_mmm_design(df, "date", "revenue", ["tv_spend", "ctv_spend", "search_spend"], use_saturation=False)
+
+
+def test_ridge_path_limits_and_closed_form():
+    X, y, _ = _collinear_design()
+    ols = fit_mmm_ols(X, y)
+
+    tiny = fit_mmm_ridge(X, y, lambdas=[1e-9])
+    np.testing.assert_allclose(tiny.params, ols.params, rtol=1e-5)
+
+    res = fit_mmm_ridge(X, y)
+    assert res.path.shape == (50, X.shape[1]) and res.lambda_ in res.lambdas
+    assert np.argmin(res.gcv) == list(res.lambdas).index(res.lambda_)
+
+    # the unconstrained optimum is positive here, so the nonneg coordinate
+    # descent solver must land on the closed-form ridge solution
+    ridge = fit_mmm_ridge(X, y, lambdas=[res.lambda_])
+    cd = fit_mmm_ridge(X, y, lambdas=[res.lambda_], nonneg=True)
+    assert np.all(ridge.params[1:] > 0)
+    np.testing.assert_allclose(cd.params, ridge.params, rtol=1e-5)
+
+    contrib = channel_contributions(X, res.params)
+    assert contrib.shape == X.shape
+
+
+def test_ridge_nonneg_and_elastic_net():
+    X, y, _ = _collinear_design()
+    X = X.copy()
+    X["noise_spend__x"] = np.random.default_rng(0).normal(0, 1, len(X))
+
+    nn = fit_mmm_ridge(X, y, nonneg=True)
+    assert np.all(nn.path[:, 1:] >= 0)
+
+    enet = fit_mmm_ridge(X, y, l1_ratio=0.9)
+    # heavier penalties zero out more coefficients
+    nonzero = (np.abs(enet.path[:, 1:]) > 0).sum(axis=1)
+    assert nonzero[0] <= nonzero[-1]
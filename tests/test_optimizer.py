@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from analytics.mmm import OLSResult
+from analytics.optimizer import ResponseModel, optimize_budget, response_curves
+
+
+def _model(n, seed=0):
+    rng = np.random.default_rng(seed)
+    channels = [f"ch{j}_spend" for j in range(n)]
+    meta = {
+        "spend_cols": channels,
+        "adstock_alpha": dict(zip(channels, rng.uniform(0.0, 0.8, n))),
+        "use_saturation": True,
+    }
+    res = OLSResult(params=np.concatenate([[1e5], rng.uniform(500, 5000, n)]), rsquared=0.9, rsquared_adj=0.9, nobs=100)
+    return ResponseModel.from_fit(res, meta)
+
+
+def test_response_curves_and_marginal_roi():
+    model = _model(3)
+    curves = response_curves(model, max_spend=10_000, n_points=101)
+    assert len(curves) == 3 * 101
+
+    # the analytic marginal matches a finite difference of the response
+    s = np.array([1000.0, 2500.0, 4000.0])
+    fd = (model.response(s + 1e-3) - model.response(s - 1e-3)) / 2e-3
+    np.testing.assert_allclose(model.marginal(s), fd, rtol=1e-6)
+
+
+def test_optimal_allocation_equalizes_marginal_roi():
+    model = _model(100)
+    current = np.full(100, 1000.0)
+
+    plan = optimize_budget(model, total_budget=100_000, current=current, lower=100.0, upper=5000.0)
+    # the analytic gradient keeps SLSQP well inside its iteration budget
+    assert plan.iterations < 100
+
+    alloc = plan.allocation
+    assert plan.success
+    assert alloc["optimal"].sum() == pytest.approx(100_000, rel=1e-8)
+    assert alloc["optimal"].between(100.0 - 1e-6, 5000.0 + 1e-6).all()
+    assert plan.response_optimal >= plan.response_current
+
+    # KKT: channels strictly inside the bounds share one marginal ROI
+    inner = alloc[(alloc["optimal"] > 101) & (alloc["optimal"] < 4999)]
+    mroi = inner["marginal_roi_optimal"]
+    assert mroi.max() / mroi.min() < 1.01
+
+
+def test_infeasible_bounds_raise():
+    with pytest.raises(ValueError):
+        optimize_budget(_model(3), total_budget=100.0, lower=50.0)
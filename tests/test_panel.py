@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.mmm import channel_contributions, fit_mmm_ols, prepare_mmm_design, roi_by_channel
+from analytics.panel import fit_panel_mmm, prepare_panel_design
+
+
+def _long_df(seed=5):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for geo, n in [("east", 60), ("north", 60), ("west", 45)]:
+        tv = rng.gamma(2.0, 1000.0, n)
+        search = rng.gamma(2.0, 400.0, n)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "geo": geo,
+                    "date": pd.date_range("2023-01-01", periods=n, freq="W"),
+                    "revenue": 2e4 + 2.0 * tv + 4.0 * search + rng.normal(0, 500, n),
+                    "tv_spend": tv,
+                    "search_spend": search,
+                }
+            )
+        )
+    # shuffled long format
+    return pd.concat(frames).sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_panel_fit_matches_per_panel_loop(n_jobs):
+    df = _long_df()
+    spend_cols = ["tv_spend", "search_spend"]
+    alphas = {"tv_spend": 0.6, "search_spend": 0.2}
+
+    out = fit_panel_mmm(df, "geo", "date", "revenue", spend_cols, adstock_alpha=alphas, n_jobs=n_jobs)
+
+    for geo, g in df.groupby("geo"):
+        X, y, _ = prepare_mmm_design(g, "date", "revenue", spend_cols, adstock_alpha=alphas)
+        res = fit_mmm_ols(X, y)
+        roi = roi_by_channel(g.loc[X.index], channel_contributions(X, res.params), spend_cols)
+
+        np.testing.assert_allclose(out.params.loc[geo].to_numpy(), res.params, rtol=1e-8)
+        fit = out.fit.set_index("geo").loc[geo]
+        assert fit["rsquared"] == pytest.approx(res.rsquared) and fit["nobs"] == res.nobs
+
+        got = out.roi[out.roi["geo"] == geo].set_index("channel")
+        np.testing.assert_allclose(got.loc[roi["channel"], "roi"], roi["roi"], rtol=1e-8)
+
+
+def test_panel_design_parses_like_the_single_market_path():
+    df = _long_df(seed=7).astype({"date": str, "revenue": object, "tv_spend": str})
+    df.loc[[3, 10], "revenue"] = ["n/a", None]
+    df.loc[17, "date"] = "bad"
+    df.loc[25, "tv_spend"] = "x"
+    df.loc[40, "geo"] = None
+    df.index = df.index[::-1]  # labels unrelated to positions
+    spend_cols = ["tv_spend", "search_spend"]
+
+    X, y, codes, meta = prepare_panel_design(df, "geo", "date", "revenue", spend_cols)
+    assert not np.isnan(y).any() and meta["panels"] == ["east", "north", "west"]
+
+    for k, geo in enumerate(meta["panels"]):
+        Xg, yg, _ = prepare_mmm_design(df[df["geo"] == geo], "date", "revenue", spend_cols)
+        rows = codes == k
+        assert X.index[rows].equals(Xg.index)
+        np.testing.assert_allclose(X.to_numpy()[rows], Xg.to_numpy(), rtol=1e-12)
+        np.testing.assert_array_equal(y[rows], yg)
@@ -0,0 +1,143 @@
+import threading
+
+import numpy as np
+import pytest
+
+import rag.retriever as retriever_mod
+from rag.retriever import HashingEmbedder, VectorIndex, chunk_text, retrieve
+
+DOCS = {
+    "adstock.md": "Adstock models the carryover of advertising. Geometric adstock decays spend by alpha each week.",
+    "geo.md": "Geo experiments randomize regions into treatment and control to measure incremental lift.",
+    "budget.md": "Budget optimization reallocates spend until marginal ROI is equal across channels.",
+}
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=256)
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
+
+
+def test_chunking_covers_text_with_overlap():
+    text = " ".join(f"word{i}" for i in range(600))
+    chunks = chunk_text(text, chunk_size=500, overlap=50)
+    assert all(len(c) <= 500 for c in chunks)
+    assert chunks[0].split()[0] == "word0" and chunks[-1].split()[-1] == "word599"
+    assert chunks[1].split()[0] in chunks[0]  # overlap
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    a = HashingEmbedder(128).embed(["geo lift test", ""])
+    b = HashingEmbedder(128).embed(["geo lift test", ""])
+    np.testing.assert_array_equal(a, b)
+    assert a.dtype == np.float32
+    assert np.isclose(np.linalg.norm(a[0]), 1.0) and not a[1].any()
+
+
+def test_incremental_ingest_and_persisted_search(tmp_path):
+    emb = CountingEmbedder()
+    index = VectorIndex(tmp_path, embedder=emb)
+    stats = index.ingest_texts(DOCS)
+    assert stats["added"] == 3 and emb.embedded == 3
+
+    hits = index.search("how much carryover does advertising have", k=2)
+    assert hits[0]["doc_id"] == "adstock.md" and hits[0]["score"] > hits[1]["score"]
+
+    # unchanged docs are not re-embedded; a changed doc replaces its rows
+    emb.embedded = 0
+    again = VectorIndex(tmp_path, embedder=emb)
+    assert again.ingest_texts(DOCS)["unchanged"] == 3 and emb.embedded == 0
+    again.ingest_texts({**DOCS, "geo.md": "Synthetic control builds a weighted donor pool of regions."})
+    assert emb.embedded == 1
+
+    reopened = VectorIndex(tmp_path, embedder=HashingEmbedder(256))
+    assert isinstance(reopened.vectors(), np.memmap)
+    top = reopened.search("weighted donor pool", k=3)
+    assert top[0]["doc_id"] == "geo.md" and "Synthetic control" in top[0]["text"]
+    assert sum(h["doc_id"] == "geo.md" for h in top) == 1
+
+    reopened.remove(["budget.md", "adstock.md"])  # dead rows > 30% -> compaction
+    assert reopened.rows == 1 and [h["doc_id"] for h in reopened.search("regions", k=5)] == ["geo.md"]
+
+
+def test_ivf_recall(tmp_path):
+    # 40 topics with their own vocabularies plus shared filler words
+    rng = np.random.default_rng(0)
+    topics = [[f"t{t}w{i}" for i in range(30)] for t in range(40)]
+    shared = [f"common{i}" for i in range(200)]
+    docs = {
+        f"d{i}": " ".join(list(rng.choice(topics[i % 40], 25)) + list(rng.choice(shared, 15)))
+        for i in range(3000)
+    }
+
+    index = VectorIndex(tmp_path, embedder=HashingEmbedder(256))
+    index.ingest_texts(docs)
+    index.build_ivf(n_lists=32)
+
+    recall = []
+    for i in range(20):
+        q = docs[f"d{i}"]
+        exact = {h["row"] for h in index.search(q, k=10)}
+        approx = {h["row"] for h in index.search(q, k=10, nprobe=8)}
+        recall.append(len(exact & approx) / 10)
+    assert np.mean(recall) > 0.9
+    assert index.search(docs["d5"], k=1, nprobe=8)[0]["doc_id"] == "d5"
+
+
+def test_retrieve_uses_shared_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("RAG_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(retriever_mod, "_INDEX", None)
+    assert retrieve("anything") == []
+
+    retriever_mod.get_index().ingest_texts(DOCS)
+    assert retrieve("marginal ROI across channels", k=1)[0]["doc_id"] == "budget.md"
+
+
+def test_interrupted_append_is_rolled_back_on_open(tmp_path, monkeypatch):
+    index = VectorIndex(tmp_path, embedder=HashingEmbedder(256))
+    index.ingest_texts(DOCS)
+    index.build_ivf(n_lists=2)
+
+    # crash after rows, metadata and IVF lists are written, before the manifest
+    def crash():
+        raise OSError("killed")
+
+    monkeypatch.setattr(index, "_save", crash)
+    with pytest.raises(OSError):
+        index.ingest_texts({"new.md": "Marketing mix models attribute revenue to channels."})
+    with (tmp_path / "chunks.jsonl").open("a", encoding="utf-8") as f:
+        f.write('{"doc_id": "torn')  # and a half-written line
+
+    reopened = VectorIndex(tmp_path, embedder=HashingEmbedder(256))
+    assert reopened.rows == len(reopened.meta) == 3 and "new.md" not in reopened.manifest["docs"]
+    assert (tmp_path / "chunks.jsonl").read_text(encoding="utf-8").count("\n") == 3
+    assert (tmp_path / "vectors.f32").stat().st_size == 3 * 256 * 4
+    assert len(reopened._load_ivf()[1]) == 3
+
+    reopened.ingest_texts({"new.md": "Marketing mix models attribute revenue to channels."})
+    again = VectorIndex(tmp_path, embedder=HashingEmbedder(256))
+    hit = again.search("attribute revenue to channels", k=1, nprobe=2)[0]
+    assert hit["doc_id"] == "new.md" and hit["row"] == 3
+
+
+def test_shared_index_is_created_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("RAG_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(retriever_mod, "_INDEX", None)
+    barrier = threading.Barrier(8, timeout=5)
+    seen = []
+
+    def open_index():
+        barrier.wait()
+        seen.append(retriever_mod.get_index())
+
+    threads = [threading.Thread(target=open_index) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(seen) == 8 and all(i is seen[0] for i in seen)
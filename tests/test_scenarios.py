@@ -0,0 +1,87 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from analytics.bayes import fit_mmm_bayes
+from analytics.mmm import adstock_matrix, fit_mmm_ols, fit_mmm_ridge, prepare_mmm_design
+from analytics.scenarios import simulate_scenarios
+
+
+def _fitted(seed=0, rows=156):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2021-01-03", periods=rows, freq="W"),
+            "tv_spend": rng.gamma(2.0, 5000.0, rows),
+            "search_spend": rng.gamma(2.0, 2000.0, rows),
+        }
+    )
+    df["revenue"] = (
+        50_000
+        + 4000 * np.log1p(adstock_matrix(df["tv_spend"].to_numpy(), 0.6))
+        + 2500 * np.log1p(adstock_matrix(df["search_spend"].to_numpy(), 0.3))
+        + rng.normal(0, 500, rows)
+    )
+    spend_cols = ["tv_spend", "search_spend"]
+    X, y, meta = prepare_mmm_design(df, "date", "revenue", spend_cols, adstock_alpha={"tv_spend": 0.6, "search_spend": 0.3})
+    return fit_mmm_ols(X, y), X, y, meta, df.loc[X.index, spend_cols].to_numpy()
+
+
+def test_deterministic_paths_match_forecast():
+    res, X, y, meta, hist = _fitted()
+    plan = np.tile([12_000.0, 3000.0], (8, 1))
+
+    out = simulate_scenarios(res, X, y, meta, hist, {"base": plan}, n_paths=20_000, spend_cv=0.0)
+
+    # expected revenue: adstock continued from the last observed state
+    alphas = np.array([0.6, 0.3])
+    ad = adstock_matrix(np.vstack([hist, plan]), alphas)[len(hist):]
+    expected = res.params[0] + np.log1p(ad) @ res.params[1:]
+
+    bands = out.bands
+    np.testing.assert_allclose(bands["mean"], expected, rtol=2e-3)
+    assert (bands["q05"] <= bands["q50"]).all() and (bands["q50"] <= bands["q95"]).all()
+
+
+def test_scenarios_ranked_and_reproducible():
+    res, X, y, meta, hist = _fitted(1)
+    plans = {"low": np.array([2000.0, 500.0]), "high": np.array([20_000.0, 5000.0])}
+
+    tracemalloc.start()
+    try:
+        a = simulate_scenarios(res, X, y, meta, hist, plans, weeks=13, n_paths=100_000, chunk_size=25_000, seed=3)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # 2 x 100k x 13 float32 paths are ~10 MB; the adstock state stays per chunk
+    assert peak < 64 * 1024**2
+
+    totals = a.totals.set_index("scenario")
+    assert totals.loc["high", "revenue_mean"] > totals.loc["low", "revenue_mean"]
+    assert totals["prob_best"].sum() == 1.0
+    assert totals.loc["high", "prob_best"] > 0.9
+
+    b = simulate_scenarios(res, X, y, meta, hist, plans, weeks=13, n_paths=100_000, chunk_size=25_000, seed=3, n_jobs=2)
+    pd.testing.assert_frame_equal(a.totals, b.totals)
+
+
+def test_paths_use_the_selected_estimators_uncertainty():
+    _, X, y, meta, hist = _fitted(2)
+    plans = {"base": np.array([12_000.0, 3000.0])}
+
+    ols = simulate_scenarios(fit_mmm_ols(X, y), X, y, meta, hist, plans, weeks=8, n_paths=20_000)
+    ridge_fit = fit_mmm_ridge(X, y)
+    ridge = simulate_scenarios(ridge_fit, X, y, meta, hist, plans, weeks=8, n_paths=20_000)
+    bayes_fit = fit_mmm_bayes(X, y, n_draws=2000)
+    bayes = simulate_scenarios(bayes_fit, X, y, meta, hist, plans, weeks=8, n_paths=20_000)
+
+    assert (ols.uncertainty, bayes.uncertainty) == ("ols", "bayes posterior")
+    assert ridge.uncertainty.startswith("ridge")
+
+    # each simulation is centred on its own estimator's forecast
+    alphas = np.array([0.6, 0.3])
+    ad = np.log1p(adstock_matrix(np.vstack([hist, np.tile(plans["base"], (8, 1))]), alphas)[len(hist):])
+    np.testing.assert_allclose(ridge.bands["mean"], ridge_fit.params[0] + ad @ ridge_fit.params[1:], rtol=2e-3)
+    bayes_mean = (bayes_fit.draws[:, :1] + bayes_fit.draws[:, 1:] @ ad.T).mean(axis=0)
+    np.testing.assert_allclose(bayes.bands["mean"], bayes_mean, rtol=2e-3)
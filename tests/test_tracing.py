@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.dag import DAG, Node
+from analytics import tracing
+from analytics.mmm import fit_mmm_ols, prepare_mmm_design, roi_by_channel
+from analytics.tracing import Tracer, sizes, span, traced
+
+
+@pytest.fixture
+def tracer():
+    tracing.TRACER.clear()
+    tracing.enable()
+    yield tracing.TRACER
+    tracing.disable()
+    tracing.TRACER.clear()
+
+
+def _frame(rows=60):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2023-01-01", periods=rows, freq="W"),
+            "tv_spend": rng.gamma(2.0, 1000.0, rows),
+            "search_spend": rng.gamma(2.0, 500.0, rows),
+        }
+    )
+    df["revenue"] = 1e4 + 2 * df["tv_spend"] + 3 * df["search_spend"] + rng.normal(0, 100, rows)
+    return df
+
+
+def test_disabled_tracing_records_nothing():
+    tracing.disable()
+    tracing.TRACER.clear()
+
+    @traced()
+    def double(x):
+        return 2 * x
+
+    with span("outer", rows=3) as sp:
+        assert not sp
+        sp.set(ignored=True)
+        assert double(4) == 8
+    assert tracing.TRACER.spans() == []
+
+
+def test_disabled_overhead_is_a_flag_check():
+    tracing.disable()
+
+    def raw(x):
+        return x
+
+    wrapped = traced()(raw)
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        raw(i)
+    base = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(n):
+        wrapped(i)
+    per_call = (time.perf_counter() - t0 - base) / n
+    assert per_call < 2e-6
+
+
+def test_spans_nest_and_carry_attributes(tracer):
+    with span("outer") as sp:
+        sp.set(step=1)
+        with span("inner", rows=5):
+            time.sleep(0.01)
+
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("boom")
+
+    by_name = {s.name: s for s in tracer.spans()}
+    assert [s.name for s in tracer.spans()] == ["outer", "inner", "failing"]
+    assert by_name["outer"].depth == 0 and by_name["inner"].depth == 1
+    assert by_name["outer"].attrs == {"step": 1}
+    assert by_name["inner"].seconds >= 0.01
+    assert by_name["outer"].seconds >= by_name["inner"].seconds
+    assert by_name["failing"].error == "ValueError: boom"
+
+
+def test_sizes_of_common_objects():
+    df = pd.DataFrame({"a": np.zeros(10), "b": np.zeros(10)})
+    assert sizes(df)["rows"] == 10 and sizes(df)["cols"] == 2 and sizes(df)["bytes"] >= 160
+    assert sizes(np.zeros((4, 3), dtype=np.float32)) == {"rows": 4, "cols": 3, "bytes": 48}
+    assert sizes(df["a"])["cols"] == 1
+    assert sizes((df, "meta")) == sizes(df)
+    assert sizes("héllo") == {"bytes": 6}
+    assert sizes(3.0) == {}
+
+
+def test_mmm_pipeline_is_instrumented(tracer):
+    df = _frame()
+    spend_cols = ["tv_spend", "search_spend"]
+    X, y, _ = prepare_mmm_design(df, "date", "revenue", spend_cols)
+    res = fit_mmm_ols(X, y)
+    roi_by_channel(df, pd.Series(X.sum().to_numpy() * res.params, index=X.columns), spend_cols)
+
+    spans = {s.name: s for s in tracer.spans()}
+    assert {"mmm.prepare_mmm_design", "mmm.fit_mmm_ols", "mmm.lstsq", "mmm.roi_by_channel"} <= set(spans)
+    assert spans["mmm.prepare_mmm_design"].attrs["rows"] == 60
+    assert spans["mmm.prepare_mmm_design"].attrs["cols"] == 3
+    assert spans["mmm.fit_mmm_ols"].attrs["rows"] == 60
+    assert spans["mmm.lstsq"].depth == spans["mmm.fit_mmm_ols"].depth + 1
+    assert spans["mmm.lstsq"].attrs["bytes"] == 60 * 3 * 8
+
+
+def test_agent_nodes_trace_on_their_threads(tracer):
+    def words(inputs):
+        yield from ("a ", "b ", "c")
+
+    DAG([Node("x", lambda s: "hello"), Node("y", words), Node("z", lambda s: s["x"] + s["y"], inputs=("x", "y"))]).run({})
+
+    spans = {s.name: s for s in tracer.spans()}
+    assert set(spans) == {"agent.x", "agent.y", "agent.z"}
+    assert spans["agent.y"].attrs["deltas"] == 3
+    assert spans["agent.z"].attrs["bytes"] == len("helloa b c")
+    assert all(s.thread_name != threading.current_thread().name for s in spans.values())
+
+
+def test_exports(tracer):
+    @traced("work.step")
+    def step(n):
+        return np.zeros((n, 2))
+
+    with span("work.outer"):
+        step(3)
+    worker = threading.Thread(target=step, args=(5,), name="worker")
+    worker.start()
+    worker.join()
+
+    lines = [json.loads(line) for line in tracer.to_jsonl().splitlines()]
+    assert [l["name"] for l in lines] == ["work.outer", "work.step", "work.step"]
+    assert lines[1]["attrs"] == {"rows": 3, "cols": 2, "bytes": 48}
+
+    trace = tracer.to_chrome_trace()
+    json.dumps(trace)
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    names = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    assert len(events) == 3 and {"worker", threading.current_thread().name} == names
+    assert all(e["dur"] >= 0 and e["cat"] == "work" for e in events)
+    outer, inner = events[0], events[1]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+    summary = {r["name"]: r for r in tracer.summary()}
+    assert summary["work.step"]["calls"] == 2 and summary["work.step"]["rows"] == 5
+
+
+def test_tracer_keeps_the_most_recent_spans():
+    t = Tracer(enabled=True, max_spans=3)
+    for i in range(5):
+        with t.span(f"s{i}"):
+            pass
+    assert [s.name for s in t.spans()] == ["s2", "s3", "s4"]
+
+
+def test_sessions_trace_into_their_own_tracers():
+    # two "sessions" on their own threads, each with a bound tracer, one on
+    # and one off; neither touches the process-wide default
+    tracing.disable()
+    tracing.TRACER.clear()
+    barrier = threading.Barrier(2, timeout=5)
+    tracers = {"on": Tracer(enabled=True), "off": Tracer()}
+
+    def session(key):
+        tracing.activate(tracers[key])
+        barrier.wait()  # both bound before either records
+        with span(f"{key}.page"):
+            DAG([Node("x", lambda s: "hi")]).run({})
+        barrier.wait()
+        tracing.disable()  # only this session's tracer
+
+    threads = [threading.Thread(target=session, args=(k,)) for k in tracers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [s.name for s in tracers["on"].spans()] == ["on.page", "agent.x"]
+    assert tracers["off"].spans() == [] and tracing.TRACER.spans() == []
+    assert not tracers["on"].enabled and not tracing.is_enabled()
+
+    token = tracing.activate(tracers["off"])
+    assert tracing.current() is tracers["off"]
+    tracing.deactivate(token)
+    assert tracing.current() is tracing.TRACER